@@ -0,0 +1,62 @@
+# app/benchmark_detail.py
+"""
+    benchmark detail view items: ORM (selectinload + to_dict_fast + transform + orjson)
+    против JSON, собранного в PostgreSQL (ItemRepository.get_detail_json)
+    нужна рабочая БД; результаты обоих путей сверяются
+    запуск: python -m app.benchmark_detail [кол-во items] [язык]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import orjson
+from sqlalchemy import select
+
+import app.support  # noqa: F401  регистрация всех моделей
+from app.core.config.database.db_async import DatabaseManager
+from app.support.item.model import Item
+from app.support.item.repository import ItemRepository
+from app.support.item.service import ItemService
+
+DEFAULT_IMAGE = ('default_fid', 'default_thumb_fid')
+
+
+def _request():
+    """ get_default_image берет заглушку из request.app.state """
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(seaweed_fids_default=DEFAULT_IMAGE)))
+
+
+def _stats(name: str, timings: list):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f'{name:<6} mean {statistics.mean(timings) * 1000:8.3f} ms  p50 {statistics.median(timings) * 1000:8.3f} ms'
+          f'  p99 {p99 * 1000:8.3f} ms')
+
+
+async def run_benchmark(count: int = 200, lang: str = 'en'):
+    DatabaseManager.__init__()
+    request = _request()
+    async with DatabaseManager.session_maker() as session:
+        ids = (await session.execute(select(Item.id).order_by(Item.id).limit(count))).scalars().all()
+        orm, sql, diff = [], [], 0
+        for id in ids:
+            start = time.perf_counter()
+            item = await ItemService.get_detail_view(request, lang, id, ItemRepository, Item, session)
+            orm_bytes = orjson.dumps(item)
+            orm.append(time.perf_counter() - start)
+            session.expunge_all()
+            start = time.perf_counter()
+            sql_bytes = await ItemService.get_detail_view_json(request, lang, id, ItemRepository, Item, session)
+            sql.append(time.perf_counter() - start)
+            diff += orjson.loads(orm_bytes) != orjson.loads(sql_bytes)
+    print(f'{len(ids)} items, lang={lang}, расхождений: {diff}')
+    _stats('orm', orm)
+    _stats('sql', sql)
+    await DatabaseManager.close()
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:3]
+    asyncio.run(run_benchmark(*([int(args[0])] if args else []), *args[1:2]))
@@ -0,0 +1,84 @@
+# app/benchmark_pool.py
+"""
+    benchmark режимов пула DatabaseManager (settings_db.DB_POOL_MODE): null / direct / pgbouncer
+    на горячих read-эндпоинтах items: detail view (JSON из PostgreSQL) и list view с пагинацией
+    каждый запрос - своя сессия, как get_db: в латентность входит получение соединения и подготовка запросов
+    нужна рабочая БД; для pgbouncer - pgbouncer >= 1.21 с max_prepared_statements > 0
+    запуск: python -m app.benchmark_pool [кол-во запросов] [параллельность] [режимы через запятую]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from itertools import cycle
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+import app.support  # noqa: F401  регистрация всех моделей
+from app.core.config.database.db_async import POOL_MODES, DatabaseManager
+from app.support.item.model import Item
+from app.support.item.repository import ItemRepository
+from app.support.item.service import ItemService
+
+DEFAULT_IMAGE = ('default_fid', 'default_thumb_fid')
+PAGE_SIZE = 20
+
+
+def _request():
+    """ get_default_image берет заглушку из request.app.state """
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(seaweed_fids_default=DEFAULT_IMAGE)))
+
+
+def _stats(name: str, timings: list):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f'{name:<20} p50 {statistics.median(timings) * 1000:8.3f} ms  p99 {p99 * 1000:8.3f} ms'
+          f'  mean {statistics.mean(timings) * 1000:8.3f} ms')
+
+
+async def detail(request, id: int, session):
+    return await ItemService.get_detail_view_json(request, 'en', id, ItemRepository, Item, session)
+
+
+async def list_page(request, page: int, session):
+    return await ItemService.get_list_view_page(request, page, PAGE_SIZE, ItemRepository, Item, session)
+
+
+async def measure(endpoint, args: list, count: int, concurrency: int) -> list:
+    """ count запросов endpoint при concurrency одновременных, аргументы по кругу """
+    request, args, timings = _request(), cycle(args), []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(arg):
+        async with semaphore:
+            start = time.perf_counter()
+            async with DatabaseManager.session_maker() as session:
+                await endpoint(request, arg, session)
+                await session.commit()
+            timings.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(next(args)) for _ in range(count)))
+    return timings
+
+
+async def run_benchmark(count: int = 1000, concurrency: int = 20, modes: tuple = POOL_MODES):
+    for mode in modes:
+        DatabaseManager.__init__(mode)
+        try:
+            async with DatabaseManager.session_maker() as session:
+                ids = (await session.execute(select(Item.id).order_by(Item.id).limit(count))).scalars().all()
+            pages = list(range(1, max(2, len(ids) // PAGE_SIZE)))
+            await measure(detail, ids, concurrency, concurrency)     # прогрев пула и кэша statements
+            print(f'режим {mode}: {count} запросов, параллельно {concurrency}')
+            _stats(f'{mode} detail', await measure(detail, ids, count, concurrency))
+            _stats(f'{mode} list', await measure(list_page, pages, count, concurrency))
+        except Exception as e:
+            print(f'режим {mode} недоступен: {e}')
+        finally:
+            await DatabaseManager.close()
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:4]
+    asyncio.run(run_benchmark(*(int(arg) for arg in args[:2]), *([tuple(args[2].split(','))] if args[2:] else [])))
@@ -0,0 +1,98 @@
+# app/benchmark_serializer.py
+"""
+    benchmark: компилированный сериализатор (to_dict_fast / serializer.dumps)
+    против прежнего рефлексивного to_dict_reflective на графах Item -> Drink -> Site -> ... -> Country
+    запуск: python -m app.benchmark_serializer [кол-во items] [повторы]
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import orjson
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.models.serializer import dumps, serialize_list
+from app.support import (Category, Country, Drink, Food, Item, Region, Site, Subcategory, Subregion, Superfood,
+                         Varietal)
+from app.support.drink.model import DrinkFood, DrinkVarietal
+
+LANGS = ('', '_ru', '_fr', '_es', '_it', '_de', '_zh')
+
+
+def _make(model, relations: dict = None, **fields):
+    """ instance как после загрузки из БД: значения без событий ORM (без back_populates) """
+    obj = model()
+    for key, val in fields.items():
+        set_committed_value(obj, key, val)
+    for key, val in (relations or {}).items():
+        set_committed_value(obj, key, val)
+    return obj
+
+
+def _names(base: str, field: str = 'name') -> dict:
+    return {f'{field}{lang}': f'{base}{lang}' for lang in LANGS}
+
+
+def make_items(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    country = _make(Country, id=1, created_at=now, updated_at=now, **_names('France'))
+    region = _make(Region, {'country': country}, id=1, country_id=1, created_at=now, updated_at=now,
+                   **_names('Bordeaux'), **_names('Bordeaux is ...', 'description'))
+    subregion = _make(Subregion, {'region': region}, id=1, region_id=1, created_at=now, updated_at=now,
+                      **_names('Medoc'))
+    site = _make(Site, {'subregion': subregion}, id=1, subregion_id=1, created_at=now, updated_at=now,
+                 **_names('Pauillac'))
+    category = _make(Category, id=1, created_at=now, updated_at=now, **_names('Wine'))
+    subcategory = _make(Subcategory, {'category': category}, id=1, category_id=1, created_at=now,
+                        updated_at=now, **_names('Red'))
+    superfood = _make(Superfood, id=1, created_at=now, updated_at=now, **_names('Meat'))
+    foods = [_make(Food, {'superfood': superfood}, id=n, superfood_id=1, created_at=now, updated_at=now,
+                   **_names(f'Food {n}')) for n in range(1, 4)]
+    varietals = [_make(Varietal, id=n, created_at=now, updated_at=now, **_names(f'Grape {n}')) for n in range(1, 3)]
+    items = []
+    for n in range(1, count + 1):
+        drink = _make(Drink, {'site': site, 'subcategory': subcategory,
+                              'food_associations': [_make(DrinkFood, {'food': f}, id=n * 10 + f.id,
+                                                          drink_id=n, food_id=f.id) for f in foods],
+                              'varietal_associations': [_make(DrinkVarietal, {'varietal': v}, id=n * 10 + v.id,
+                                                              drink_id=n, varietal_id=v.id,
+                                                              percentage=Decimal('50.00')) for v in varietals]},
+                      id=n, alc=Decimal('13.50'), sugar=None, age='', sparkling=False, subcategory_id=1, site_id=1,
+                      created_at=now, updated_at=now, anno='2019', **_names(f'Chateau {n}', 'title'),
+                      **_names('long text ' * 20, 'description'))
+        items.append(_make(Item, {'drink': drink}, id=n, vol=Decimal('0.75'), price=Decimal('99.90'), count=0,
+                           drink_id=n, created_at=now, updated_at=now, image_id='69be8dcf9d1415cddd3420d8',
+                           seaweed_fids=['20,cf5fefa821', '16,d0e133a318']))
+    return items
+
+
+def _timeit(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(count: int = 1000, repeat: int = 5):
+    items = make_items(count)
+    reference = [item.to_dict_reflective() for item in items]
+    assert serialize_list(items) == reference, 'результат сериализатора отличается от to_dict_reflective'
+    cases = {'to_dict_reflective': lambda: [item.to_dict_reflective() for item in items],
+             'to_dict_fast (compiled)': lambda: [item.to_dict_fast() for item in items],
+             'serialize_list': lambda: serialize_list(items),
+             'reflective + orjson': lambda: orjson.dumps([item.to_dict_reflective() for item in items]),
+             'serializer.dumps': lambda: dumps(items)}
+    base = None
+    print(f'{count} items, лучшее из {repeat}')
+    for name, func in cases.items():
+        elapsed = _timeit(func, repeat)
+        base = base or elapsed
+        print(f'{name:<26} {elapsed * 1000:9.2f} ms  {elapsed / count * 1e6:8.2f} us/item  x{base / elapsed:.2f}')
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    run_benchmark(*args)
@@ -1,41 +1,71 @@
 # app/core/config/database/db_async.py
 # асинхронный драйвер
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import (create_async_engine,
                                     async_sessionmaker,
                                     # AsyncEngine,
                                     AsyncSession)
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from sqlalchemy import text
 from loguru import logger
 from app.core.config.database.db_config import settings_db
 
+POOL_MODES = ('null', 'direct', 'pgbouncer')
+
+
+def statement_name() -> str:
+    """ уникальное имя prepared statement: в transaction mode pgbouncer соединения клиентов
+        делят серверные - совпадающие имена (__asyncpg_stmt_1__) дают "already exists" """
+    return f'__asyncpg_{uuid4().hex}__'
+
 
 class DatabaseManager:
     engine = None
     session_maker = None
     connection_string = None
+    pool_mode = None
+
+    @classmethod
+    def engine_options(cls, mode: str) -> dict:
+        """ url и аргументы create_async_engine для режима пула settings_db.DB_POOL_MODE
+            null       без пула, через pgbouncer; prepared statements отключены (соединение на запрос)
+            direct     AsyncAdaptedQueuePool напрямую в postgres; кэш prepared statements драйвера
+            pgbouncer  AsyncAdaptedQueuePool через pgbouncer (transaction mode); protocol-level prepared
+                       statements с уникальными именами - pgbouncer (max_prepared_statements) переносит их
+                       между серверными соединениями
+        """
+        if mode not in POOL_MODES:
+            raise ValueError(f'DB_POOL_MODE: {mode}, допустимо {POOL_MODES}')
+        asyncpg = settings_db.DRIVER == 'asyncpg'
+        if mode == 'null':
+            connect_args = ({'prepared_statement_cache_size': 0, 'statement_cache_size': 0} if asyncpg
+                            else {'prepare_threshold': None})
+            return {'url': settings_db.database_url, 'poolclass': NullPool, 'connect_args': connect_args}
+        if asyncpg:
+            # кэш SQLAlchemy (prepared_statement_cache_size) и asyncpg (statement_cache_size)
+            connect_args = {'prepared_statement_cache_size': settings_db.DB_STATEMENT_CACHE,
+                            'statement_cache_size': settings_db.DB_STATEMENT_CACHE}
+            if mode == 'pgbouncer':
+                connect_args['prepared_statement_name_func'] = statement_name
+        else:
+            # psycopg готовит именованные statements протокольным Parse - pgbouncer >= 1.21 их отслеживает
+            connect_args = {'prepare_threshold': settings_db.DB_PREPARE_THRESHOLD}
+        return {'url': settings_db.direct_database_url if mode == 'direct' else settings_db.database_url,
+                'poolclass': AsyncAdaptedQueuePool,
+                'connect_args': connect_args,
+                'pool_pre_ping': True,
+                'pool_size': settings_db.POOL_SIZE,
+                'max_overflow': settings_db.MAX_OVERFLOW,
+                'pool_recycle': settings_db.POOL_RECYCLE}
 
     @classmethod
-    def __init__(cls):
-        cls.connection_string = settings_db.database_url
+    def __init__(cls, mode: str = None):
+        cls.pool_mode = mode or settings_db.DB_POOL_MODE
+        options = cls.engine_options(cls.pool_mode)
+        cls.connection_string = options['url']
         # Создаем Engine (Singleton)
-        cls.engine = create_async_engine(settings_db.database_url,
-                                         echo=settings_db.DB_ECHO_LOG,
-                                         poolclass=NullPool,
-                                         connect_args={"prepared_statement_cache_size": 0,
-                                                       "statement_cache_size": 0, },
-
-                                         # ВАЖНО: отключаем встроенный пул SQLAlchemy
-                                         # connect_args={"server_settings": {"extra_float_digits": "3",
-                                         #                                   "statement_timeout": "30000"}},
-
-                                         # Опционально: таймаут 30 сек
-                                         # все что ниже только для прямого соединения
-                                         # pool_pre_ping=True,
-                                         # pool_size=settings_db.POOL_SIZE,
-                                         # max_overflow=settings_db.MAX_OVERFLOW,
-                                         # pool_recycle=settings_db.POOL_RECYCLE
-                                         )
+        cls.engine = create_async_engine(options.pop('url'), echo=settings_db.DB_ECHO_LOG, **options)
 
         # Создаем фабрику сессий
         cls.session_maker = async_sessionmaker(
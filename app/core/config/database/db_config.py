@@ -32,6 +32,12 @@ class ConfigDataBase(BaseSettings):
     DRIVER: str = 'psycopg_async'  # asyncpg
     # закрывает зависшие соединения
     POOL_RECYCLE: int = 3600
+    # пул DatabaseManager: null - без пула через pgbouncer без prepared statements (как было),
+    # direct - AsyncAdaptedQueuePool напрямую в postgres, pgbouncer - пул + prepared statements через pgbouncer
+    # (transaction mode, нужен pgbouncer >= 1.21 с max_prepared_statements > 0)
+    DB_POOL_MODE: str = 'null'
+    DB_STATEMENT_CACHE: int = 100   # asyncpg: кэш prepared statements на соединение
+    DB_PREPARE_THRESHOLD: int = 5   # psycopg: после скольких выполнений запрос готовится на сервере
     OLLAMA_HOST: str = 'http://localhost:11434'
     OLLAMA_TIMEOUT: float = 60.0
 
@@ -53,6 +59,13 @@ class ConfigDataBase(BaseSettings):
         )
         """
 
+    @property
+    def direct_database_url(self) -> Optional[PostgresDsn]:
+        """ строка подключения напрямую к postgres, минуя pgbouncer """
+        return (f"postgresql+{self.DRIVER}://{self.POSTGRES_USER}:"
+                f"{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:"
+                f"{self.POSTGRES_PORT}/{self.POSTGRES_DB}")
+
     @property
     def django_database_url(self) -> Optional[PostgresDsn]:
         """
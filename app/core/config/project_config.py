@@ -115,6 +115,79 @@ class Settings(BaseSettings):
     PAGE_MIN: int = 0
     # максимальное кол-во страниц
     PAGE_MAX: int = 1000
+    # режим подсчета total при пагинации: exact | cached | estimated
+    COUNT_MODE: str = "cached"
+    # время жизни закешированного total, сек (страховка от записей из других процессов)
+    COUNT_CACHE_TTL: int = 300
+    # максимальное кол-во закешированных запросов подсчета
+    COUNT_CACHE_SIZE: int = 1024
+    # ниже этого порога оценка планировщика заменяется точным подсчетом
+    COUNT_ESTIMATE_MIN: int = 10000
+    # размер пачки массового обновления (Repository.bulk_update)
+    BULK_UPDATE_BATCH: int = 1000
+    # предел bind-параметров одного запроса массовой вставки (asyncpg 32767, psycopg 65535)
+    BULK_MAX_PARAMS: int = 32767
+    # размер пачки потоковой выдачи (/all, /full, /api ... ?stream=ndjson|json)
+    STREAM_BATCH: int = 500
+    # кеш справочников (/handbooks, /handbooks_page): время жизни, сек и макс. кол-во записей
+    HANDBOOK_CACHE_TTL: int = 600
+    HANDBOOK_CACHE_SIZE: int = 512
+    # дельта-синхронизация справочников (/handbooks_bundle): перекрытие окна updated_at, сек
+    # (now() - время начала транзакции: запись, закоммиченная позже, может иметь более ранний updated_at)
+    HANDBOOK_DELTA_OVERLAP: int = 60
+    # индексы справочников в памяти (автодополнение, нечеткий поиск): интервал проверки изменений, сек
+    AUTOCOMPLETE_REFRESH: int = 5
+    # нечеткий поиск (rapidfuzz WRatio 0..100): порог выдачи и порог "это дубль" при импорте
+    FUZZY_CUTOFF: float = 70
+    FUZZY_DEDUP_CUTOFF: float = 92
+    # batch_get_or_create справочников по name: почти совпадающее имя (FUZZY_DEDUP_CUTOFF) - существующая запись
+    FUZZY_DEDUP: bool = False
+    # "возможно, вы имели в виду" (названия напитков) при пустой выдаче умного поиска
+    SEARCH_SUGGESTIONS: bool = True
+    # detail view items (GET /detail/{lang}/{id}, ItemViewRouter - без префикса): True - JSON собирается в PostgreSQL, False - ORM + transform
+    DETAIL_VIEW_SQL: bool = True
+    # поиск GET /search_smart_page/{lang} (ItemViewRouter - без префикса): 'pg' - FTS PostgreSQL, 'memory' - индекс в памяти процесса
+    SMART_SEARCH_BACKEND: str = 'pg'
+    # индекс в памяти: интервал проверки изменений items и перекрытие окна updated_at, сек
+    SEARCH_INDEX_REFRESH: int = 5
+    SEARCH_INDEX_OVERLAP: int = 60
+    # кеш результатов умного поиска (pg): время жизни, сек (предел устаревания при записях arq-воркеров
+    # и других процессов - их изменения кеш не сбрасывают) и бюджет памяти, байт
+    SEARCH_CACHE_TTL: int = 30
+    SEARCH_CACHE_BYTES: int = 16 * 1024 * 1024
+    # сессии поиска (курсор вместо last_score/last_id): включены, время жизни, сек, кол-во сессий,
+    # макс. строк в сессии (дальше - keyset по last_score/last_id)
+    # сессии в памяти процесса: при нескольких uvicorn workers курсор с другого worker строит сессию заново;
+    # первая страница без курсора идет через сессию только при SEARCH_SESSIONS (иначе - keyset + SearchResultCache)
+    SEARCH_SESSIONS: bool = False
+    SEARCH_SESSION_TTL: int = 600
+    SEARCH_SESSION_SIZE: int = 256
+    SEARCH_SESSION_ROWS: int = 5000
+    # гибридный поиск (GET /search_hybrid/{lang}, ItemViewRouter - без префикса): общий бюджет и таймауты движков, мс,
+    # глубина списка каждого движка, k для reciprocal rank fusion
+    HYBRID_BUDGET: int = 400
+    HYBRID_PG_TIMEOUT: int = 350
+    HYBRID_CH_TIMEOUT: int = 350
+    HYBRID_DEPTH: int = 200
+    HYBRID_RRF_K: int = 60
+    # переиндексация items.search_content (ReindexPipeline): размер пачки, процессов извлечения текста
+    # (0 - по числу ядер), емкость очередей между стадиями, пачек; лог прогресса каждые N пачек
+    REINDEX_BATCH: int = 1500
+    REINDEX_WORKERS: int = 0
+    REINDEX_QUEUE: int = 4
+    REINDEX_LOG_EVERY: int = 20
+    # change feed search_content (триггеры + LISTEN search_feed): включен, окно накопления изменений, сек,
+    # пауза перед переподключением / повтором после ошибки, сек; интервал попыток резервного процесса
+    # (уведомления обрабатывает один процесс - держатель advisory lock) стать слушателем, сек
+    CHANGE_FEED: bool = True
+    CHANGE_FEED_WINDOW: float = 1.0
+    CHANGE_FEED_RETRY: int = 5
+    CHANGE_FEED_STANDBY: int = 30
+    # фоновые задачи (JobRunner): сохранение прогресса и heartbeat, сек; задача без heartbeat дольше
+    # JOB_STALE сек считается брошенной и продолжается с checkpoint; записей в /jobs по умолчанию
+    JOB_FLUSH: float = 2.0
+    JOB_STALE: int = 60
+    JOB_LIST_LIMIT: int = 50
 
     # === настройки для импорта изображений ====
     # директория куда складывать файлы с картинками и откуда они подтягиваются в mongo
@@ -179,6 +252,16 @@ class Settings(BaseSettings):
     ARQ_MAX_TRIES: int = 3  # максимум 3 попытки
     ARQ_MIN_DELAY: int = 3
     ARQ_MAX_DELAY: int = 10
+    # фоновые задачи JobRunner в arq-воркерах (app/jobs_arq_worker.py); False - в процессе API
+    ARQ_JOBS: bool = False
+    # очереди задач: max_jobs - одновременных задач воркера, nice - приоритет процесса воркера
+    # (больше - ниже, уступает API и другим очередям), timeout - предел выполнения задачи, сек
+    ARQ_QUEUES: Dict[str, Dict[str, int]] = {
+        'cpu-images': {'max_jobs': 1, 'nice': 10, 'timeout': 86400},
+        'llm': {'max_jobs': 1, 'nice': 0, 'timeout': 21600},
+        'db-maintenance': {'max_jobs': 2, 'nice': 5, 'timeout': 86400},
+        'crawl': {'max_jobs': 4, 'nice': 15, 'timeout': 86400},
+    }
 
     # === EMAIL SETTINGS ===
     EMAIL_HOST: str = "smtp.gmail.com"
@@ -240,6 +323,11 @@ class Settings(BaseSettings):
     CH_USER: str = 'secret_user'
     CH_PASSWORD: str = 'top_secret'
     CH_LIMIT: int = 1000  # ограничение кол-ва записей - защита от перегрузки
+    # items_search: колонка версии ReplacingMergeTree (актуальная строка - argMax вместо FINAL;
+    # проверяется при старте, нет колонки - FINAL)
+    CH_VERSION_COLUMN: str = '_version'
+    # skip index по search_content для hasToken
+    CH_TOKEN_INDEX: str = 'tokenbf_v1(32768, 3, 0)'
 
     # === SEAWEEEDFS ===
     SEAWEED_CONTAINER: str = 'seaweedfs_volume'
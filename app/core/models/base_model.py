@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, declared_attr, Mapped, mapped_column
 
 from app.core.models.mixins import DynamicCompositeUniqueMixin, UniqueNormalizedNameMixin
+from app.core.models.serializer import get_serializer
 
 # from app.core.config.project_config import settings
 
@@ -175,6 +176,14 @@ class Base(AsyncAttrs, DeclarativeBase):
         """
         Быстрая версия с пропуском пустых значений
         exclude - список полей которые должны быть исключены из вывода
+        функция сериализации генерируется один раз на (модель, exclude, skip_empty),
+        см. app.core.models.serializer
+        """
+        return get_serializer(self.__class__, exclude, skip_empty)(self)
+
+    def to_dict_reflective(self, exclude=None, skip_empty=True):
+        """
+        прежняя рефлексивная реализация to_dict_fast - эталон для тестов и benchmark
         """
         if exclude is None:
             exclude = set()
@@ -231,7 +240,7 @@ class Base(AsyncAttrs, DeclarativeBase):
                 converted_list = []
                 for item in value:
                     if hasattr(item, 'to_dict_fast'):
-                        converted_item = item.to_dict_fast(exclude, skip_empty)
+                        converted_item = item.to_dict_reflective(exclude, skip_empty)
                         # Добавляем только если converted_item не пустой (при skip_empty=True)
                         if not skip_empty or converted_item:
                             converted_list.append(converted_item)
@@ -250,7 +259,7 @@ class Base(AsyncAttrs, DeclarativeBase):
 
             # Обработка одиночного связанного объекта
             elif hasattr(value, 'to_dict_fast'):
-                converted = value.to_dict_fast(exclude, skip_empty)
+                converted = value.to_dict_reflective(exclude, skip_empty)
                 if not skip_empty or converted:
                     result[key] = converted
             elif hasattr(value, 'to_dict'):
@@ -0,0 +1,41 @@
+# app/core/models/job_model.py
+"""
+    фоновые задачи (JobRunner, app.core.services.job_service): состояние, checkpoint и счетчики
+    переживают перезапуск - задача продолжается с checkpoint
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.models.base_model import Base, BaseAt
+
+ACTIVE = ('pending', 'running')
+FINISHED = ('done', 'failed', 'cancelled')
+ACTIVE_WHERE = "status IN ('pending', 'running')"     # условие частичного индекса (и ON CONFLICT)
+
+
+class Job(Base, BaseAt):
+    name: Mapped[str] = mapped_column(index=True)          # обработчик (JobRunner.register)
+    key: Mapped[str]                                        # одна активная задача на key
+    status: Mapped[str] = mapped_column(server_default='pending', index=True)
+    params: Mapped[dict] = mapped_column(JSONB, server_default=text("'{}'::jsonb"))
+    checkpoint: Mapped[Optional[dict]] = mapped_column(JSONB)   # последний обработанный ключ
+    processed: Mapped[int] = mapped_column(server_default=text('0'))
+    total: Mapped[Optional[int]]
+    errors: Mapped[int] = mapped_column(server_default=text('0'))
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    cancel_requested: Mapped[bool] = mapped_column(server_default=text('false'))
+    owner: Mapped[Optional[str]]                            # host:pid процесса, который выполняет задачу
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))   # начало текущего запуска
+    resumed_from: Mapped[int] = mapped_column(server_default=text('0'))   # processed на начало запуска
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (Index('uq_jobs_active_key', 'key', unique=True,
+                            postgresql_where=text(ACTIVE_WHERE)),)
+
+    def __str__(self):
+        return f'{self.name} {self.key} {self.status}'
@@ -0,0 +1,59 @@
+# app/core/repositories/bulk_update.py
+"""
+    общий движок массового обновления для всех репозиториев:
+    строки группируются по набору изменяемых колонок,
+    каждая группа уходит пачками по batch_size одним UPDATE ... FROM (VALUES ...)
+"""
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import ARRAY, cast, column, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.project_config import settings
+from app.core.types import ModelType
+
+
+def _adapt(value: Any, col) -> Any:
+    """ кортежи для ARRAY колонок -> list (иначе драйвер отправит record) """
+    if isinstance(value, tuple) and isinstance(col.type, ARRAY):
+        return list(value)
+    return value
+
+
+def group_by_columns(rows: List[Dict[str, Any]], key: str = 'id') -> Dict[tuple, List[dict]]:
+    """ {(колонки по алфавиту): [строки, меняющие именно эти колонки], ...} """
+    groups: Dict[tuple, List[dict]] = {}
+    for row in rows:
+        cols = tuple(sorted(k for k in row if k != key))
+        if cols:
+            groups.setdefault(cols, []).append(row)
+    return groups
+
+
+async def bulk_update(rows: List[Dict[str, Any]], model: ModelType, session: AsyncSession,
+                      batch_size: Optional[int] = None, key: str = 'id') -> int:
+    """
+        rows = [{'id': 104, 'seaweed_fids': ('20,cf5fefa821', '16,d0e133a318')},
+                {'id': 105, 'search_content': '...'}, ...]
+        каждая строка обязана содержать key (по умолчанию id), колонки не из таблицы игнорируются
+        возвращает кол-во обновленных записей
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    batch_size = batch_size or settings.BULK_UPDATE_BATCH
+    rows = [{k: v for k, v in row.items() if k in table.c} for row in rows]
+    affected = 0
+    for cols, group in group_by_columns(rows, key).items():
+        for i in range(0, len(group), batch_size):
+            batch = group[i:i + batch_size]
+            data = values(column(key, table.c[key].type), *[column(c, table.c[c].type) for c in cols],
+                          name='bulk_data').data([(row[key], *[_adapt(row.get(c), table.c[c]) for c in cols])
+                                                  for row in batch])
+            stmt = (update(table).where(table.c[key] == data.c[key])
+                    .values({c: cast(data.c[c], table.c[c].type) for c in cols}))
+            result = await session.execute(stmt)
+            affected += result.rowcount
+    logger.debug(f'bulk_update {table.name}: {affected}/{len(rows)}')
+    return affected
@@ -0,0 +1,152 @@
+# app/core/repositories/count_provider.py
+"""
+    подсчет total для пагинации.
+    три режима:
+    exact     - COUNT(*) по подзапросу на каждую страницу (как было)
+    cached    - точный COUNT(*), закешированный по нормализованному запросу;
+                кеш сбрасывается после commit записи в таблицы запроса (TableVersion)
+                и по TTL (записи из других процессов)
+    estimated - оценка планировщика (pg_class.reltuples или EXPLAIN) для запросов без фильтров;
+                для запросов с фильтрами - cached
+"""
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Optional, Tuple, Union
+
+import orjson
+from loguru import logger
+from sqlalchemy import func, Select, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.util import find_tables
+
+from app.core.config.project_config import settings
+from app.core.repositories.table_version import TableVersion
+from app.core.types import ModelType
+
+
+class CountMode(str, Enum):
+    EXACT = 'exact'
+    CACHED = 'cached'
+    ESTIMATED = 'estimated'
+
+
+class Total(int):
+    """
+        int с пометкой режима, которым получено значение.
+        ведет себя как обычный int - существующий код (total > 0, арифметика) не меняется
+    """
+    mode: str
+
+    def __new__(cls, value: Optional[int], mode: Union[CountMode, str] = CountMode.EXACT):
+        obj = super().__new__(cls, value or 0)
+        obj.mode = CountMode(mode).value
+        return obj
+
+
+class CountProvider:
+    # {ключ запроса: (поколения таблиц, total, время записи)}
+    _cache: 'OrderedDict[str, Tuple[Tuple[int, ...], int, float]]' = OrderedDict()
+
+    @classmethod
+    def invalidate(cls, target: Union[ModelType, str]):
+        """ сброс закешированных total для всех запросов, использующих таблицу """
+        TableVersion.bump(target)
+
+    @classmethod
+    def clear(cls):
+        cls._cache.clear()
+
+    @staticmethod
+    def _normalize(stmt: Select) -> Select:
+        """ сортировка и limit/offset не влияют на кол-во записей - убираем, чтобы страницы делили один ключ """
+        return stmt.order_by(None).limit(None).offset(None)
+
+    @staticmethod
+    def _tables(stmt: Select) -> Tuple[str, ...]:
+        names = {getattr(t, 'name', None) for t in find_tables(stmt, include_joins=True)}
+        return tuple(sorted(n for n in names if n))
+
+    @staticmethod
+    def _key(stmt: Select) -> str:
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = ' '.join(str(compiled).split())
+        params = orjson.dumps(compiled.params, default=str, option=orjson.OPT_SORT_KEYS)
+        return f'{sql}|{params.decode()}'
+
+    @staticmethod
+    def _is_unfiltered(stmt: Select) -> bool:
+        return (stmt.whereclause is None and not stmt._group_by_clauses
+                and stmt._having_criteria == () and not stmt._distinct)
+
+    @classmethod
+    def _snapshot(cls, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        return TableVersion.snapshot(tables)
+
+    @classmethod
+    async def exact(cls, stmt: Select, session: AsyncSession) -> int:
+        return (await session.execute(select(func.count()).select_from(stmt.subquery()))).scalar() or 0
+
+    @classmethod
+    async def cached(cls, stmt: Select, session: AsyncSession) -> Tuple[int, str]:
+        tables = cls._tables(stmt)
+        key = cls._key(stmt)
+        snapshot = cls._snapshot(tables)
+        entry = cls._cache.get(key)
+        if entry and entry[0] == snapshot and time.monotonic() - entry[2] < settings.COUNT_CACHE_TTL:
+            cls._cache.move_to_end(key)
+            return entry[1], CountMode.CACHED
+        total = await cls.exact(stmt, session)
+        cls._cache[key] = (snapshot, total, time.monotonic())
+        cls._cache.move_to_end(key)
+        while len(cls._cache) > settings.COUNT_CACHE_SIZE:
+            cls._cache.popitem(last=False)
+        return total, CountMode.EXACT
+
+    @classmethod
+    async def estimated(cls, stmt: Select, session: AsyncSession) -> Optional[int]:
+        """
+            оценка планировщика: reltuples для одной таблицы, иначе EXPLAIN.
+            None - если оценка недоступна (таблица не анализировалась)
+        """
+        try:
+            froms = stmt.get_final_froms()
+            if len(froms) == 1 and getattr(froms[0], 'name', None) and hasattr(froms[0], 'schema'):
+                table = froms[0]
+                name = f'{table.schema}.{table.name}' if table.schema else table.name
+                result = await session.execute(
+                    text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)'), {'t': name})
+                value = result.scalar()
+            else:
+                compiled = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})
+                result = await session.execute(text(f'EXPLAIN (FORMAT JSON) {compiled}'))
+                plan = result.scalar()
+                if isinstance(plan, str):
+                    plan = orjson.loads(plan)
+                value = plan[0]['Plan']['Plan Rows']
+            if value is None or value < 0:
+                return None
+            return int(value)
+        except Exception as e:
+            logger.warning(f'CountProvider.estimated: {e}')
+            return None
+
+    @classmethod
+    async def count(cls, stmt: Select, session: AsyncSession,
+                    mode: Union[CountMode, str, None] = None) -> Total:
+        """
+            total для запроса stmt в режиме mode (по умолчанию settings.COUNT_MODE)
+            возвращает Total (int) с атрибутом mode - каким способом получено значение
+        """
+        mode = CountMode(mode or settings.COUNT_MODE)
+        stmt = cls._normalize(stmt)
+        if mode == CountMode.EXACT:
+            return Total(await cls.exact(stmt, session), CountMode.EXACT)
+        if mode == CountMode.ESTIMATED and cls._is_unfiltered(stmt):
+            value = await cls.estimated(stmt, session)
+            # на маленьких таблицах оценка неточна, а точный подсчет дешев
+            if value is not None and value >= settings.COUNT_ESTIMATE_MIN:
+                return Total(value, CountMode.ESTIMATED)
+        total, source = await cls.cached(stmt, session)
+        return Total(total, source)
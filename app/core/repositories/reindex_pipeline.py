@@ -0,0 +1,226 @@
+# app/core/repositories/reindex_pipeline.py
+"""
+    конвейер переиндексации items.search_content: чтение -> извлечение текста -> запись
+    чтение:     keyset по (item_id, drink_id) пачками REINDEX_BATCH, drink -> dict (to_dict_fast)
+    извлечение: search_content_batch в ProcessPoolExecutor (REINDEX_WORKERS процессов) над чистыми dict,
+                цикл событий не блокируется
+    запись:     COPY во временную таблицу + один UPDATE ... FROM на пачку, commit после каждой пачки
+    между стадиями - ограниченные очереди (REINDEX_QUEUE пачек): быстрая стадия ждет медленную,
+    память не растет; по каждой стадии - кол-во строк, время работы и скорость, строк/сек
+    checkpoint - item_id, до которого (включительно) все пачки записаны: пачки нумеруются при чтении,
+    запись отмечает непрерывный префикс (извлечение параллельное, порядок записи произвольный);
+    run(after=checkpoint) продолжает с него
+    фоновый запуск, статус и отчет - JobRunner (задача search_reindex)
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import BigInteger, Column, MetaData, Table, Text, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.project_config import settings
+from app.core.models.base_model import get_model_by_name
+from app.core.repositories.search_cache import SearchResultCache
+from app.core.utils.reindexation import search_content_batch
+
+Progress = Callable[[int, Optional[int]], None]     # (записано строк, checkpoint)
+INLINE_ROWS = 200       # пачки меньше - без межпроцессного обмена, в потоке
+COPY_TABLE = Table('reindex_search_content', MetaData(),
+                   Column('id', BigInteger, primary_key=True, autoincrement=False), Column('search_content', Text),
+                   prefixes=['TEMPORARY'], postgresql_on_commit='DROP')
+
+
+class StageStats:
+    """ счетчики стадии: строки, пачки, время работы (без ожидания очередей), сек """
+    __slots__ = ('name', 'rows', 'batches', 'busy')
+
+    def __init__(self, name: str):
+        self.name, self.rows, self.batches, self.busy = name, 0, 0, 0.0
+
+    def add(self, rows: int, start: float):
+        self.rows += rows
+        self.batches += 1
+        self.busy += time.perf_counter() - start
+
+    def as_dict(self) -> dict:
+        return {'rows': self.rows, 'batches': self.batches, 'busy': round(self.busy, 3),
+                'rate': round(self.rows / self.busy) if self.busy else 0}
+
+
+class ReindexPipeline:
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def workers() -> int:
+        return settings.REINDEX_WORKERS or os.cpu_count() or 1
+
+    @classmethod
+    def pool(cls) -> ProcessPoolExecutor:
+        """ пул процессов на весь процесс приложения (spawn - без копии состояния цикла событий) """
+        if cls._pool is None:
+            cls._pool = ProcessPoolExecutor(max_workers=cls.workers(), mp_context=get_context('spawn'))
+        return cls._pool
+
+    @classmethod
+    def shutdown(cls):
+        if cls._pool is not None:
+            cls._pool.shutdown(cancel_futures=True)
+            cls._pool = None
+
+    @staticmethod
+    def full_pairs():
+        Item = get_model_by_name('Item')
+        return select(Item.id, Item.drink_id).where(Item.drink_id.isnot(None))
+
+    # --- чтение ---
+    @classmethod
+    async def load_drinks(cls, session: AsyncSession, drink_ids: List[int]) -> Dict[int, dict]:
+        from app.support.drink.repository import DrinkRepository
+        Drink = get_model_by_name('Drink')
+        stmt = DrinkRepository.get_query(Drink).where(Drink.id.in_(drink_ids))
+        result = await session.execute(stmt)
+        return {drink.id: drink.to_dict_fast() for drink in result.unique().scalars()}
+
+    @classmethod
+    async def read_batches(cls, session_factory, pairs_stmt=None, batch: Optional[int] = None,
+                           after: Optional[int] = None) -> AsyncIterator[List[Tuple[int, dict]]]:
+        """
+            pairs_stmt - select (item_id, drink_id) (Repository.get_item_drink), None - все items
+            keyset по item_id (after - начать после него); после пачки транзакция чтения закрывается,
+            identity map очищается
+        """
+        batch = batch or settings.REINDEX_BATCH
+        pairs = (pairs_stmt if pairs_stmt is not None else cls.full_pairs()).subquery()
+        item_id, drink_id = list(pairs.c)[:2]
+        last_id = after
+        async with session_factory() as session:
+            while True:
+                stmt = select(item_id, drink_id).where(drink_id.isnot(None))
+                if last_id is not None:
+                    stmt = stmt.where(item_id > last_id)
+                rows = (await session.execute(stmt.order_by(item_id).limit(batch))).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                drinks = await cls.load_drinks(session, list({row[1] for row in rows}))
+                await session.rollback()
+                session.expunge_all()
+                yield [(id, drinks[drink]) for id, drink in rows if drink in drinks]
+
+    # --- запись ---
+    @classmethod
+    async def copy_rows(cls, session: AsyncSession, rows: List[Tuple[int, str]]):
+        """ COPY во временную таблицу через соединение драйвера (psycopg или asyncpg) """
+        conn = await session.connection()
+        await conn.run_sync(COPY_TABLE.create)
+        raw = (await conn.get_raw_connection()).driver_connection
+        if hasattr(raw, 'copy_records_to_table'):
+            await raw.copy_records_to_table(COPY_TABLE.name, records=rows, columns=['id', 'search_content'])
+            return
+        async with raw.cursor() as cursor:
+            async with cursor.copy(f'COPY {COPY_TABLE.name} (id, search_content) FROM STDIN') as copy:
+                for row in rows:
+                    await copy.write_row(row)
+
+    @classmethod
+    async def write_batch(cls, session: AsyncSession, rows: List[Tuple[int, str]]) -> int:
+        """ -> кол-во измененных items (строки с тем же search_content не трогаются) """
+        table = get_model_by_name('Item').__table__
+        await cls.copy_rows(session, rows)
+        stmt = (update(table)
+                .where(table.c.id == COPY_TABLE.c.id,
+                       table.c.search_content.is_distinct_from(COPY_TABLE.c.search_content))
+                .values(search_content=COPY_TABLE.c.search_content))
+        result = await session.execute(stmt)
+        SearchResultCache.mark(session)
+        await session.commit()
+        return result.rowcount
+
+    # --- стадии ---
+    @classmethod
+    async def reader(cls, batches: AsyncIterator, out: asyncio.Queue, stats: StageStats, consumers: int):
+        start = time.perf_counter()
+        try:
+            async for rows in batches:
+                stats.add(len(rows), start)
+                await out.put((stats.batches, rows[-1][0] if rows else None, rows))
+                start = time.perf_counter()
+        finally:
+            await batches.aclose()
+        for _ in range(consumers):
+            await out.put(None)
+
+    @classmethod
+    async def extractor(cls, inp: asyncio.Queue, out: asyncio.Queue, skip_keys: set, stats: StageStats):
+        loop = asyncio.get_running_loop()
+        while (batch := await inp.get()) is not None:
+            seq, last_id, rows = batch
+            start = time.perf_counter()
+            if len(rows) < INLINE_ROWS:
+                result = await asyncio.to_thread(search_content_batch, rows, skip_keys)
+            else:
+                result = await loop.run_in_executor(cls.pool(), search_content_batch, rows, skip_keys)
+            stats.add(len(result), start)
+            await out.put((seq, last_id, result))
+        await out.put(None)
+
+    @classmethod
+    async def writer(cls, session_factory, inp: asyncio.Queue, stats: StageStats, producers: int,
+                     after: Optional[int] = None, on_progress: Optional[Progress] = None) -> int:
+        updated, written, next_seq, checkpoint = 0, {}, 1, after
+        async with session_factory() as session:
+            while producers:
+                if (batch := await inp.get()) is None:
+                    producers -= 1
+                    continue
+                seq, last_id, rows = batch
+                written[seq] = last_id
+                start = time.perf_counter()
+                if rows:
+                    updated += await cls.write_batch(session, rows)
+                stats.add(len(rows), start)
+                while next_seq in written:
+                    checkpoint = written.pop(next_seq) or checkpoint
+                    next_seq += 1
+                if on_progress is not None:
+                    on_progress(len(rows), checkpoint)
+                if stats.batches % settings.REINDEX_LOG_EVERY == 0:
+                    logger.info(f'📈 reindex: записано {stats.rows}, изменено {updated}')
+        return updated
+
+    @classmethod
+    async def run(cls, session_factory, skip_keys: set, pairs_stmt=None, after: Optional[int] = None,
+                  on_progress: Optional[Progress] = None) -> Dict[str, dict]:
+        """
+            переиндексация items, найденных pairs_stmt (None - всех), с item_id > after
+            on_progress(строк, checkpoint) - после каждой записанной пачки
+            -> {'read' | 'extract' | 'write': счетчики стадии, 'updated': .., 'elapsed': ..}
+            ошибка любой стадии отменяет остальные и пробрасывается; записанные пачки уже закоммичены
+        """
+        workers = cls.workers()
+        loaded = asyncio.Queue(maxsize=settings.REINDEX_QUEUE)
+        extracted = asyncio.Queue(maxsize=settings.REINDEX_QUEUE)
+        stats = {name: StageStats(name) for name in ('read', 'extract', 'write')}
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(cls.reader(cls.read_batches(session_factory, pairs_stmt, after=after),
+                                                loaded, stats['read'], workers)),
+                 *(asyncio.create_task(cls.extractor(loaded, extracted, skip_keys, stats['extract']))
+                   for _ in range(workers)),
+                 writer := asyncio.create_task(cls.writer(session_factory, extracted, stats['write'], workers,
+                                                          after, on_progress))]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+        report = {name: stage.as_dict() for name, stage in stats.items()}
+        report.update(updated=writer.result(), elapsed=round(time.perf_counter() - start, 3))
+        logger.info(f'reindex: {report}')
+        return report
@@ -1,107 +1,75 @@
 # app.core.repositories.repo_backround_tasks.py
-import asyncio
-from typing import Any, Optional, Dict
+from typing import Any, List, Optional, Tuple
 from loguru import logger
-from sqlalchemy import select, update
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config.database.db_async import DatabaseManager
 from app.core.config.project_config import settings
 from app.core.models.base_model import get_model_by_name
+from app.core.repositories.bulk_update import bulk_update
 from app.core.repositories.clickhouse_repository import ClickHouseRepository
-from app.core.utils.backgound_tasks import background_unique
-from app.core.utils.fts_tokenizer import tokenized_string
+from app.core.repositories.reindex_pipeline import ReindexPipeline
+from app.core.repositories.search_paths import item_drink_stmt
+from app.core.services.job_service import JobContext, JobRunner
 from app.core.utils.hashes import FastImageHasher
 from app.core.utils.headers import content_type_magic, make_meta
 from app.core.utils.image_processor import ImageProcessingConfig, ImageProcessor
-from app.core.utils.reindexation import extract_text_optimized  # , extract_text_ultra_fast
 from app.mongodb.service import ThumbnailImageService
+from app.service_registry import get_repo
+
+IMAGE_BATCH = 20    # изображений в пачке переноса mongo -> seaweed (обработка, запись в PG и clickhouse)
 
 
 class Background:
     """
-        run_sync_background:            запуск фоновой синхронизации
-            _get_item_drink_pairs:      Получаем ID пар ITEM_ID, DRINK_ID для обработки (индекс hash)
-            _process_pairs:             Обработка пар ITEM_ID, DRINK_ID
-                _load_drinks_batch:     Получение данных для чанка (словарь {drink_id: drink_dict}
-                _process_chunk:         Обработка чанка
-                    extract_text_optimized:     Извлечение текста из словаря
-                    tokenized_string            Нормализация текста
-                _bulk_update_items:     Сохранение результата
-                _bulk_upsert_wordhash:  Сохранение word hash
+        фоновые задачи - JobRunner (app.core.services.job_service): состояние, checkpoint и прогресс в jobs
+        run_sync_background:            задача search_reindex - синхронизация search_content
+            get_item_drink:             пары ITEM_ID, DRINK_ID для обработки (None - все items)
+            ReindexPipeline.run:        конвейер чтение -> извлечение текста (процессы) -> COPY + UPDATE
+                                        (app.core.repositories.reindex_pipeline), checkpoint - item_id
+        run_mongo_to_seaweed:           задача mongo_to_seaweed - перенос изображений, checkpoint - item_id
     """
 
     @classmethod
     def get_item_drink(cls, id: int):
         # переопределеяемый метод, для получения списка ids of Item отфильтрованного по id в связанной таблице
-        # если не значит см ниже
-        return select(None, None)
+        # по умолчанию - путь по реестру _SEARCH_DEPENDENCIES (app.core.repositories.search_paths)
+        return item_drink_stmt(cls.model, [id])
 
     @classmethod
-    @background_unique
-    async def run_sync_background(
-            cls, start_model, start_id: int, path_str: str, session_factory, skip_keys: set
-    ):
-        """ Точка входа для фоновой синхронизации поля search_content
-            если start_model = None: полная реиндексация
+    async def run_sync_background(cls, start_model, start_id: Optional[int], skip_keys: set,
+                                  session: Optional[AsyncSession] = None) -> dict:
+        """ Точка входа для фоновой синхронизации поля search_content -> запись задачи (/jobs/{id})
+            если start_model = None: полная реиндексация (одна на все приложение)
+            session - транзакция запроса: задача стартует после ее commit (видит изменения запроса)
         """
+        params = {'skip_keys': sorted(skip_keys)}
         if start_model:
-            task_name = f"{start_model.__name__}_{start_id}"
+            params.update(model=start_model.__name__, id=start_id)
+            key = None
         else:
-            task_name = 'full_reindexation'
-        logger.info(f"🚀 Начало фоновой синхронизации: {task_name}")
-
-        async with session_factory() as session:
-            try:
-                # Получаем ID пар для обработки (индекс hash)
-                pairs = await cls._get_item_drink_pairs(
-                    session, start_model, start_id, path_str
-                )
-
-                if not pairs:
-                    logger.warning(f"⚠️ Нет данных для синхронизации: {task_name}")
-                    return
-
-                logger.info(f"📊 Найдено {len(pairs)} записей для обработки")
-                # Обрабатываем с прогресс-баром
-                updated_count = await cls._process_pairs(
-                    session, pairs, skip_keys
-                )
-
-                await session.commit()
-                logger.success(f"✅ Синхронизация завершена: {task_name}, обновлено {updated_count} записей")
-
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"❌ Ошибка синхронизации {task_name}: {e}")
-                raise
+            key = 'search_reindex'
+        return await JobRunner.submit('search_reindex', params, key, session)
 
     @classmethod
-    async def _get_item_drink_pairs(
-            cls, session: AsyncSession, current_model, start_id: int, path_str: str
-    ) -> list:
-        """
-        Возвращает список пар [(item_id, drink_id), ...]
-        если current_model == None - полная переиндексация
-        """
-
-        try:
-            # Строим запрос
-            if current_model:
-                stmt = cls.get_item_drink(start_id)
-                logger.debug(f"🔍 Выполнение запроса для {current_model.__name__}.{start_id}")
-            else:
-                logger.warning('full reindexation')
-                ItemModel = cls._get_model('Item')
-                # DrinkModel = cls._get_model('Drink')
-                stmt = select(ItemModel.id, ItemModel.drink_id).where(ItemModel.drink_id.isnot(None))
-            result = await session.execute(stmt)
-            pairs = [(item_id, drink_id) for item_id, drink_id in result.all()]
-            logger.debug(f"📋 Получено {len(pairs)} пар Item-Drink")
-            return pairs
-
-        except Exception as e:
-            logger.error(f"Ошибка получения пар: {e}")
-            raise
+    async def search_reindex_job(cls, ctx: JobContext):
+        """ обработчик search_reindex: продолжает с checkpoint item_id """
+        pairs_stmt = None
+        if model := ctx.params.get('model'):
+            pairs_stmt = get_repo(model).get_item_drink(ctx.params['id'])
+        if ctx.total is None:
+            pairs = (pairs_stmt if pairs_stmt is not None else ReindexPipeline.full_pairs()).subquery()
+            async with DatabaseManager.session_maker() as session:
+                ctx.progress(total=await session.scalar(select(func.count()).select_from(pairs)))
+
+        def on_progress(rows: int, item_id: Optional[int]):
+            ctx.progress(rows, {'item_id': item_id} if item_id is not None else None)
+
+        report = await ReindexPipeline.run(DatabaseManager.session_maker, set(ctx.params['skip_keys']),
+                                           pairs_stmt, (ctx.checkpoint or {}).get('item_id'), on_progress)
+        logger.success(f"✅ Синхронизация завершена: job {ctx.id}, обновлено {report['updated']} записей "
+                       f"за {report['elapsed']} сек")
 
     @staticmethod
     def _get_model(model_name: str):
@@ -120,144 +88,6 @@ class Background:
                 return rel.key
         return None
 
-    @classmethod
-    async def _process_pairs(
-            cls, session: AsyncSession, pairs: list, skip_keys: set
-    ) -> int:
-        """
-        _process_pairs
-        _load_drinks_batch
-        _process_chunk
-        _bulk_update_items
-        Обрабатывает пары (item_id, drink_id) с логированием прогресса
-        """
-        chunk_size = 1500
-        total = len(pairs)
-        updated_count = 0
-
-        logger.info(f"🔄 Начало обработки {total} записей")
-
-        # Логируем прогресс каждые 5%
-        next_log_percent = 5
-        start_time = asyncio.get_event_loop().time()
-
-        for i in range(0, total, chunk_size):
-            chunk = pairs[i:i + chunk_size]
-
-            # Получаем Drink данные для чанка
-            drinks: Dict[Any, dict] = await cls._load_drinks_batch(session, chunk)
-            # {drink_id: drink_dict}
-            # Обрабатываем чанк
-            chunk_updates = await cls._process_chunk(
-                chunk, drinks, skip_keys
-            )
-
-            # Сохраняем результаты
-            if chunk_updates:
-                await cls._bulk_update_items(session, chunk_updates)
-                updated_count += len(chunk_updates)
-
-            # Логируем прогресс
-            current_percent = (updated_count / total) * 100
-            if current_percent >= next_log_percent:
-                elapsed = asyncio.get_event_loop().time() - start_time
-                speed = updated_count / elapsed if elapsed > 0 else 0
-                logger.info(
-                    f"📈 Прогресс: {current_percent:.1f}% "
-                    f"({updated_count}/{total}) "
-                    f"скорость: {speed:.0f} зап/сек"
-                )
-                next_log_percent += 5
-
-            # Даем время другим задачам
-            await asyncio.sleep(0.01)
-
-        # Финальный лог
-        elapsed = asyncio.get_event_loop().time() - start_time
-        logger.success(
-            f"✅ Обработка завершена: {updated_count} записей за {elapsed:.1f} сек, "
-            f"средняя скорость: {updated_count / elapsed:.0f} зап/сек"
-        )
-
-        return updated_count
-
-    @classmethod
-    async def _load_drinks_batch(
-            cls, session: AsyncSession, chunk: list
-    ) -> Dict[Any, Dict]:
-        """
-        Загружает Drink данные для чанка пар
-        Возвращает словарь {drink_id: drink_dict}
-        """
-        from app.support.drink.repository import DrinkRepository
-        DrinkModel = cls._get_model('Drink')
-        # Получаем уникальные drink_id
-        drink_ids = list(set([drink_id for _, drink_id in chunk]))
-        stmt = DrinkRepository.get_query(DrinkModel)
-        # Загружаем Drink объекты
-        stmt = stmt.where(DrinkModel.id.in_(drink_ids))
-        result = await session.execute(stmt)
-
-        # Превращаем в словари (unique - только уникальные)
-        drinks = {drink.id: drink.to_dict_fast() for drink in result.unique().scalars()}
-        # drinks = {drink.id: drink.to_dict_fast() for drink in result.scalars()}
-        logger.debug(f"📦 Загружено {len(drinks)} Drink записей")
-        return drinks
-
-    @classmethod
-    async def _process_chunk(
-            cls, chunk: list, drinks: dict, skip_keys: set
-    ) -> tuple[list, dict]:
-        """
-        Обрабатывает чанк пар
-        """
-        updates = []
-
-        for item_id, drink_id in chunk:
-            drink_dict = drinks.get(drink_id)
-
-            if not drink_dict:
-                logger.debug(f"⚠️ Drink {drink_id} не найден для Item {item_id}")
-                continue
-
-            # Извлекаем текст
-            try:
-                # content = extract_text_ultra_fast(drink_dict, skip_keys)
-                content: str = tokenized_string(extract_text_optimized(drink_dict, skip_keys))
-            except Exception as e:
-                logger.error(f"Ошибка извлечения текста для Drink {drink_id}: {e}")
-                content = ""
-            # Готовим обновление
-            updates.append(
-                {'id': item_id, 'search_content': content}
-            )
-        return updates
-
-    @classmethod
-    async def _bulk_update_items(cls, session: AsyncSession, updates: list):
-        """Массовое обновление Item полей"""
-        if not updates:
-            return
-
-        ItemModel = cls._get_model('Item')
-
-        # Получаем все Item одним запросом
-        item_ids = [u['id'] for u in updates]
-        stmt = select(ItemModel).where(ItemModel.id.in_(item_ids))
-        result = await session.execute(stmt)
-        items = {item.id: item for item in result.scalars()}
-
-        # Обновляем поля
-        updated = 0
-        for upd in updates:
-            item = items.get(upd['id'])
-            if item:
-                item.search_content = upd['search_content']
-                updated += 1
-
-        await session.flush()
-        logger.debug(f"✏️ Обновлено Item: {updated}/{len(updates)}")
-
     def extract_text_optimized(data: Any, skip_keys: set = None) -> str:
         """
         Извлекает текст из глубоко вложенных словарей
@@ -293,107 +123,85 @@ class Background:
 
     # another background task
     @classmethod
-    @background_unique
-    async def run_mongo_to_seaweed(
-            cls, repository, model, image_service: ThumbnailImageService,
-            click_repo: ClickHouseRepository, fs,
-            session_factory):
+    async def run_mongo_to_seaweed(cls, background_tasks=None) -> dict:
         """
-            запуск переноса изображений из mongodb в seaweed)
+            запуск переноса изображений из mongodb в seaweed (задача mongo_to_seaweed, одна на приложение)
         """
-        task_name = 'import_mongo_to_seaweed'
-        logger.info(f"🚀 Начало фоновой синхронизации: {task_name}")
-        contents: list = []
-        ids: list = []
-        tags: list = []
-        hashes: list = []
-        updates: list = []  # List[Dict[id:int, seaweed_fids: []]
-        click_meta: list = []  # list of tuple meta
-        config_fast = ImageProcessingConfig(**settings.imageprocessing_config)
-        processor_fast = ImageProcessor(config_fast)
-
-        async def image_processing():
-            nonlocal contents
-            nonlocal ids
-            nonlocal tags
-            nonlocal hashes
-            nonlocal updates
-            nonlocal click_meta
-            result = await processor_fast.process_batch(contents, remove_bg=True)
-            for id, content, tag, shash, (full_data, thumb_data, _) in zip(
-                    ids, contents, tags, hashes, result):
-                if len(content) <= 150000:
-                    full_data = content
-                # 1. load to seawweed
-                fid = await fs.upload(full_data)
-                fid_thumb = await fs.upload(thumb_data)
-                mime_type, _, _ = content_type_magic(full_data)
-                meta_data = make_meta(
-                    fid, fid_thumb, full_data, thumb_data, tag, shash, 'items', mime_type
-                )
-                click_meta.append(meta_data)
-                logger.warning(f'{id}, {meta_data.get('mime_type')}, {meta_data.get('size_bytes')},'
-                               f' {meta_data.get('thumb_size_bytes')}')
-                updates.append({'id': id, 'seaweed_fids': (fid, fid_thumb)})
-
-            ids, tags, result, contents, hashes = [], [], [], [], []
+        if background_tasks is not None:
+            background_tasks.add_task(JobRunner.submit, 'mongo_to_seaweed', {}, 'mongo_to_seaweed')
+            return {"status": "queued", "task": 'mongo_to_seaweed'}
+        return await JobRunner.submit('mongo_to_seaweed', {}, 'mongo_to_seaweed')
 
-        async def get_item_drink():
-            async with session_factory() as session:
-                response = await repository.get_item_drink(session)
-                if not response:
-                    logger.warning(f"⚠️ Нет данных для синхронизации: {task_name}")
-                else:
-                    logger.info(f"📊 Найдено {len(response)} записей для обработки")
-                return response
-
-        async def update_item_drink():
-            async with session_factory() as session:
-                for row in updates:
-                    stmt = (update(model).where(model.id == row.get('id')).values(seaweed_fids=row.get('seaweed_fids')))
-                    await session.execute(stmt)
-                await session.commit()
-                logger.info(f"📊 Обновлено {len(response)} записей в postgesql")
-                return response
-
-        response = await get_item_drink()
-        if not response:
-            return
-        try:
-            source_data = [(a.id, a.image_id, a.concat) for a in response]
-
-            for id, image_id, tag in source_data:
+    @classmethod
+    async def transfer_images(cls, batch: List[tuple], image_service: ThumbnailImageService,
+                              click_repo: ClickHouseRepository, fs, processor: ImageProcessor
+                              ) -> Tuple[List[dict], List[dict], List[str]]:
+        """
+            пачка (item_id, image_id, tag) -> (обновления items.seaweed_fids, meta для clickhouse, ошибки)
+            ошибка чтения изображения пропускает только его
+        """
+        updates, click_meta, errors, pending = [], [], [], []
+        for id, image_id, tag in batch:
+            try:
                 content: bytes = await image_service.get_full_image(image_id)
                 source_hash = FastImageHasher.xxhash64(content)
                 fid_thumb: tuple = await cls.hash_exists(source_hash, click_repo)
-                if fid_thumb:
-                    # message is available (defined by orinal image hash) - добавляем в items
-                    updates.append({'id': id, 'seaweed_fids': fid_thumb})
-                    logger.warning(f'hash found! {id}: {fid_thumb}')
-                    continue
-                hashes.append(source_hash)
-                contents.append(content)
-                ids.append(id)
-                tags.append(tag)
-                if len(contents) >= 20:
-                    await image_processing()
-            if ids:
-                logger.warning(f'tail of cycle is {len(ids)}')
-                await image_processing()
-            from app.core.utils.common_utils import jprint
-            jprint(updates)
-            logger.warning('-----------------------------')
-            # add to clickhouse
+            except Exception as e:
+                errors.append(f'item {id}: {e}')
+                continue
+            if fid_thumb:
+                # message is available (defined by orinal image hash) - добавляем в items
+                updates.append({'id': id, 'seaweed_fids': fid_thumb})
+                logger.info(f'hash found! {id}: {fid_thumb}')
+                continue
+            pending.append((id, content, tag, source_hash))
+        if not pending:
+            return updates, click_meta, errors
+        result = await processor.process_batch([content for _, content, _, _ in pending], remove_bg=True)
+        for (id, content, tag, shash), (full_data, thumb_data, _) in zip(pending, result):
+            if len(content) <= 150000:
+                full_data = content
+            # 1. load to seawweed
+            fid = await fs.upload(full_data)
+            fid_thumb = await fs.upload(thumb_data)
+            mime_type, _, _ = content_type_magic(full_data)
+            click_meta.append(make_meta(fid, fid_thumb, full_data, thumb_data, tag, shash, 'items', mime_type))
+            updates.append({'id': id, 'seaweed_fids': (fid, fid_thumb)})
+        return updates, click_meta, errors
+
+    @classmethod
+    async def mongo_to_seaweed_job(cls, ctx: JobContext):
+        """
+            обработчик mongo_to_seaweed: пачки IMAGE_BATCH в порядке item_id, после каждой - запись в clickhouse
+            и postgresql, checkpoint - последний item_id пачки
+        """
+        from app.core.config.database.db_mongo import get_mongodb
+        from app.core.config.database.seaweed_async import get_swfs
+        from app.mongodb.repository import ThumbnailImageRepository
+        image_service = ThumbnailImageService(ThumbnailImageRepository(await get_mongodb()))
+        click_repo = ctx.state.ch_repo_factory.for_table('images_metadata')
+        fs = get_swfs()
+        repository, model = get_repo('Item'), get_model_by_name('Item')
+        after = (ctx.checkpoint or {}).get('item_id', 0)
+        async with DatabaseManager.session_maker() as session:
+            response = await repository.get_item_drink(session)
+        source = [(row['id'], row['image_id'], row['concat']) for row in response if row['id'] > after]
+        ctx.progress(total=ctx.processed + len(source))
+        logger.info(f"📊 Найдено {len(source)} записей для обработки")
+        processor = ImageProcessor(ImageProcessingConfig(**settings.imageprocessing_config))
+        for start in range(0, len(source), IMAGE_BATCH):
+            batch = source[start: start + IMAGE_BATCH]
+            updates, click_meta, errors = await cls.transfer_images(batch, image_service, click_repo, fs, processor)
             if click_meta:
                 await click_repo.bulk_insert(click_meta)
-            # update postgresql
-            await update_item_drink()
-            # await session.commit()
-            logger.success(f"✅ Синхронизация завершена: {task_name}, обновлено записей")
-        except Exception as e:
-            logger.error(f"❌ Ошибка синхронизации {task_name}: {e}")
-            # await session.rollback()
-            raise
+            if updates:
+                async with DatabaseManager.session_maker() as session:
+                    await bulk_update(updates, model, session)
+                    await session.commit()
+            for error in errors:
+                logger.error(f'mongo_to_seaweed: {error}')
+            ctx.progress(len(batch), {'item_id': batch[-1][0]}, errors=len(errors),
+                         error=errors[-1] if errors else None)
 
     @classmethod
     async def hash_exists(cls, source_hash: int, click_repo: ClickHouseRepository) -> tuple:
@@ -407,3 +215,7 @@ class Background:
             fid, fid_thumb, tags = res.values()
             return fid, fid_thumb
         return None
+
+
+JobRunner.register('search_reindex', 'db-maintenance')(Background.search_reindex_job)
+JobRunner.register('mongo_to_seaweed', 'cpu-images')(Background.mongo_to_seaweed_job)
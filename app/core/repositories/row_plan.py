@@ -0,0 +1,182 @@
+# app/core/repositories/row_plan.py
+"""
+    чтение без гидратации ORM:
+    план колонок модели + связи many-to-one (LEFT JOIN), коллекции one-to-many - отдельным запросом по fk,
+    результат читается через .mappings() и собирается во вложенные словари
+    формат словарей совпадает с Base.to_dict_fast для выбранных колонок и связей
+    relations = {'drink': {'site': {'subregion': {}}, 'food_associations': {'food': {}}}}
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, RelationshipDirection
+
+from app.core.types import ModelType
+
+_EMPTY = (None, '', [], {}, set())
+
+
+def _freeze(relations: Optional[dict]) -> tuple:
+    return tuple(sorted((key, _freeze(val)) for key, val in (relations or {}).items()))
+
+
+def _convert(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class _Node:
+    """ узел плана: модель (alias) + ее колонки + связи в порядке mapper.relationships """
+    __slots__ = ('model', 'alias', 'columns', 'pk', 'rels')
+
+    def __init__(self, model: ModelType, alias):
+        self.model = model
+        self.alias = alias
+        self.columns: List[Tuple[str, str]] = []   # (ключ в словаре, label в запросе)
+        self.pk: Optional[str] = None              # label pk - признак того что LEFT JOIN что-то нашел
+        self.rels: List[tuple] = []                # ('one', key, _Node) | ('many', key, RowPlan, label, remote)
+
+
+class RowPlan:
+    """
+        план кешируется на (model, relations, exclude, starts) - см. RowPlan.get
+        exclude - имена колонок, исключаемые на всех уровнях (как exclude в to_dict_fast)
+        starts - только колонки с этими префиксами (как get_short_query)
+    """
+    _plans: Dict[tuple, 'RowPlan'] = {}
+
+    def __init__(self, model: ModelType, relations: Optional[dict] = None,
+                 exclude: tuple = (), starts: Optional[tuple] = None):
+        self.model = model
+        self.exclude = frozenset(exclude)
+        self.starts = tuple(starts) if starts else None
+        self._labels: List[Any] = []
+        self._joins: list = []
+        self.root = self._build(model, model, relations or {})
+
+    @classmethod
+    def get(cls, model: ModelType, relations: Optional[dict] = None,
+            exclude: tuple = (), starts: Optional[tuple] = None) -> 'RowPlan':
+        key = (model, _freeze(relations), tuple(sorted(exclude)), tuple(starts) if starts else None)
+        if (plan := cls._plans.get(key)) is None:
+            plan = cls._plans[key] = cls(model, relations, exclude, starts)
+        return plan
+
+    @staticmethod
+    def parents(model: ModelType, _seen: tuple = ()) -> dict:
+        """ все many-to-one связи модели рекурсивно (цепочка родителей справочника) """
+        seen = _seen + (model,)
+        return {rel.key: RowPlan.parents(rel.mapper.class_, seen)
+                for rel in inspect(model).relationships
+                if rel.direction is RelationshipDirection.MANYTOONE and rel.mapper.class_ not in seen}
+
+    def _label(self, expr) -> str:
+        label = f'c{len(self._labels)}'
+        self._labels.append(expr.label(label))
+        return label
+
+    def _build(self, model: ModelType, alias, relations: dict) -> _Node:
+        node = _Node(model, alias)
+        mapper = inspect(model)
+        for attr in mapper.column_attrs:
+            key = attr.key
+            if key in self.exclude or attr.deferred or (self.starts and not key.startswith(self.starts)):
+                continue
+            label = self._label(getattr(alias, key))
+            node.columns.append((key, label))
+            if attr.columns[0].primary_key:
+                node.pk = label
+        if node.pk is None:
+            node.pk = self._label(getattr(alias, mapper.primary_key[0].key))
+        for rel in mapper.relationships:
+            if rel.key not in relations or rel.key in self.exclude:
+                continue
+            target = rel.mapper.class_
+            if not rel.uselist:
+                child_alias = aliased(target)
+                self._joins.append(getattr(alias, rel.key).of_type(child_alias))
+                node.rels.append(('one', rel.key, self._build(target, child_alias, relations[rel.key])))
+            elif rel.secondary is None and len(rel.local_remote_pairs) == 1:
+                local, remote = rel.local_remote_pairs[0]
+                child = RowPlan.get(target, relations[rel.key], tuple(self.exclude), self.starts)
+                node.rels.append(('many', rel.key, child, self._label(getattr(alias, local.key)), remote))
+            else:
+                raise ValueError(f'RowPlan: связь {model.__name__}.{rel.key} не поддерживается')
+        return node
+
+    def select(self) -> Select:
+        """ SELECT всех колонок плана; where / order_by / limit добавляет вызывающий """
+        stmt = select(*self._labels).select_from(self.model)
+        for join in self._joins:
+            stmt = stmt.outerjoin(join)
+        return stmt
+
+    def _collections(self, node: _Node = None):
+        node = node or self.root
+        for rel in node.rels:
+            if rel[0] == 'one':
+                yield from self._collections(rel[2])
+            else:
+                yield rel
+
+    async def _load_collections(self, rows, session: AsyncSession, skip_empty: bool) -> dict:
+        """ {label fk родителя: {значение fk: [словари]}} - по одному запросу на коллекцию """
+        loaded: dict = {}
+        for _, key, child, label, remote in self._collections():
+            ids = {row[label] for row in rows} - {None}
+            groups = loaded[label] = {}
+            if not ids:
+                continue
+            fk = getattr(child.model, remote.key)
+            stmt = child.select().add_columns(fk.label('_fk')).where(fk.in_(ids)).order_by(
+                getattr(child.model, inspect(child.model).primary_key[0].key))
+            child_rows = (await session.execute(stmt)).mappings().all()
+            nested = await child._load_collections(child_rows, session, skip_empty)
+            for row in child_rows:
+                if (item := child._to_dict(child.root, row, nested, skip_empty)) or not skip_empty:
+                    groups.setdefault(row['_fk'], []).append(item)
+        return loaded
+
+    def _to_dict(self, node: _Node, row, loaded: dict, skip_empty: bool) -> Optional[dict]:
+        result = {}
+        for key, label in node.columns:
+            value = row[label]
+            if value in _EMPTY:
+                if not skip_empty:
+                    result[key] = value
+                continue
+            result[key] = _convert(value)
+        for rel in node.rels:
+            key = rel[1]
+            if rel[0] == 'one':
+                child: _Node = rel[2]
+                if row[child.pk] is None:
+                    if not skip_empty:
+                        result[key] = None
+                    continue
+                value = self._to_dict(child, row, loaded, skip_empty)
+            else:
+                value = loaded.get(rel[3], {}).get(row[rel[3]], [])
+            if not skip_empty or value:
+                result[key] = value
+        return result
+
+    async def fetch(self, stmt: Select, session: AsyncSession, skip_empty: bool = True) -> List[dict]:
+        """ stmt - self.select() с условиями. возвращает список словарей в порядке строк """
+        rows = (await session.execute(stmt)).mappings().all()
+        loaded = await self._load_collections(rows, session, skip_empty)
+        return [self._to_dict(self.root, row, loaded, skip_empty) for row in rows]
+
+    async def stream(self, stmt: Select, session: AsyncSession, batch_size: int,
+                     skip_empty: bool = True) -> AsyncIterator[List[dict]]:
+        """ server-side чтение (session.stream) пачками; коллекции догружаются на каждую пачку """
+        result = await session.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.mappings().partitions():
+            loaded = await self._load_collections(rows, session, skip_empty)
+            yield [self._to_dict(self.root, row, loaded, skip_empty) for row in rows]
@@ -0,0 +1,90 @@
+# app/core/repositories/search_cache.py
+"""
+    кеш результатов умного поиска (ItemRepository.find_items_smart_page)
+    ключ - очищенный запрос (CleanedSearchQuery: scenario, fts_query, like_term) + курсор + размер страницы,
+    значение - [(id, score), ...] страницы и якоря; сами записи читаются по id каждый раз
+    запись действительна пока не изменилось поколение и не истек TTL
+    поколение = TableVersion (items.search_content, items): search_content, записанный сырым UPDATE,
+    отмечается mark(session) до commit, увеличивается после commit (как TableVersion.mark) -
+    поиск между записью и commit не закеширует старые строки под новым поколением
+    LRU с бюджетом по байтам (SEARCH_CACHE_BYTES), размер записи - длина ее orjson представления
+    поколения в памяти процесса: записи arq-воркеров (переиндексация, импорт), change feed и других
+    uvicorn workers этот кеш не сбрасывают - устаревшая выдача живет до SEARCH_CACHE_TTL
+"""
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.project_config import settings
+from app.core.repositories.table_version import TableVersion
+
+SEARCH_TABLE = 'items'
+SEARCH_CONTENT = 'items.search_content'     # в TableVersion - изменения search_content
+
+
+class SearchEntry(NamedTuple):
+    generation: Tuple[int, int]
+    created: float
+    size: int
+    pairs: List[tuple]
+    anchors: List[dict]
+
+
+class SearchResultCache:
+    _entries: 'OrderedDict[tuple, SearchEntry]' = OrderedDict()
+    _bytes: int = 0
+
+    @staticmethod
+    def mark(session: AsyncSession):
+        """ search_content изменен в транзакции session - новое поколение после ее commit """
+        TableVersion.mark(session, SEARCH_CONTENT)
+
+    @staticmethod
+    def bump():
+        """ немедленно: изменение search_content уже зафиксировано """
+        TableVersion.bump(SEARCH_CONTENT)
+
+    @staticmethod
+    def generation() -> Tuple[int, int]:
+        return TableVersion.snapshot((SEARCH_CONTENT, SEARCH_TABLE))
+
+    @staticmethod
+    def key(query_data, last_score, last_id: Optional[int], limit: int, jump_pages: int) -> tuple:
+        query = (query_data.scenario, query_data.fts_query, query_data.like_term) if query_data else None
+        return query, None if last_score is None else str(last_score), last_id, limit, jump_pages
+
+    @classmethod
+    def clear(cls):
+        cls._entries.clear()
+        cls._bytes = 0
+
+    @classmethod
+    def _pop(cls, key: tuple):
+        if entry := cls._entries.pop(key, None):
+            cls._bytes -= entry.size
+
+    @classmethod
+    def get(cls, key: tuple) -> Optional[Tuple[List[tuple], List[dict]]]:
+        if (entry := cls._entries.get(key)) is None:
+            return None
+        if entry.generation != cls.generation() or time.monotonic() - entry.created >= settings.SEARCH_CACHE_TTL:
+            cls._pop(key)
+            return None
+        cls._entries.move_to_end(key)
+        return entry.pairs, entry.anchors
+
+    @classmethod
+    def put(cls, key: tuple, pairs: List[tuple], anchors: List[dict], generation: Tuple[int, int]):
+        """ generation - снятое ДО запроса в БД: результат, пересекшийся с записью, сразу устареет """
+        size = len(orjson.dumps([key, pairs, anchors], default=str))
+        if size > settings.SEARCH_CACHE_BYTES:
+            return
+        cls._pop(key)
+        cls._entries[key] = SearchEntry(generation, time.monotonic(), size, pairs, anchors)
+        cls._bytes += size
+        while cls._bytes > settings.SEARCH_CACHE_BYTES:
+            _, entry = cls._entries.popitem(last=False)
+            cls._bytes -= entry.size
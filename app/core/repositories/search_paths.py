@@ -0,0 +1,77 @@
+# app/core/repositories/search_paths.py
+"""
+    путь от справочника к items для пересчета search_content
+    цепочка relationship вычисляется один раз на модель по реестру _SEARCH_DEPENDENCIES
+    ("subregion.site.drink.item"): часть пути - ключ relationship или имя целевой модели;
+    если путь в реестре не разрешается - кратчайшая цепочка relationship до Item
+    затронутые (item_id, drink_id) - один select с JOIN по цепочке и фильтром id = ANY
+"""
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import inspect, select
+
+from app.core.models.base_model import get_model_by_name
+from app.core.types import ModelType
+from app.service_registry import get_search_dependencies
+
+_CHAINS: Dict[ModelType, Tuple] = {}
+
+
+def _relationship(model: ModelType, part: str):
+    part = part.lower()
+    for rel in inspect(model).relationships:
+        if rel.key.lower() == part or rel.mapper.class_.__name__.lower() == part:
+            return rel
+    return None
+
+
+def _registry_chain(model: ModelType, path: str, target: ModelType) -> Optional[Tuple]:
+    chain, current = [], model
+    for part in path.split('.'):
+        if (rel := _relationship(current, part)) is None:
+            return None
+        chain.append(getattr(current, rel.key))
+        current = rel.mapper.class_
+    return tuple(chain) if current is target else None
+
+
+def _shortest_chain(model: ModelType, target: ModelType) -> Optional[Tuple]:
+    """ поиск в ширину по relationship """
+    queue, seen = deque([(model, ())]), {model}
+    while queue:
+        current, chain = queue.popleft()
+        if current is target:
+            return chain
+        for rel in inspect(current).relationships:
+            if (nxt := rel.mapper.class_) not in seen:
+                seen.add(nxt)
+                queue.append((nxt, (*chain, getattr(current, rel.key))))
+    return None
+
+
+def item_chain(model: ModelType) -> Tuple:
+    """ relationship-атрибуты от model до Item (для Item - пусто) """
+    if (chain := _CHAINS.get(model)) is not None:
+        return chain
+    item = get_model_by_name('Item')
+    path = get_search_dependencies(model)
+    chain = _registry_chain(model, path, item) if path else None
+    if chain is None:
+        if (chain := _shortest_chain(model, item)) is None:
+            raise ValueError(f'нет пути от {model.__name__} к Item')
+        if path:
+            logger.warning(f'search_paths: путь "{path}" для {model.__name__} не разрешен, '
+                           f'используется {".".join(attr.key for attr in chain)}')
+    _CHAINS[model] = chain
+    return chain
+
+
+def item_drink_stmt(model: ModelType, ids: Iterable[int]):
+    """ select (item_id, drink_id) всех items, зависящих от записей model с id из ids """
+    item = get_model_by_name('Item')
+    stmt = select(item.id, item.drink_id).select_from(model)
+    for attr in item_chain(model):
+        stmt = stmt.join(attr)
+    return stmt.where(model.id.in_(list(ids))).distinct()
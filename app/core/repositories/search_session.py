@@ -0,0 +1,104 @@
+# app/core/repositories/search_session.py
+"""
+    серверные сессии поиска: ранжированный список (id, score) строится один раз на первой странице,
+    следующие страницы и прыжки по якорям - срез по смещению из непрозрачного курсора
+    курсор = base64url(orjson [id сессии, смещение]); сессия хранится в памяти процесса
+    (TTL SEARCH_SESSION_TTL, LRU на SEARCH_SESSION_SIZE сессий) и дает снимок порядка на момент создания
+    ранжируется столько строк, сколько нужно странице и ее якорям (+1 - граница для продолжения),
+    дальше сессия растет лениво (extend - продолжение после последней строки), не больше SEARCH_SESSION_ROWS + 1
+    сессия из другого процесса / истекшая - строится заново по тому же запросу, смещение сохраняется
+"""
+import base64
+import secrets
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from app.core.config.project_config import settings
+from app.core.exceptions import AppBaseException
+
+
+class SearchSession(NamedTuple):
+    query: tuple
+    ids: np.ndarray         # int64, порядок выдачи
+    scores: np.ndarray      # float64
+    truncated: bool         # есть совпадения за пределами ids
+    created: float
+
+    def pairs(self, offset: int, limit: int) -> List[tuple]:
+        return list(zip(self.ids[offset:offset + limit].tolist(), self.scores[offset:offset + limit].tolist()))
+
+    def covers(self, offset: int, limit: int) -> bool:
+        """ страница целиком внутри сессии (последняя строка обрезанной сессии - только граница) """
+        return not self.truncated or offset + limit <= len(self.ids) - 1
+
+
+class SearchSessionStore:
+    _sessions: 'OrderedDict[str, SearchSession]' = OrderedDict()
+
+    @staticmethod
+    def query_key(query_data) -> tuple:
+        return (query_data.scenario, query_data.fts_query, query_data.like_term) if query_data else ()
+
+    @staticmethod
+    def encode_cursor(sid: str, offset: int) -> str:
+        return base64.urlsafe_b64encode(orjson.dumps([sid, offset])).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(token: Optional[str]) -> Tuple[Optional[str], int]:
+        if not token:
+            return None, 0
+        try:
+            sid, offset = orjson.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            if not isinstance(sid, str) or not isinstance(offset, int) or offset < 0:
+                raise ValueError
+            return sid, offset
+        except Exception:
+            raise AppBaseException(message='invalid cursor', status_code=400)
+
+    @classmethod
+    def clear(cls):
+        cls._sessions.clear()
+
+    @staticmethod
+    def _arrays(pairs: List[tuple]) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.fromiter((p[0] for p in pairs), dtype=np.int64, count=len(pairs)),
+                np.fromiter((p[1] for p in pairs), dtype=np.float64, count=len(pairs)))
+
+    @classmethod
+    def create(cls, query: tuple, pairs: List[tuple], max_rows: int) -> Tuple[str, SearchSession]:
+        """ pairs - до max_rows + 1 строк в порядке выдачи """
+        pairs = pairs[:max_rows + 1]
+        ids, scores = cls._arrays(pairs)
+        search = SearchSession(query, ids, scores, len(pairs) > max_rows, time.monotonic())
+        sid = secrets.token_urlsafe(9)
+        cls._sessions[sid] = search
+        while len(cls._sessions) > settings.SEARCH_SESSION_SIZE:
+            cls._sessions.popitem(last=False)
+        return sid, search
+
+    @classmethod
+    def extend(cls, sid: str, search: SearchSession, pairs: List[tuple], requested: int) -> SearchSession:
+        """ продолжение обрезанной сессии: pairs - строки после последней (запрошено requested) """
+        ids, scores = cls._arrays(pairs)
+        search = search._replace(ids=np.concatenate((search.ids, ids)), scores=np.concatenate((search.scores, scores)),
+                                 truncated=len(pairs) >= requested)
+        if sid in cls._sessions:
+            cls._sessions[sid] = search
+        return search
+
+    @classmethod
+    def get(cls, sid: Optional[str], query: tuple) -> Optional[SearchSession]:
+        """ сессия того же запроса, не старше TTL """
+        if sid is None or (search := cls._sessions.get(sid)) is None:
+            return None
+        if time.monotonic() - search.created >= settings.SEARCH_SESSION_TTL:
+            cls._sessions.pop(sid, None)
+            return None
+        if search.query != query:
+            return None
+        cls._sessions.move_to_end(sid)
+        return search
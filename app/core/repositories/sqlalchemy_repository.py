@@ -5,26 +5,34 @@
     get_by_id   result.scalar_one_or_none()
 """
 from abc import ABCMeta
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Type, Union
 
 from loguru import logger
-from sqlalchemy import (and_, desc, func, insert, inspect, or_, Row, RowMapping, select, Select, update)
+from sqlalchemy import (and_, cast, column, desc, func, insert, inspect, Integer, or_, PrimaryKeyConstraint, Row,
+                        RowMapping, select, Select, UniqueConstraint, values)
 from sqlalchemy.dialects import postgresql  # NOQA: F401
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased, load_only
+from sqlalchemy.orm import load_only
 
 from app.core.config.project_config import settings
 from app.core.exceptions import AppBaseException
 from app.core.models.base_model import get_model_by_name
+from app.core.models.mixins import DynamicCompositeUniqueMixin, UniqueNormalizedNameMixin
+from app.core.repositories.bulk_update import bulk_update
+from app.core.repositories.count_provider import CountMode, CountProvider
 from app.core.repositories.repo_background_tasks import Background
+from app.core.repositories.row_plan import RowPlan
 from app.core.repositories.search_unaccent_repository import SearchRepositoryMixin
+from app.core.repositories.table_version import TableVersion
 from app.core.types import ModelType
 # from sqlalchemy.sql.elements import ColumnElement
 from app.core.utils.alchemy_utils import (get_field_list, get_sql_search)
+from app.core.utils.cursor_utils import Cursor
 from app.core.utils.pydantic_utils import get_repo
-from app.core.utils.reindexation import extract_text_ultra_fast
 from app.service_registry import get_child, register_repo
 
 # длина списка поисковой выдачи
@@ -124,14 +132,17 @@ class Repository(Background, metaclass=RepositoryMeta):
         return select(model).options(load_only(*fields))
 
     @classmethod
-    async def pagination(cls, stmt: Select, skip: int, limit: int, session: AsyncSession):
+    async def pagination(cls, stmt: Select, skip: int, limit: int, session: AsyncSession,
+                         count_mode: Optional[CountMode] = None):
         """
             получает запрос, сдвиг и размер страницы, сессию
             возвращает список instances и кол-во записей
+            count_mode: exact | cached | estimated (по умолчанию settings.COUNT_MODE)
+            total - Total (int) с атрибутом mode, см. app.core.repositories.count_provider
         """
         # count_stmt = select(func.count()).select_from(stmt)
         # total = await session.scalar(count_stmt) or 0
-        total = await cls.get_count(stmt, session)
+        total = await CountProvider.count(stmt, session, count_mode)
         if total == 0:
             return None, total
         stmt = stmt.offset(skip).limit(limit)
@@ -158,6 +169,7 @@ class Repository(Background, metaclass=RepositoryMeta):
         """ создание записи """
         session.add(obj)
         await session.flush()
+        TableVersion.mark(session, model)
         await session.refresh(obj)
         id = obj.id
         await cls.get_related_model_instances(id, model, session)
@@ -177,30 +189,173 @@ class Repository(Background, metaclass=RepositoryMeta):
             return
         stmt = insert(model).returning(model)
         result = await session.scalars(stmt, data)
+        TableVersion.mark(session, model)
         return result.all()
 
+    @staticmethod
+    def _normalized(col):
+        """ выражение функционального индекса: public.immutable_unaccent(lower(col)) """
+        return func.public.immutable_unaccent(func.lower(col))
+
+    @classmethod
+    def get_conflict_target(cls, model: ModelType, default: List[str]) -> Tuple[Optional[list], bool]:
+        """
+            выражения уникального индекса, совпадающего с полями default - для ON CONFLICT.
+            UniqueNormalizedNameMixin: unaccent(lower(name))
+            DynamicCompositeUniqueMixin: __composite_fk_field__ + unaccent(lower(name))
+            иначе - уникальный индекс / constraint по тем же колонкам.
+            return: (выражения или None - подходящего индекса нет, name нормализован)
+        """
+        fields = set(default)
+        fk_field = getattr(model, '__composite_fk_field__', None)
+        if issubclass(model, DynamicCompositeUniqueMixin) and fk_field and fields == {'name', fk_field}:
+            return [getattr(model, fk_field), cls._normalized(model.name)], True
+        if issubclass(model, UniqueNormalizedNameMixin) and fields == {'name'}:
+            return [cls._normalized(model.name)], True
+        table = model.__table__
+        candidates = [c for c in table.constraints if isinstance(c, (UniqueConstraint, PrimaryKeyConstraint))]
+        candidates += [i for i in table.indexes if i.unique and not i.expressions[len(i.columns):]]
+        for candidate in candidates:
+            names = {c.name for c in candidate.columns}
+            if names and names == fields:
+                return [table.c[name] for name in default], False
+        for col in table.columns:
+            if col.unique and {col.name} == fields:
+                return [col], False
+        return None, False
+
+    @staticmethod
+    def _chunks(rows: list, width: int) -> List[list]:
+        """ пачки по BULK_UPDATE_BATCH строк, не больше BULK_MAX_PARAMS bind-параметров (width на строку) """
+        size = max(1, min(settings.BULK_UPDATE_BATCH, settings.BULK_MAX_PARAMS // max(1, width)))
+        return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+    @classmethod
+    def _batch_match_stmt(cls, rows: List[dict], default: List[str], normalized: bool, model: ModelType,
+                          start: int = 0) -> Select:
+        """
+            сопоставление входных строк (порядковый номер от start) с записями таблицы по полям default
+            name сравнивается нормализованным, если уникальный индекс нормализованный
+        """
+        table = model.__table__
+        v = values(column('ord', Integer), *[column(f, table.c[f].type) for f in default],
+                   name='batch_input').data([(n, *[row.get(f) for f in default])
+                                             for n, row in enumerate(rows, start)])
+        conditions = [cls._normalized(getattr(model, f)) == cls._normalized(v.c[f])
+                      if normalized and f == 'name'
+                      else getattr(model, f).is_not_distinct_from(cast(v.c[f], table.c[f].type))
+                      for f in default]
+        return cls.get_query(model).join(v, and_(*conditions)).add_columns(v.c.ord)
+
+    @classmethod
+    async def _batch_match(cls, rows: List[dict], default: List[str], normalized: bool, model: ModelType,
+                           session: AsyncSession) -> Dict[int, ModelType]:
+        """ {порядковый номер входной строки: запись таблицы}, запрос на пачку """
+        matched: Dict[int, ModelType] = {}
+        start = 0
+        for chunk in cls._chunks(rows, len(default) + 1):
+            result = await session.execute(cls._batch_match_stmt(chunk, default, normalized, model, start))
+            matched.update({ord: instance for instance, ord in result.all()})
+            start += len(chunk)
+        return matched
+
+    @classmethod
+    async def _bulk_insert(cls, rows: List[dict], model: ModelType, session: AsyncSession,
+                           conflict_target: Optional[list] = None) -> set:
+        """
+            INSERT ... [ON CONFLICT DO NOTHING] RETURNING id
+            строки группируются по набору ключей - INSERT на пачку группы
+            возвращает ids добавленных записей
+        """
+        groups: Dict[tuple, list] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        created: set = set()
+        for keys, group in groups.items():
+            for chunk in cls._chunks(group, len(keys)):
+                stmt = pg_insert(model).values(chunk)
+                if conflict_target is not None:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=conflict_target)
+                result = await session.execute(stmt.returning(model.id))
+                created.update(result.scalars().all())
+        return created
+
+    @classmethod
+    async def _bulk_related_stubs(cls, ids: set, model: ModelType, session: AsyncSession):
+        """
+            массовый аналог get_related_model_instances(add=True):
+            заглушки {<model>_id: id, name: None} в зависимой модели, рекурсивно вниз
+        """
+        related_model = cls.get_related_model(model)
+        if not related_model or not ids:
+            return
+        foreign_key = f'{model.__name__.lower()}_id'
+        created: set = set()
+        for chunk in cls._chunks(sorted(ids), 2):
+            stmt = pg_insert(related_model).values([{foreign_key: id, 'name': None} for id in chunk])
+            result = await session.execute(stmt.on_conflict_do_nothing().returning(related_model.id))
+            created.update(result.scalars().all())
+        TableVersion.mark(session, related_model)
+        await cls._bulk_related_stubs(created, related_model, session)
+
+    @classmethod
+    async def batch_get_or_create(cls, rows: List[dict], default: List[str], model: ModelType,
+                                  session: AsyncSession) -> List[Tuple[ModelType, bool]]:
+        """
+            set-based get_or_create, запросов - по пачке (BULK_UPDATE_BATCH / BULK_MAX_PARAMS):
+            1. INSERT ... ON CONFLICT (уникальный индекс под default) DO NOTHING RETURNING id
+               (без подходящего индекса: SELECT существующих, INSERT недостающих)
+            2. SELECT записей, сопоставленных с входными строками по default
+            возвращает [(instance, created), ...] в порядке входных строк.
+            при повторах во входных данных created=True только у первого вхождения
+        """
+        if not rows:
+            return []
+        columns = set(model.__table__.c.keys())
+        rows = [{k: v for k, v in row.items() if k in columns} for row in rows]
+        conflict_target, normalized = cls.get_conflict_target(model, default)
+        matched: Dict[int, ModelType] = {}
+        if conflict_target is not None:
+            created_ids = await cls._bulk_insert(rows, model, session, conflict_target)
+        else:
+            matched = await cls._batch_match(rows, default, False, model, session)
+            missing: Dict[tuple, dict] = {}
+            for n, row in enumerate(rows):
+                if n not in matched:
+                    missing.setdefault(tuple(row.get(f) for f in default), row)
+            created_ids = await cls._bulk_insert(list(missing.values()), model, session)
+        if created_ids or not matched:
+            matched = await cls._batch_match(rows, default, normalized, model, session)
+        if created_ids:
+            TableVersion.mark(session, model)
+            await cls._bulk_related_stubs(created_ids, model, session)
+        output: list = []
+        seen: set = set()
+        for n in range(len(rows)):
+            instance = matched.get(n)
+            if instance is None:
+                raise AppBaseException(message=f'batch_get_or_create: row {n} is not resolved', status_code=409)
+            output.append((instance, instance.id in created_ids and instance.id not in seen))
+            seen.add(instance.id)
+        return output
+
     @classmethod
     async def bulk_update(cls, data: List[Dict], model: ModelType,
-                          session: AsyncSession) -> bool:
+                          session: AsyncSession, batch_size: Optional[int] = None) -> int:
         """ быстрое массовое обновление записей из словарей
-            data должны содержать id
+            data должны содержать id, в строках могут меняться разные наборы колонок
             data = [
                     {'id': 104, 'seaweed_fids': ('20,cf5fefa821', '16,d0e133a318')},
                     {'id': 105, 'seaweed_fids': ('17,d1a8908ae6', '20,d2ad06361d')},
-                    {'id': 106, 'seaweed_fids': ('21,d3f0b578f7', '20,d4cbc210a8')},
+                    {'id': 106, 'search_content': 'red wine ...'},
                     ]
+            UPDATE ... FROM (VALUES ...) на каждую группу колонок, пачками по batch_size
+            (settings.BULK_UPDATE_BATCH). instances в сессии не синхронизируются.
+            возвращает кол-во обновленных записей
         """
-        # 1. получить редактируемые записи одним запросом
-        data_dict: dict = {item.pop('id'): item for item in data}
-        ids = list(data_dict.keys())
-        instances = await cls.get_by_ids(ids, model, session)
-        for instance in instances:
-            datax = data_dict.get(instance.id)
-            for item in datax:
-                for k, v in item.items():
-                    if hasattr(instance, k):
-                        setattr(instance, k, v)
-        await session.flush()
+        affected = await bulk_update(data, model, session, batch_size)
+        TableVersion.mark(session, model)
+        return affected
 
     @classmethod
     async def patch(cls, obj: ModelType,
@@ -216,6 +371,7 @@ class Repository(Background, metaclass=RepositoryMeta):
                 if hasattr(obj, k):
                     setattr(obj, k, v)
             await session.flush()
+            TableVersion.mark(session, type(obj))
             # await session.refresh(data) - не надо - дает ошибки
             return {"success": True, "data": obj}
         except IntegrityError as e:
@@ -233,6 +389,7 @@ class Repository(Background, metaclass=RepositoryMeta):
         id = obj.id
         await cls.get_related_model_instances(id, cls.model, session, add=False)
         await session.delete(obj)
+        TableVersion.mark(session, type(obj))
         # await session.expunge(obj)
         # можно отвязать и вернуть удаленный объект и проделать с ним вские штуки - например записать заново с новым ID
         return True  # , None  # , obj
@@ -306,14 +463,40 @@ class Repository(Background, metaclass=RepositoryMeta):
             return List[instance]
         """
         # stmt = cls.get_query(model).where(model.updated_at > after_date).order_by(model.id.asc())
+        stmt = cls.get_all_query(after_date, model, limit)
+        result = await cls.nonpagination(stmt, session)
+        return result
+
+    @classmethod
+    def get_all_query(cls, after_date: datetime, model: ModelType, limit: int = None) -> Select:
+        """ запрос get_all (для выдачи списком и потоком) """
         stmt = cls.get_query(model)
         if hasattr(model, 'updated_at'):
             stmt = stmt.where(model.updated_at > after_date)
         stmt = stmt.order_by(model.id.asc())
         if limit:
             stmt = stmt.limit(limit)
-        result = await cls.nonpagination(stmt, session)
-        return result
+        return stmt
+
+    @classmethod
+    def get_full_query(cls, model: ModelType, limit: int = None) -> Select:
+        """ запрос get_full (для выдачи списком и потоком) """
+        stmt = cls.get_query(model).order_by(model.id.asc())
+        if limit:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    @classmethod
+    async def stream(cls, stmt: Select, session: AsyncSession,
+                     batch_size: int = None) -> AsyncIterator[Sequence[ModelType]]:
+        """
+            server-side чтение (session.stream + yield_per) пачками по batch_size instances
+            selectinload связей выполняется на каждую пачку
+        """
+        batch_size = batch_size or settings.STREAM_BATCH
+        result = await session.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.scalars().partitions():
+            yield partition
 
     @classmethod
     async def get_by_field(cls, field_name: str, field_value: Any, model: ModelType,
@@ -445,6 +628,27 @@ class Repository(Background, metaclass=RepositoryMeta):
         res: List[ModelType] = result.scalars().all()
         return res
 
+    @classmethod
+    def get_row_plan(cls, model: ModelType) -> RowPlan:
+        """
+            план колонок для чтения справочника без ORM:
+            id/name* модели и всех родителей (many-to-one) - то что нужно flatten_dict_with_localized_fields
+        """
+        return RowPlan.get(model, RowPlan.parents(model), starts=('id', 'name'))
+
+    @classmethod
+    async def get_list_rows(cls, model: ModelType, session: AsyncSession,
+                            since: Optional[datetime] = None) -> List[Dict]:
+        """
+            get_list через .mappings(): список словарей в формате to_dict_fast без гидратации ORM
+            since - только записи, измененные позже (updated_at > since)
+        """
+        plan = cls.get_row_plan(model)
+        stmt = plan.select()
+        if since is not None:
+            stmt = stmt.where(model.updated_at > since)
+        return await plan.fetch(stmt, session)
+
     @classmethod
     async def get_index(cls, model: ModelType, session: AsyncSession, **kwargs) -> int:
         """
@@ -469,7 +673,7 @@ class Repository(Background, metaclass=RepositoryMeta):
         запускается через роутер
         """
         try:
-            await session.execute(update(model), data)
+            await cls.bulk_update(data, model, session)
         except Exception as e:
             raise AppBaseException(message=str(e), status_code=404)
 
@@ -505,10 +709,7 @@ class Repository(Background, metaclass=RepositoryMeta):
             return List[instance]
         """
         try:
-            stmt = cls.get_query(model).order_by(model.id.asc())
-            if limit:
-                stmt = stmt.limit(limit)
-            result = await cls.nonpagination(stmt, session)
+            result = await cls.nonpagination(cls.get_full_query(model, limit), session)
             return result
         except Exception as e:
             raise AppBaseException(message=f'get_full.error; {str(e)}', status_code=404)
@@ -551,97 +752,85 @@ class Repository(Background, metaclass=RepositoryMeta):
         except Exception as e:
             raise AppBaseException(message=f'search_by_list_value_exact.error; {str(e)}', status_code=404)
 
-    @classmethod
-    async def sync_items_by_path(cls,
-                                 session: AsyncSession, current_model,  # Например, модель Category
-                                 start_id: int, path_str: str, skip_keys: set
-                                 ) -> int:
+    @staticmethod
+    def get_keyset_columns(model: ModelType) -> Dict[str, Any]:
         """
-            Синхронизирует search_content у всех Item, связанных с измененной записью.
-            Решает проблему DuplicateAliasError через алиасы.
+            колонки модели, по которым допустима keyset сортировка
+            (скалярные типы: числа, строки, даты, bool)
         """
-        try:            # 1. Получаем классы моделей
-            ItemModel = get_model_by_name('Item')
-            DrinkModel = get_model_by_name('Drink')
-            # Используем алиасы, чтобы SQLAlchemy не путалась при джоинах
-            target_drink = aliased(DrinkModel)
-            target_item = aliased(ItemModel)
-
-            # 2. Строим запрос от текущей модели к целям (Item, Drink)
-            stmt = select(target_item, target_drink).select_from(current_model)
-
-            # 3. Динамическая цепочка JOIN по метаданным
-            active_model_class = current_model
-            path_parts = path_str.split('.')
-
-            for part in path_parts:
-                mapper = inspect(active_model_class)
-                # Находим имя relationship
-                rel_key = next(
-                    (r.key for r in mapper.relationships if r.mapper.class_.__name__.lower() == part.lower()), None
-                )
-
-                if not rel_key:
-                    raise AttributeError(f"Связь '{part}' не найдена в модели {active_model_class.__name__}")
-
-                # Определяем, к какому классу прыгаем
-                next_model_class = getattr(active_model_class, rel_key).property.mapper.class_
-
-                # Подменяем на алиас, если дошли до Drink или Item
-                if next_model_class == DrinkModel:
-                    step_target = target_drink
-                elif next_model_class == ItemModel:
-                    step_target = target_item
-                else:
-                    step_target = next_model_class
-
-                # Выполняем JOIN через атрибут отношения
-                stmt = stmt.join(step_target, getattr(active_model_class, rel_key))
-                active_model_class = next_model_class
+        columns: dict = {}
+        for attr in inspect(model).column_attrs:
+            col = attr.columns[0]
+            try:
+                python_type = col.type.python_type
+            except NotImplementedError:
+                continue
+            if python_type in (int, float, str, bool, datetime, date, Decimal):
+                columns[attr.key] = col
+        return columns
 
-            # 4. Фильтруем по ID и выполняем
-            stmt = stmt.where(current_model.id == start_id)
-            result = await session.execute(stmt)
-            rows = result.all()
-
-            if not rows:
-                logger.info('sync_items_by_path. no records for update')
-                return 0
-            logger.info('sync_items_by_path 1')
-            # 5. Обработка и обновление
-            processed_drinks: list = []
-            for item_obj, drink_obj in rows:
-                if drink_obj.id not in processed_drinks:
-                    drink_dict = drink_obj.to_dict_fast()
-                    content = extract_text_ultra_fast(drink_dict, skip_keys).lower()
-                    logger.info('sync_items_by_path 2')
-                    processed_drinks.append(drink_obj.id)
-                    logger.info('sync_items_by_path 3')
-                    item_obj.search_content = content
-
-            # 6. Принудительная синхронизация с БД
-            await session.flush()
-            logger.success(f'updated {len(rows)} records')
-            return len(rows)
-        except Exception as e:
-            raise AppBaseException(message=f'sync_items_by_path.error; {str(e)}', status_code=404)
+    @staticmethod
+    def _keyset_condition(column, id_column, value: Any, last_id: int, descending: bool, backward: bool):
+        """
+            условие "после курсора" для порядка ORDER BY column {asc|desc} NULLS LAST, id {asc|desc}
+            backward=True - "до курсора" (предыдущая страница)
+        """
+        after = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+        before = (lambda a, b: a > b) if descending else (lambda a, b: a < b)
+        nullable = column.nullable and not column.primary_key
+        if not backward:
+            if value is None:
+                return and_(column.is_(None), after(id_column, last_id))
+            cond = or_(after(column, value), and_(column == value, after(id_column, last_id)))
+            return or_(cond, column.is_(None)) if nullable else cond
+        if value is None:
+            return or_(column.is_not(None), and_(column.is_(None), before(id_column, last_id)))
+        cond = or_(before(column, value), and_(column == value, before(id_column, last_id)))
+        return and_(column.is_not(None), cond) if nullable else cond
 
     @classmethod
     async def get_keyset(cls, model: ModelType, session: AsyncSession,
-                         last_id: int = None,
-                         limit: int = 15) -> dict:
+                         cursor: Optional[Cursor] = None,
+                         limit: int = 15,
+                         order_by: str = 'id',
+                         descending: bool = True,
+                         stmt: Optional[Select] = None) -> Tuple[List[ModelType], bool]:
         """
             постраничный вывод по keyset
             не знает сколько страниц всего, но быстрый доступ для страниц > 10
-        """
-        # Условие Keyset: (score < last_score) ИЛИ (score == last_score И id < last_id)
-        stmt = cls.get_query(model)
-        if last_id is not None:
-            stmt = stmt.where(model.id < last_id)
-        # Сортировка по score, затем по id для стабильности
-        stmt = stmt.order_by(desc(model.id)).limit(limit)
+            сортировка: order_by (любая скалярная колонка модели) + id, asc/desc, NULLS LAST
+            cursor - граничная запись предыдущей выдачи (см. app.core.utils.cursor_utils)
+            return: (список instances в порядке сортировки, есть ли еще записи в направлении обхода)
+        """
+        columns = cls.get_keyset_columns(model)
+        column = columns.get(order_by)
+        if column is None:
+            raise AppBaseException(message=f'order_by "{order_by}" is not supported. '
+                                           f'allowed: {", ".join(sorted(columns))}', status_code=400)
+        if cursor and (cursor.order_by, cursor.desc) != (order_by, descending):
+            raise AppBaseException(message='cursor does not match order_by / desc', status_code=400)
+        id_column = model.id
+        backward = bool(cursor and cursor.backward)
+        stmt = cls.get_query(model) if stmt is None else stmt
+        if cursor:
+            stmt = stmt.where(cls._keyset_condition(column, id_column, cursor.value, cursor.id,
+                                                    descending, backward))
+        # при обходе назад сортировка обратная, результат разворачиваем
+        scan_desc = descending != backward
+        if order_by == 'id':
+            order = (desc(id_column) if scan_desc else id_column.asc(),)
+        else:
+            col_order = desc(column) if scan_desc else column.asc()
+            col_order = col_order.nulls_first() if backward else col_order.nulls_last()
+            order = (col_order, desc(id_column) if scan_desc else id_column.asc())
+        stmt = stmt.order_by(*order).limit(limit + 1)
         result = await session.execute(stmt)
-        return result.all()
+        items = list(result.scalars().all())
+        has_more = len(items) > limit
+        items = items[:limit]
+        if backward:
+            items.reverse()
+        return items, has_more
 
 
 class HandbookRepository(SearchRepositoryMixin, Repository):
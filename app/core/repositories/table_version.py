@@ -0,0 +1,67 @@
+# app/core/repositories/table_version.py
+"""
+    версии (поколения) таблиц в пределах процесса:
+    увеличиваются после commit транзакции, изменившей таблицу (ORM flush или Repository.create / patch /
+    delete / bulk_* через mark) - до commit параллельный запрос видит старые данные и не должен
+    закешировать их под новым поколением; rollback изменения отбрасывает
+    по ним сбрасываются кеши, зависящие от содержимого таблиц (CountProvider, HandbookCache)
+    записи из других процессов не видны - у кешей есть TTL
+"""
+from itertools import chain
+from typing import Dict, Iterable, Tuple, Union
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.types import ModelType
+
+PENDING = 'table_version_pending'     # session.info: таблицы, измененные в текущей транзакции
+
+
+class TableVersion:
+    # {имя таблицы: поколение}
+    _versions: Dict[str, int] = {}
+
+    @staticmethod
+    def _name(target: Union[ModelType, str]) -> str:
+        return target if isinstance(target, str) else getattr(target, '__tablename__', None)
+
+    @classmethod
+    def bump(cls, target: Union[ModelType, str]):
+        """ немедленно: изменения уже видны всем (после commit или вне транзакции) """
+        if table := cls._name(target):
+            cls._versions[table] = cls._versions.get(table, 0) + 1
+
+    @classmethod
+    def mark(cls, session: Union[AsyncSession, Session], target: Union[ModelType, str]):
+        """ таблица изменена в транзакции session - bump после ее commit """
+        if table := cls._name(target):
+            session.info.setdefault(PENDING, set()).add(table)
+
+    @classmethod
+    def get(cls, target: Union[ModelType, str]) -> int:
+        return cls._versions.get(cls._name(target), 0)
+
+    @classmethod
+    def snapshot(cls, targets: Iterable[Union[ModelType, str]]) -> Tuple[int, ...]:
+        return tuple(cls._versions.get(cls._name(t), 0) for t in targets)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect(session: Session, flush_context):
+    """ таблицы объектов flush (new / dirty / deleted еще в состоянии до flush) """
+    for obj in chain(session.new, session.dirty, session.deleted):
+        for table in inspect(obj).mapper.tables:
+            TableVersion.mark(session, table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump(session: Session):
+    for table in session.info.pop(PENDING, ()):
+        TableVersion.bump(table)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session: Session):
+    session.info.pop(PENDING, None)
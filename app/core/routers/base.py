@@ -11,10 +11,11 @@ from app.core.config.database.db_async import get_db
 from app.core.config.project_config import get_paging, settings
 from app.core.utils.common_utils import back_to_the_future, delta_data
 from app.core.services.service import Service
-from app.core.schemas.base import (DeleteResponse, PaginatedResponse, ReadSchema,
+from app.core.schemas.base import (BatchCreateResponse, DeleteResponse, PaginatedResponse, ReadSchema,
                                    CreateResponse, UpdateSchema, CreateSchema)
 from app.core.exceptions import exception_to_http
 from app.core.utils.pydantic_utils import get_repo, get_service, get_pyschema, orresponse
+from app.core.utils.stream_utils import stream_format, stream_response
 
 
 paging = get_paging
@@ -124,6 +125,11 @@ class BaseRouter:
                                   self.get_list_view_page,
                                   methods=["GET"],
                                   openapi_extra={'x-request-schema': None})
+        # 8.1 keyset (cursor) пагинация
+        self.router.add_api_route("/cursor",
+                                  self.get_keyset,
+                                  methods=["GET"],
+                                  openapi_extra={'x-request-schema': None})
         # 9. get one buy id
         self.router.add_api_route("/{id}",
                                   self.get_one, methods=["GET"],
@@ -165,9 +171,10 @@ class BaseRouter:
             raise HTTPException(status_code=500, detail=detail)
 
     async def batch_create(self, data: List[TCreateSchema],
-                           session: AsyncSession = Depends(get_db)) -> List[TReadSchema]:
+                           session: AsyncSession = Depends(get_db)) -> List[BatchCreateResponse[TReadSchema]]:
         """
          Создание нескольких записей без зависимостей DELETE?
+         [{'created': True - создана / False - существует, 'data': запись}, ...] в порядке входных данных
         """
         try:
             obj = await self.service.batch_get_or_create(data, self.repo, self.model, session)
@@ -286,7 +293,8 @@ class BaseRouter:
                                          description="Дата в формате ISO 8601 (например, 2024-01-01T00:00:00Z)"
                                          ),
             session: AsyncSession = Depends(get_db),
-            limit: int = 20
+            limit: int = 20,
+            stream: Optional[str] = Query(None, description="потоковая выдача: ndjson | json (limit=0 - без лимита)")
     ):
         """
             Получение все записей одним списком после указанной даты.
@@ -295,6 +303,10 @@ class BaseRouter:
             response_model <>ReadRelatio
 
         """
+        if fmt := stream_format(stream):
+            after_date = back_to_the_future(after_date)
+            return stream_response(lambda db: self.service.stream_all(after_date, self.repo, self.model, db, limit),
+                                   fmt)
         try:
             after_date = back_to_the_future(after_date)
             response = await self.service.get_all(after_date, self.repo, self.model, session)
@@ -303,10 +315,15 @@ class BaseRouter:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 detail=f"Internal server error. {e}")
 
-    async def get_full(self, session: AsyncSession = Depends(get_db), limit: int = 20) -> List[TReadSchema]:
+    async def get_full(self, session: AsyncSession = Depends(get_db), limit: int = 20,
+                       stream: Optional[str] = Query(None, description="потоковая выдача: ndjson | json "
+                                                                       "(limit=0 - без лимита)")
+                       ) -> List[TReadSchema]:
         """
             то же что и get но без ограничения по дате
         """
+        if fmt := stream_format(stream):
+            return stream_response(lambda db: self.service.stream_full(self.repo, self.model, db, limit), fmt)
         try:
             response = await self.service.get_full(self.repo, self.model, session, limit)
             return orresponse(response)
@@ -331,6 +348,24 @@ class BaseRouter:
         # result = self.paginated_response(**response)
         # return result
 
+    async def get_keyset(self,
+                         cursor: Optional[str] = Query(None, description="next_cursor / prev_cursor из "
+                                                                         "предыдущего ответа. пусто - первая страница"),
+                         order_by: str = Query('id', description="поле сортировки"),
+                         desc: bool = Query(False, description="сортировка по убыванию"),
+                         page_size: int = Query(paging.get('def', 20),
+                                                ge=paging.get('min', 1),
+                                                le=paging.get('max', 1000)),
+                         session: AsyncSession = Depends(get_db)
+                         ) -> PaginatedResponse:
+        """
+            Постраничный вывод по курсору (keyset) - скорость не зависит от глубины страницы
+            курсор непрозрачный, order_by и desc должны совпадать с курсором
+            response_model PaginatedResponse[<>ReadRelation>] + next_cursor / prev_cursor
+        """
+        response = await self.service.get_keyset(cursor, order_by, desc, page_size, self.repo, self.model, session)
+        return orresponse(response)
+
     async def search(self, request: Request, search: str = Query(None, description="Поисковый запрос. "
                                                "В случае пустого запроса будут "
                                                "выведены все данные "),
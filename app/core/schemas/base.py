@@ -195,6 +195,15 @@ class CreateResponse(PkSchema, DateSchema):
     pass
 
 
+class BatchCreateResponse(BaseOrigin, Generic[T]):
+    """
+    элемент ответа batch_create (Service.batch_get_or_create)
+    использовать в endpoints - вместо Generic[T] подствлять <model>Read
+    """
+    created: bool
+    data: T
+
+
 class PaginatedResponse(BaseOrigin, Generic[T]):
     """
     использовать в endpoints - вместо Generic[T] подствлять <model>Read
@@ -205,6 +214,11 @@ class PaginatedResponse(BaseOrigin, Generic[T]):
     page_size: Optional[int] = None
     has_next: Optional[int] = None
     has_prev: Optional[int] = None
+    # exact | cached | estimated - см. app.core.repositories.count_provider
+    total_mode: Optional[str] = None
+    # keyset пагинация (см. BaseRouter.get_keyset)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 class DeleteResponse(BaseModel):
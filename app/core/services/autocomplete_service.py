@@ -0,0 +1,106 @@
+# app/core/services/autocomplete_service.py
+"""
+    автодополнение имен справочников из памяти процесса (app.core.utils.prefix_index)
+    индекс на справочник: все языковые колонки name, name_ru, name_fr, ... + id
+    строится при первом запросе; актуальность: сразу после commit записи (TableVersion)
+    или не чаще раза в AUTOCOMPLETE_REFRESH сек - записи с updated_at > последней загруженной
+    (с перекрытием HANDBOOK_DELTA_OVERLAP), удаления - по расхождению count(*) с известными id
+    MemoryIndexState - общая часть для индексов таблиц в памяти (см. также fuzzy_service)
+"""
+import asyncio
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.project_config import settings
+from app.core.repositories.table_version import TableVersion
+from app.core.services.service import Service
+from app.core.types import ModelType
+from app.core.utils.alchemy_utils import get_multilang
+from app.core.utils.prefix_index import PrefixIndex
+
+THREAD_ROWS = 1000      # больше измененных строк - индекс обновляется в потоке
+
+
+def name_columns(model: ModelType, bases: Iterable[str] = ('name',)) -> List[str]:
+    """ языковые колонки: name, name_ru, name_fr, ... для каждого base """
+    pattern = re.compile(r'^({})(_[a-z]{{2}})?$'.format('|'.join(map(re.escape, bases))))
+    return [c.name for c in model.__table__.c if pattern.match(c.name)]
+
+
+class MemoryIndexState:
+    """ индекс (update(changed, removed)) по языковым колонкам таблицы + данные для выдачи """
+
+    def __init__(self, model: ModelType, index, bases: Iterable[str] = ('name',)):
+        self.model = model
+        self.columns = name_columns(model, bases)
+        self.index = index
+        self.names: Dict[int, dict] = {}            # id -> {колонка: значение} для выдачи
+        self.synced_at: Optional[datetime] = None   # max(updated_at) загруженных записей
+        self.checked = 0.0                          # time.monotonic() последней проверки
+        self.version = -1                           # TableVersion на момент проверки
+        self.lock = asyncio.Lock()
+
+    async def apply(self, rows):
+        """ rows: (id, updated_at, *значения колонок) """
+        changed = []
+        for id, updated_at, *names in rows:
+            self.names[id] = dict(zip(self.columns, names))
+            changed.append((id, names))
+            if updated_at and (self.synced_at is None or updated_at > self.synced_at):
+                self.synced_at = updated_at
+        if len(changed) > THREAD_ROWS:
+            await asyncio.to_thread(self.index.update, changed)
+        else:
+            self.index.update(changed)
+
+    async def refresh(self, session: AsyncSession):
+        model = self.model
+        version = TableVersion.get(model)
+        if version == self.version and time.monotonic() - self.checked < settings.AUTOCOMPLETE_REFRESH:
+            return
+        self.checked, self.version = time.monotonic(), version
+        stmt = select(model.id, model.updated_at, *(model.__table__.c[col] for col in self.columns))
+        if self.synced_at:
+            stmt = stmt.where(model.updated_at > self.synced_at - timedelta(seconds=settings.HANDBOOK_DELTA_OVERLAP))
+        await self.apply((await session.execute(stmt)).all())
+        if await session.scalar(select(func.count()).select_from(model)) != len(self.names):
+            current = set((await session.execute(select(model.id))).scalars().all())
+            if removed := self.names.keys() - current:
+                self.index.update(removed=removed)
+                for id in removed:
+                    del self.names[id]
+
+    async def ensure(self, session: AsyncSession):
+        async with self.lock:
+            await self.refresh(session)
+        return self
+
+
+class HandbookAutocomplete:
+    _states: Dict[str, MemoryIndexState] = {}
+
+    @classmethod
+    def clear(cls):
+        cls._states.clear()
+
+    @classmethod
+    async def ensure(cls, model: ModelType, session: AsyncSession) -> MemoryIndexState:
+        if (state := cls._states.get(model.__tablename__)) is None:
+            state = cls._states[model.__tablename__] = MemoryIndexState(model, PrefixIndex())
+        return await state.ensure(session)
+
+    @classmethod
+    async def lookup(cls, model: ModelType, prefix: str, lang: str, session: AsyncSession,
+                     limit: int = 20) -> List[dict]:
+        """ [{'id': .., 'name': имя на языке lang (или первое непустое)}, ...] по алфавиту """
+        if not prefix or not prefix.strip():
+            return []
+        state = await cls.ensure(model, session)
+        languages = Service.lang_sorted(lang if lang in settings.LANGUAGES else settings.DEFAULT_LANG)
+        return [{'id': id, 'name': get_multilang(state.names[id], 'name', languages)}
+                for id in state.index.startswith(prefix, limit)]
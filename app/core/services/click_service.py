@@ -1,159 +1,157 @@
 # app.core.service.click_service.py
 """
-    опыты без практического применения
+    полнотекстовый поиск по реплике items в clickhouse (items_search: id, search_content, версия)
+    без FINAL: актуальная версия строки - argMax(search_content, CH_VERSION_COLUMN) по id
+    (колонка проверяется при старте - prepare; нет колонки или prepare не выполнен - FINAL, как раньше)
+    фильтр по токенам (hasToken) сначала отбирает id по сырой таблице - работает skip index tokenbf_v1
+    (создается в prepare), затем условие проверяется еще раз на актуальной версии
+    ранжирование top-k: score desc, id; LIMIT / OFFSET и total (count() OVER ()) считаются в clickhouse
     так как clickhouse работает только с голым raw sql - см сразу в репозиторий
 """
+import re
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
 from app.core.config.project_config import settings
 
+SKIP_INDEX = 'idx_search_content_tokens'
+
+
+def split_tokens(query: str) -> List[str]:
+    """ токены для hasToken: только буквы/цифры (как разбивает tokenbf_v1), без повторов """
+    return list(dict.fromkeys(re.findall(r'\w+', query.lower())))
+
 
 class FullTextSearch:
     limit = settings.CH_LIMIT
+    _versions: Dict[str, Optional[str]] = {}    # таблица -> колонка версии для argMax (prepare), иначе FINAL
 
     @classmethod
-    async def search(cls, query: str, table: str, ch_client, mode: str = 'auto'):
-        """
-        Универсальный метод поиска
-        mode: 'auto', 'word', 'and', 'or', 'phrase', 'fuzzy'
-        """
-        query_lower = query.lower()
-        await ch_client.command("SET send_logs_level = 'debug'")
-        match mode:
-            case 'auto':
-                if '"' in query:
-                    result = await cls._search_phrase(query, table, ch_client)
-                elif len(query_lower.split()) > 1:
-                    result = await cls._search_ranked(query_lower, table, ch_client)
-                else:
-                    result = await cls._search_word(query_lower, table, ch_client)
-            case 'word':
-                result = await cls._search_word(query_lower, table, ch_client)
-            case 'and':
-                result = await cls._search_and(query_lower, table, ch_client)
-            case 'or':
-                result = await cls._search_or(query_lower, table, ch_client)
-            case 'phrase':
-                result = await cls._search_phrase(query, table, ch_client)
-            case 'fuzzy':
-                result = await cls._search_fuzzy(query_lower, table, ch_client)
-            case 'fuzzy2':
-                result = await cls._search_fuzzy2(query_lower, table, ch_client)
-            case 'ranked':
-                result = await cls._search_ranked(query_lower, table, ch_client)
-            case 'like':
-                result = await cls._search_like(query_lower, table, ch_client)
-        return tuple(row[0] for row in result.result_rows)
+    async def _scalar(cls, ch_client, sql: str, **parameters):
+        rows = (await ch_client.query(sql, parameters=parameters)).result_rows
+        return rows[0][0] if rows else None
 
     @classmethod
-    async def _search_like(cls, query: str, table: str, ch_client):
-        sql = "SELECT id FROM items_search FINAL WHERE search_content LIKE {query:String} LIMIT 50"
-        return await ch_client.query(sql, parameters={'query': f'%{query.lower()}%'})
-
-    @classmethod
-    async def _search_word(cls, query: str, table: str, ch_client):
-        sql = f"""
-            SELECT id, search_content
-            FROM {table} FINAL
-            WHERE hasToken(search_content, {{token:String}})
+    async def prepare(cls, ch_client, table: str):
         """
-        return await ch_client.query(sql, parameters={'token': query})
-
-    @classmethod
-    async def _search_and(cls, query: str, table: str, ch_client):
-        words = query.split()
-        sql = f"""
-            SELECT id, search_content
-            FROM {table} FINAL
-            WHERE hasAllTokens(search_content, {{words:Array(String)}})
+            однократно при старте (lifespan), не на пути запроса:
+            1. колонка версии CH_VERSION_COLUMN есть в таблице - argMax, нет - FINAL (с предупреждением)
+            2. skip index tokenbf_v1 по search_content: ADD + MATERIALIZE только если индекса нет
+               в system.data_skipping_indices и его материализация еще не запущена (другим процессом)
+            ошибка - поиск работает через FINAL / без индекса
         """
-        return await ch_client.query(sql, parameters={'words': words})
+        version = settings.CH_VERSION_COLUMN
+        try:
+            found = await cls._scalar(ch_client, 'SELECT count() FROM system.columns WHERE database = currentDatabase()'
+                                                 ' AND table = {table:String} AND name = {name:String}',
+                                      table=table, name=version)
+            cls._versions[table] = version if found else None
+            if not found:
+                logger.warning(f'FullTextSearch: в {table} нет колонки версии {version} - поиск через FINAL')
+        except Exception as e:
+            logger.warning(f'FullTextSearch.prepare {table}: {e} - поиск через FINAL')
+        try:
+            if await cls._scalar(ch_client, 'SELECT count() FROM system.data_skipping_indices '
+                                            'WHERE database = currentDatabase() AND table = {table:String} '
+                                            'AND name = {name:String}', table=table, name=SKIP_INDEX):
+                return
+            await ch_client.command(f'ALTER TABLE {table} ADD INDEX IF NOT EXISTS {SKIP_INDEX} '
+                                    f'search_content TYPE {settings.CH_TOKEN_INDEX} GRANULARITY 1')
+            if await cls._scalar(ch_client, 'SELECT count() FROM system.mutations WHERE database = currentDatabase()'
+                                            ' AND table = {table:String} AND NOT is_done'
+                                            ' AND position(command, {name:String}) > 0', table=table, name=SKIP_INDEX):
+                return
+            await ch_client.command(f'ALTER TABLE {table} MATERIALIZE INDEX {SKIP_INDEX}')
+            logger.info(f'FullTextSearch: {table}.{SKIP_INDEX} добавлен, материализация запущена')
+        except Exception as e:
+            logger.warning(f'FullTextSearch.prepare {table}: skip index {e}')
 
-    @classmethod
-    async def _search_or(cls, query: str, table: str, ch_client):
-        words = query.split()
-        sql = f"""
-            SELECT id, search_content
-            FROM {table} FINAL
-            WHERE hasAnyTokens(search_content, {{words:Array(String)}})
-        """
-        return await ch_client.query(sql, parameters={'words': words})
+    @staticmethod
+    def _tokens_condition(column: str, count: int, op: str) -> str:
+        return '(' + f' {op} '.join(f'hasToken({column}, {{w{i}:String}})' for i in range(count)) + ')'
 
     @classmethod
-    async def _search_ranked(cls, query: str, table: str, ch_client):
-        words = query.split()
-        sql = f"""
-            SELECT
-                id,
-                search_content,
-                length(arrayIntersect(
-                    splitByNonAlpha(lower(search_content)),
-                    {{words:Array(String)}}
-                )) AS score
-            FROM {table} FINAL
-            WHERE hasAnyTokens(search_content, {{words:Array(String)}})
-            ORDER BY score DESC, id
+    def build(cls, query: str, mode: str) -> Optional[Tuple[str, str, str, Dict]]:
         """
-        return await ch_client.query(sql, parameters={'words': words})
-
-    @classmethod
-    async def _search_phrase(cls, phrase: str, table: str, ch_client):
-        sql = f"""
-            SELECT id, search_content
-            FROM {table} FINAL
-            WHERE positionCaseInsensitive(search_content, {{phrase:String}}) > 0
+            (предфильтр по сырой таблице или '', условие на актуальной версии content, score, параметры)
+            None - искать нечего
         """
-        return await ch_client.query(sql, parameters={'phrase': phrase})
+        words = split_tokens(query)
+        if mode == 'auto':
+            mode = 'phrase' if '"' in query else 'ranked' if len(words) > 1 else 'word'
+        if mode == 'word':
+            words = words[:1]
+        params: Dict = {f'w{i}': w for i, w in enumerate(words)}
+        match mode:
+            case 'phrase':
+                phrase = query.strip().strip('"').strip()
+                if not phrase:
+                    return None
+                params['phrase'] = phrase
+                prefilter = cls._tokens_condition('search_content', len(words), 'AND') if words else ''
+                return prefilter, 'positionCaseInsensitive(content, {phrase:String}) > 0', '1', params
+            case 'fuzzy' | 'fuzzy2':
+                if not words:
+                    return None
+                params.update({'words': words, 'distance': 1})
+                # опечатки индексом не отбираются: без предфильтра, но с LIMIT
+                return ('', 'multiFuzzyMatchAny(content, {distance:UInt8}, {words:Array(String)})',
+                        'multiFuzzyMatchAnyIndex(content, {distance:UInt8}, {words:Array(String)})', params)
+            case 'like':
+                if not query.strip():
+                    return None
+                params['like'] = f'%{query.strip().lower()}%'
+                return '', 'lower(content) LIKE {like:String}', '1', params
+        if not words:
+            return None
+        # word / and / or / ranked: score - кол-во совпавших токенов
+        op = 'AND' if mode in ('and', 'word') else 'OR'
+        matched = ' + '.join(f'hasToken(content, {{w{i}:String}})' for i in range(len(words)))
+        prefilter = cls._tokens_condition('search_content', len(words), op)
+        return prefilter, cls._tokens_condition('content', len(words), op), matched, params
 
     @classmethod
-    async def _search_fuzzy(cls, query: str, table: str, ch_client, distance: int = 1):
-        words = query.split()
-        sql = f"""
-            SELECT
-                id,
-                search_content,
-                multiFuzzyMatchAnyIndex(search_content, {{distance:UInt8}}, {{words:Array(String)}}) AS score
-            FROM {table} FINAL
-            WHERE multiFuzzyMatchAny(search_content, {{distance:UInt8}}, {{words:Array(String)}})
+    def sql(cls, table: str, prefilter: str, condition: str, score: str) -> str:
+        if version := cls._versions.get(table):
+            where = f'WHERE id IN (SELECT id FROM {table} WHERE {prefilter})' if prefilter else ''
+            latest = f'SELECT id, argMax(search_content, {version}) AS content FROM {table} {where} GROUP BY id'
+        else:
+            where = f'WHERE {prefilter}' if prefilter else ''
+            latest = f'SELECT id, search_content AS content FROM {table} FINAL {where}'
+        return f"""
+            SELECT id, {score} AS score, count() OVER () AS total
+            FROM ({latest})
+            WHERE {condition}
             ORDER BY score DESC, id
+            LIMIT {{limit:UInt32}} OFFSET {{offset:UInt32}}
         """
-        return await ch_client.query(sql, parameters={
-            'words': words,
-            'distance': distance,
-            'limit': cls.limit
-        })
 
     @classmethod
-    async def _search_fuzzy2(cls, query: str, table: str, ch_client, distance: int = 1):
-        words = query.split()
-        sql = f"""
-            WITH filtered AS (
-                SELECT id, search_content
-                FROM {table}
-                WHERE hasAnyTokens(search_content, {{words:Array(String)}})
-            )
-            SELECT
-                id,
-                search_content,
-                multiFuzzyMatchAnyIndex(search_content, {{distance:UInt8}}, {{words:Array(String)}}) AS score
-            FROM {table} FINAL
-            WHERE multiFuzzyMatchAny(search_content, {{distance:UInt8}}, {{words:Array(String)}})
-            ORDER BY score DESC, id
+    async def search(cls, query: str, table: str, ch_client, mode: str = 'auto',
+                     limit: Optional[int] = None, offset: int = 0) -> Tuple[List[Tuple[int, float]], int]:
+        """
+            Универсальный метод поиска
+            mode: 'auto', 'word', 'and', 'or', 'ranked', 'phrase', 'fuzzy', 'like'
+            -> ([(id, score), ...] страницы, всего найдено); limit не больше CH_LIMIT
         """
-        return await ch_client.query(sql, parameters={
-            'words': words,
-            'distance': distance,
-            'limit': cls.limit
-        })
+        mode = getattr(mode, 'value', mode) or 'auto'
+        if (built := cls.build(query or '', mode)) is None:
+            return [], 0
+        prefilter, condition, score, params = built
+        limit = min(limit or cls.limit, cls.limit)
+        result = await ch_client.query(cls.sql(table, prefilter, condition, score),
+                                       parameters={**params, 'limit': limit, 'offset': offset})
+        rows = result.result_rows
+        return [(row[0], float(row[1])) for row in rows], rows[0][2] if rows else 0
 
 
 """
 # Использование
-fts = FullTextSearch(client)
-
-# Разные режимы поиска
-results = fts.search("clickhouse", mode='word')           # одно слово
-results = fts.search("database performance", mode='and')  # все слова
-results = fts.search("error timeout", mode='ranked')      # с ранжированием
-results = fts.search('"exact phrase"', mode='phrase')     # точная фраза
-results = fts.search("ClickHose", mode='fuzzy')           # с опечатками
-results = fts.search("database", mode='auto')             # автоматический выбор
+pairs, total = await FullTextSearch.search("clickhouse", 'items_search', ch_client, mode='word')  # одно слово
+pairs, total = await FullTextSearch.search("database performance", table, ch_client, mode='and')   # все слова
+pairs, total = await FullTextSearch.search("error timeout", table, ch_client, mode='ranked')       # с ранжированием
+pairs, total = await FullTextSearch.search('"exact phrase"', table, ch_client, mode='phrase')      # точная фраза
+pairs, total = await FullTextSearch.search("ClickHose", table, ch_client, mode='fuzzy')            # с опечатками
+pairs, total = await FullTextSearch.search("database", table, ch_client, limit=20, offset=40)     # страница 3
 """
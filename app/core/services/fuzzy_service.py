@@ -0,0 +1,73 @@
+# app/core/services/fuzzy_service.py
+"""
+    нечеткое сопоставление (опечатки) из памяти процесса: справочники по name*, напитки по title* / subtitle*
+    индекс - app.core.utils.fuzzy_index, актуальность - как у автодополнения (MemoryIndexState)
+    применение: "возможно, вы имели в виду" в поиске, поиск дублей в Service.batch_get_or_create (FUZZY_DEDUP)
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.project_config import settings
+from app.core.services.autocomplete_service import MemoryIndexState
+from app.core.services.service import Service
+from app.core.types import ModelType
+from app.core.utils.alchemy_utils import get_multilang
+from app.core.utils.fuzzy_index import FuzzyIndex
+
+
+class FuzzyMatchService:
+    _states: Dict[Tuple[str, Tuple[str, ...]], MemoryIndexState] = {}
+
+    @classmethod
+    def clear(cls):
+        cls._states.clear()
+
+    @classmethod
+    async def ensure(cls, model: ModelType, session: AsyncSession,
+                     bases: Iterable[str] = ('name',)) -> MemoryIndexState:
+        key = (model.__tablename__, tuple(bases))
+        if (state := cls._states.get(key)) is None:
+            state = cls._states[key] = MemoryIndexState(model, FuzzyIndex(), key[1])
+        return await state.ensure(session)
+
+    @classmethod
+    async def match_many(cls, model: ModelType, queries: Sequence[str], session: AsyncSession,
+                         limit: int = 10, score_cutoff: Optional[float] = None,
+                         bases: Iterable[str] = ('name',)) -> List[List[Tuple[int, float]]]:
+        """ для каждого запроса [(id, оценка 0..100), ...]; cdist - в потоке """
+        state = await cls.ensure(model, session, bases)
+        cutoff = settings.FUZZY_CUTOFF if score_cutoff is None else score_cutoff
+        async with state.lock:  # индекс не меняется, пока поток читает его
+            return await asyncio.to_thread(state.index.match_many, queries, limit, cutoff)
+
+    @classmethod
+    async def match(cls, model: ModelType, query: str, session: AsyncSession, limit: int = 10,
+                    score_cutoff: Optional[float] = None,
+                    bases: Iterable[str] = ('name',)) -> List[Tuple[int, float]]:
+        if not query or not query.strip():
+            return []
+        return (await cls.match_many(model, [query], session, limit, score_cutoff, bases))[0]
+
+    @classmethod
+    async def lookup(cls, model: ModelType, query: str, lang: str, session: AsyncSession, limit: int = 10,
+                     bases: Iterable[str] = ('name',)) -> List[dict]:
+        """ [{'id': .., base: значение на языке lang, 'score': ..}, ...] """
+        pairs = await cls.match(model, query, session, limit, bases=bases)
+        state = await cls.ensure(model, session, bases)
+        languages = Service.lang_sorted(lang if lang in settings.LANGUAGES else settings.DEFAULT_LANG)
+        bases = tuple(bases)
+        return [{'id': id, **{base: get_multilang(state.names[id], base, languages) for base in bases},
+                 'score': score} for id, score in pairs if id in state.names]
+
+    @classmethod
+    async def find_duplicates(cls, model: ModelType, names: Sequence[str], session: AsyncSession,
+                              score_cutoff: Optional[float] = None) -> List[Optional[int]]:
+        """
+            импорт: id существующей записи, почти совпадающей по имени (или None), для каждого имени
+            пачкой - одна матрица cdist на пачку имен (FuzzyIndex.match_many)
+        """
+        cutoff = settings.FUZZY_DEDUP_CUTOFF if score_cutoff is None else score_cutoff
+        result = await cls.match_many(model, names, session, 1, cutoff)
+        return [found[0][0] if found else None for found in result]
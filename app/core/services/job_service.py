@@ -0,0 +1,393 @@
+# app/core/services/job_service.py
+"""
+    фоновые задачи с состоянием в таблице jobs (app.core.models.job_model)
+    обработчик регистрируется по имени (JobRunner.register) и получает JobContext:
+        params      - параметры задачи (json)
+        checkpoint  - последний обработанный ключ, None - с начала
+        progress()  - счетчики и новый checkpoint (в памяти)
+    heartbeat каждые JOB_FLUSH сек сохраняет счетчики и checkpoint одним UPDATE
+    и проверяет cancel_requested - отмена из любого процесса
+    задача без heartbeat дольше JOB_STALE сек (процесс упал) или прерванная остановкой приложения
+    забирается watch (UPDATE ... FOR UPDATE SKIP LOCKED) и продолжается с checkpoint
+    на один key - не больше одной активной задачи (частичный уникальный индекс)
+    ARQ_JOBS: задача ставится в arq-очередь обработчика (register(name, queue)) со статусом pending,
+    arq-воркер очереди (app/jobs_arq_worker.py) забирает ее (execute) и выполняет тем же _run;
+    id arq-задачи - job-{id}: повторная постановка той же задачи, пока она в очереди, ничего не делает,
+    поэтому watch процесса API просто ставит брошенные задачи в очередь заново
+"""
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from uuid import uuid4
+
+from arq import ArqRedis, create_pool
+from arq.connections import RedisSettings
+from loguru import logger
+from sqlalchemy import and_, event, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.database.db_async import DatabaseManager
+from app.core.config.project_config import settings
+from app.core.models.job_model import ACTIVE, ACTIVE_WHERE, Job
+
+Handler = Callable[['JobContext'], Awaitable[None]]
+_LOCK_KEY = 7303    # pg_advisory_xact_lock: создание таблицы из нескольких процессов
+
+
+class JobContext:
+    """ состояние выполняемой задачи; сохраняется heartbeat-ом JobRunner """
+
+    def __init__(self, row):
+        self.id, self.name, self.params = row.id, row.name, row.params or {}
+        self.checkpoint: Optional[dict] = row.checkpoint
+        self.processed, self.errors, self.total = row.processed, row.errors, row.total
+        self.last_error: Optional[str] = row.last_error
+        self.cancelled = False      # cancel_requested или задачу забрал другой процесс
+        self.lost = False           # задачу забрал другой процесс: статус не трогаем
+        self.state = JobRunner.state
+
+    def progress(self, processed: int = 0, checkpoint: Optional[dict] = None, total: Optional[int] = None,
+                 errors: int = 0, error: Optional[str] = None):
+        self.processed += processed
+        self.errors += errors
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        if total is not None:
+            self.total = total
+        if error is not None:
+            self.last_error = error[:2000]
+
+    def values(self) -> dict:
+        return {'processed': self.processed, 'errors': self.errors, 'total': self.total,
+                'checkpoint': self.checkpoint, 'last_error': self.last_error}
+
+    async def flush(self, **values) -> bool:
+        """ сохранение + heartbeat; -> True, если задачу нужно остановить """
+        stmt = (update(Job).where(Job.id == self.id, Job.owner == JobRunner.owner)
+                .values(**self.values(), heartbeat_at=func.now(), **values)
+                .returning(Job.cancel_requested))
+        async with DatabaseManager.session_maker() as session:
+            cancel = (await session.execute(stmt)).scalar_one_or_none()
+            await session.commit()
+        self.lost = cancel is None
+        self.cancelled = self.cancelled or self.lost or cancel
+        return self.cancelled
+
+
+class JobRunner:
+    handlers: Dict[str, Handler] = {}
+    queues: Dict[str, str] = {}                 # обработчик -> arq-очередь (settings.ARQ_QUEUES)
+    tasks: Dict[int, asyncio.Task] = {}         # задачи этого процесса
+    contexts: Dict[int, JobContext] = {}
+    state = None                                # app.state: ресурсы для обработчиков (clickhouse, seaweed ...)
+    owner = f'{socket.gethostname()}:{os.getpid()}'
+    _watch: Optional[asyncio.Task] = None
+    _arq: Optional[ArqRedis] = None
+    _enqueuing: Set[asyncio.Task] = set()       # постановки в очередь после commit (ссылки до завершения)
+
+    @classmethod
+    def register(cls, name: str, queue: str) -> Callable[[Handler], Handler]:
+        def decorator(handler: Handler) -> Handler:
+            cls.handlers[name] = handler
+            cls.queues[name] = queue
+            return handler
+        return decorator
+
+    @classmethod
+    async def arq(cls) -> ArqRedis:
+        if cls._arq is None:
+            cls._arq = await create_pool(RedisSettings(host=settings.REDIS_HOST, port=settings.REDIS_PORT))
+        return cls._arq
+
+    @staticmethod
+    def arq_job_id(id: int) -> str:
+        return f'job-{id}'
+
+    @classmethod
+    async def enqueue(cls, id: int, name: str):
+        """ в очередь обработчика; ошибка redis не теряет задачу - она pending, watch поставит ее снова """
+        try:
+            pool = await cls.arq()
+            await pool.enqueue_job('run_job', id, _job_id=cls.arq_job_id(id), _queue_name=cls.queues[name])
+        except Exception as e:
+            logger.error(f'JobRunner.enqueue job {id} {name}: {e}')
+
+    @classmethod
+    async def install(cls):
+        async with DatabaseManager.engine.begin() as conn:
+            await conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+            await conn.run_sync(Job.__table__.create, checkfirst=True)
+
+    @classmethod
+    async def start(cls, state):
+        """ lifespan: таблица, продолжение брошенных задач, периодическая проверка """
+        cls.state = state
+        await cls.install()
+        cls._watch = asyncio.create_task(cls.watch())
+
+    @classmethod
+    async def shutdown(cls):
+        """ остановка приложения: задачи прерываются, checkpoint сохраняется, статус pending """
+        if cls._watch is not None:
+            cls._watch.cancel()
+        tasks = list(cls.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if cls._arq is not None:
+            await cls._arq.aclose()
+            cls._arq = None
+
+    @classmethod
+    async def submit(cls, name: str, params: Optional[dict] = None, key: Optional[str] = None,
+                     session: Optional[AsyncSession] = None) -> dict:
+        """
+            новая задача: в этом процессе или (ARQ_JOBS) в arq-очереди обработчика
+            key - одна активная задача на key: если есть, возвращается она; None - без ограничения
+            session - задача в транзакции запроса: строка jobs и старт - только после ее commit
+            (задача видит изменения запроса), rollback - задачи нет; id известен сразу
+        """
+        if name not in cls.handlers:
+            raise ValueError(f'обработчик {name} не зарегистрирован')
+        queued = settings.ARQ_JOBS
+        stmt = (insert(Job)
+                .values(name=name, key=key or f'{name}:{uuid4().hex}', params=params or {},
+                        status='pending' if queued else 'running', owner=None if queued else cls.owner,
+                        started_at=None if queued else func.now(), heartbeat_at=func.now())
+                .on_conflict_do_nothing(index_elements=[Job.key], index_where=text(ACTIVE_WHERE))
+                .returning(*Job.__table__.c))
+        if session is not None:
+            row = (await session.execute(stmt)).one_or_none()
+            if row is None:
+                return await cls._active(key, session)
+            cls.start_on_commit(session, row)
+            return cls.as_dict(row)
+        async with DatabaseManager.session_maker() as session:
+            row = (await session.execute(stmt)).one_or_none()
+            if row is None:
+                return await cls._active(key, session)
+            await session.commit()
+        if queued:
+            await cls.enqueue(row.id, name)
+        else:
+            cls.spawn(row)
+        return cls.as_dict(row)
+
+    @classmethod
+    async def _active(cls, key: str, session: AsyncSession) -> dict:
+        job = (await session.execute(select(Job).where(Job.key == key, Job.status.in_(ACTIVE)))).scalar_one()
+        logger.info(f'JobRunner: {key} уже выполняется (job {job.id})')
+        return cls.as_dict(job)
+
+    @classmethod
+    def launch(cls, row):
+        """ закоммиченная задача -> arq-очередь (ARQ_JOBS) или выполнение в этом процессе (без await - из события) """
+        if settings.ARQ_JOBS:
+            task = asyncio.get_running_loop().create_task(cls.enqueue(row.id, row.name))
+            cls._enqueuing.add(task)
+            task.add_done_callback(cls._enqueuing.discard)
+        else:
+            cls.spawn(row)
+
+    @classmethod
+    def start_on_commit(cls, session: AsyncSession, row):
+        """ launch после commit транзакции session; rollback (не savepoint) - отмена """
+        sync_session, pending = session.sync_session, [row]
+
+        def on_commit(_):
+            if pending:
+                cls.launch(pending.pop())
+
+        def on_rollback(_, previous):
+            if not previous.nested:
+                pending.clear()
+
+        event.listen(sync_session, 'after_commit', on_commit)
+        event.listen(sync_session, 'after_soft_rollback', on_rollback)
+
+    @classmethod
+    def spawn(cls, row):
+        ctx = JobContext(row)
+        cls.contexts[ctx.id] = ctx
+        cls.tasks[ctx.id] = asyncio.create_task(cls._run(ctx))
+
+    @classmethod
+    async def heartbeat(cls, ctx: JobContext, task: asyncio.Task):
+        while True:
+            await asyncio.sleep(settings.JOB_FLUSH)
+            try:
+                if await ctx.flush():
+                    task.cancel()
+                    return
+            except Exception as e:
+                logger.warning(f'JobRunner.heartbeat {ctx.id}: {e}')
+
+    @classmethod
+    async def execute(cls, id: int) -> Optional[str]:
+        """ arq-воркер: забрать задачу из очереди и выполнить -> итоговый статус, None - отменена или уже взята """
+        stmt = (update(Job).where(Job.id == id, Job.status == 'pending', Job.cancel_requested.is_(False))
+                .values(status='running', owner=cls.owner, started_at=func.now(), heartbeat_at=func.now(),
+                        resumed_from=Job.processed)
+                .returning(*Job.__table__.c))
+        async with DatabaseManager.session_maker() as session:
+            row = (await session.execute(stmt)).one_or_none()
+            await session.commit()
+        if row is None:
+            return None
+        ctx = JobContext(row)
+        cls.contexts[ctx.id] = ctx
+        cls.tasks[ctx.id] = asyncio.current_task()
+        return await cls._run(ctx)
+
+    @classmethod
+    async def _run(cls, ctx: JobContext) -> Optional[str]:
+        logger.info(f'🚀 job {ctx.id} {ctx.name}: старт, checkpoint {ctx.checkpoint}')
+        ticker = asyncio.create_task(cls.heartbeat(ctx, asyncio.current_task()))
+        values = {}
+        try:
+            await cls.handlers[ctx.name](ctx)
+            values = {'status': 'done', 'finished_at': func.now()}
+            logger.success(f'✅ job {ctx.id} {ctx.name}: обработано {ctx.processed}, ошибок {ctx.errors}')
+        except asyncio.CancelledError:
+            # отмена пользователем - cancelled; остановка приложения - pending, продолжит watch
+            values = ({'status': 'cancelled', 'finished_at': func.now()} if ctx.cancelled
+                      else {'status': 'pending', 'owner': None})
+            logger.warning(f'job {ctx.id} {ctx.name}: {values["status"]}, checkpoint {ctx.checkpoint}')
+        except Exception as e:
+            ctx.last_error = str(e)[:2000]
+            values = {'status': 'failed', 'finished_at': func.now()}
+            logger.error(f'❌ job {ctx.id} {ctx.name}: {e}')
+        finally:
+            ticker.cancel()
+            cls.tasks.pop(ctx.id, None)
+            cls.contexts.pop(ctx.id, None)
+            if not ctx.lost:
+                await ctx.flush(**values)
+        return values.get('status')
+
+    @classmethod
+    async def claim(cls) -> List:
+        """ брошенные задачи известных обработчиков -> этому процессу (атомарно, без гонки между процессами) """
+        stale = func.now() - timedelta(seconds=settings.JOB_STALE)
+        pick = (select(Job.id)
+                .where(Job.name.in_(list(cls.handlers)),
+                       or_(Job.status == 'pending', and_(Job.status == 'running', Job.heartbeat_at < stale)))
+                .with_for_update(skip_locked=True))
+        cancelled = (update(Job).where(Job.id.in_(pick.scalar_subquery()), Job.cancel_requested.is_(True))
+                     .values(status='cancelled', finished_at=func.now()))
+        stmt = (update(Job).where(Job.id.in_(pick.scalar_subquery()))
+                .values(status='running', owner=cls.owner, started_at=func.now(), heartbeat_at=func.now(),
+                        resumed_from=Job.processed)
+                .returning(*Job.__table__.c))
+        async with DatabaseManager.session_maker() as session:
+            await session.execute(cancelled)
+            rows = (await session.execute(stmt)).all()
+            await session.commit()
+        return rows
+
+    @classmethod
+    async def requeue(cls) -> List:
+        """ ARQ_JOBS: брошенные задачи (воркер упал, остановлен или redis потерял очередь) -> снова в очередь """
+        stale = func.now() - timedelta(seconds=settings.JOB_STALE)
+        pick = (select(Job.id)
+                .where(Job.name.in_(list(cls.handlers)), Job.status.in_(ACTIVE), Job.heartbeat_at < stale)
+                .with_for_update(skip_locked=True))
+        cancelled = (update(Job).where(Job.id.in_(pick.scalar_subquery()), Job.cancel_requested.is_(True))
+                     .values(status='cancelled', finished_at=func.now()))
+        stmt = (update(Job).where(Job.id.in_(pick.scalar_subquery()))
+                .values(status='pending', owner=None, heartbeat_at=func.now())
+                .returning(Job.id, Job.name, Job.checkpoint))
+        async with DatabaseManager.session_maker() as session:
+            await session.execute(cancelled)
+            rows = (await session.execute(stmt)).all()
+            await session.commit()
+        return rows
+
+    @classmethod
+    async def resume(cls) -> int:
+        if settings.ARQ_JOBS:
+            rows = await cls.requeue()
+            for row in rows:
+                await cls.enqueue(row.id, row.name)
+            return len(rows)
+        rows = await cls.claim()
+        for row in rows:
+            logger.warning(f'JobRunner: продолжение job {row.id} {row.name} с {row.checkpoint}')
+            cls.spawn(row)
+        return len(rows)
+
+    @classmethod
+    async def watch(cls):
+        while True:
+            try:
+                await cls.resume()
+            except Exception as e:
+                logger.error(f'JobRunner.watch: {e}')
+            await asyncio.sleep(settings.JOB_STALE / 2)
+
+    @classmethod
+    async def cancel(cls, id: int) -> Optional[dict]:
+        """ pending - сразу cancelled; running - флаг, задача останавливается на ближайшем heartbeat """
+        stmt = (update(Job).where(Job.id == id, Job.status.in_(ACTIVE))
+                .values(cancel_requested=True)
+                .returning(*Job.__table__.c))
+        async with DatabaseManager.session_maker() as session:
+            await session.execute(update(Job).where(Job.id == id, Job.status == 'pending')
+                                  .values(status='cancelled', finished_at=func.now()))
+            row = (await session.execute(stmt)).one_or_none()
+            await session.commit()
+        if (task := cls.tasks.get(id)) is not None:
+            cls.contexts[id].cancelled = True
+            task.cancel()
+        return cls.as_dict(row) if row is not None else await cls.get(id)
+
+    @classmethod
+    async def queues_state(cls) -> Dict[str, dict]:
+        """ очереди: настройки, ожидающих arq-задач (None - redis недоступен) и обработчики """
+        try:
+            pool = await cls.arq()
+            queued = {queue: await pool.zcard(queue) for queue in settings.ARQ_QUEUES}
+        except Exception as e:
+            logger.warning(f'JobRunner.queues_state: {e}')
+            queued = {}
+        return {queue: {**config, 'queued': queued.get(queue),
+                        'jobs': sorted(name for name, target in cls.queues.items() if target == queue)}
+                for queue, config in settings.ARQ_QUEUES.items()}
+
+    @classmethod
+    async def get(cls, id: int) -> Optional[dict]:
+        async with DatabaseManager.session_maker() as session:
+            job = await session.get(Job, id)
+        return cls.as_dict(job) if job is not None else None
+
+    @classmethod
+    async def list(cls, status: Optional[str] = None, name: Optional[str] = None,
+                   limit: Optional[int] = None) -> List[dict]:
+        stmt = select(Job).order_by(Job.id.desc()).limit(limit or settings.JOB_LIST_LIMIT)
+        if status:
+            stmt = stmt.where(Job.status == status)
+        if name:
+            stmt = stmt.where(Job.name == name)
+        async with DatabaseManager.session_maker() as session:
+            jobs = (await session.execute(stmt)).scalars().all()
+        return [cls.as_dict(job) for job in jobs]
+
+    @classmethod
+    def as_dict(cls, job) -> dict:
+        """ строка jobs + скорость текущего запуска, шт/сек, и оставшееся время, сек """
+        result = {column.key: getattr(job, column.key) for column in Job.__table__.c}
+        if (ctx := cls.contexts.get(job.id)) is not None:
+            result.update(ctx.values())     # задача этого процесса - счетчики из памяти
+            result['heartbeat_at'] = datetime.now(timezone.utc)
+        rate = eta = None
+        if job.started_at is not None and result['heartbeat_at'] is not None:
+            elapsed = (result['heartbeat_at'] - job.started_at).total_seconds()
+            if elapsed > 0:
+                rate = round((result['processed'] - job.resumed_from) / elapsed, 2)
+        if rate and result['total'] is not None and result['status'] in ACTIVE:
+            eta = round(max(result['total'] - result['processed'], 0) / rate)
+        result.update(rate=rate, eta=eta, queue=cls.queues.get(job.name))
+        return result
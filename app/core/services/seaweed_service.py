@@ -21,7 +21,6 @@ from fastapi import Depends, HTTPException, BackgroundTasks
 from aiohttp.client_exceptions import ClientResponseError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config.database.db_async import DatabaseManager
 from app.core.models.base_model import get_model_by_name
 from app.core.utils.common_utils import jprint  # noqa: F401
 from app.core.utils.hashes import FastImageHasher
@@ -472,14 +471,5 @@ class SeaweedsService:
                              ):
         """ IMPORT IMAGES FROM MONGO TO SEAWEED IN BACKGROUND """
         repository = get_repo('Item')
-        model = get_model_by_name('Item')
-        await repository.run_mongo_to_seaweed(
-            repository=repository, model=model,
-            image_service=image_service,
-            click_repo=self.click_repo,
-            fs=self.fs,
-            session_factory=DatabaseManager.session_maker,
-            background_tasks=background_tasks
-        )
-        logger.warning("background_tasks.add_task: status: ok")
-        return "background_tasks.add_task: status: ok"
+        # задача mongo_to_seaweed (JobRunner): прогресс и отмена - /jobs
+        return await repository.run_mongo_to_seaweed()
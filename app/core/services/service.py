@@ -2,7 +2,7 @@
 import asyncio
 from abc import ABCMeta
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type, Union
 
 from fastapi import BackgroundTasks, HTTPException, Request
 from loguru import logger
@@ -13,15 +13,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config.database.db_async import DatabaseManager
 from app.core.config.project_config import settings
 from app.core.models.base_model import Base, get_model_by_name
+from app.core.models.serializer import serialize_list
+from app.core.repositories.count_provider import CountProvider
+from app.core.repositories.search_cache import SearchResultCache
 from app.core.repositories.sqlalchemy_repository import Repository
 from app.core.schemas.base import BaseModel, IndexFillResponse
 from app.core.services.click_service import FullTextSearch
 from app.core.types import ModelType
 from app.core.utils.alchemy_utils import has_column
-from app.core.utils.common_utils import flatten_dict_with_localized_fields, make_paging_dict
+from app.core.utils.common_utils import flatten_dict_with_localized_fields
 from app.core.utils.converters import list_move
-from app.core.utils.pydantic_utils import (get_data_for_search, get_repo, inst_dict, list_dict, make_paginated_response,
-                                           prepare_search_string)
+from app.core.utils.cursor_utils import Cursor, decode_cursor, encode_cursor
+from app.core.utils.pydantic_utils import (get_data_for_search, get_repo, inst_dict, list_dict, make_cursor_response,
+                                           make_paginated_response, prepare_search_string)
 from app.core.utils.reindexation import reindex_items
 from app.mongodb.service import ThumbnailImageService
 from app.service_registry import get_search_dependencies, register_service
@@ -178,32 +182,46 @@ class Service(metaclass=ServiceMeta):
             raise Exception(f"UNKNOWN_ERROR: {str(e)}") from e
 
     @classmethod
-    async def batch_get_or_create(cls, data_list: List[ModelType],
+    async def fuzzy_duplicates(cls, rows: List[dict], repository: Type[Repository], model: ModelType,
+                               session: AsyncSession, default: List[str]) -> Dict[int, ModelType]:
+        """
+            settings.FUZZY_DEDUP, справочники с default = ['name']:
+            {номер строки: существующая запись с почти совпадающим name (опечатка, регистр, диакритика)}
+        """
+        if not settings.FUZZY_DEDUP or list(default) != ['name'] or not has_column(model, 'name'):
+            return {}
+        from app.core.services.fuzzy_service import FuzzyMatchService  # fuzzy_service импортирует Service
+        positions = [n for n, row in enumerate(rows) if row.get('name')]
+        found = await FuzzyMatchService.find_duplicates(model, [rows[n]['name'] for n in positions], session)
+        ids = {n: id for n, id in zip(positions, found) if id is not None}
+        if not ids:
+            return {}
+        instances = {instance.id: instance
+                     for instance in await repository.get_by_ids(tuple(set(ids.values())), model, session) or ()}
+        return {n: instances[id] for n, id in ids.items() if id in instances}
+
+    @classmethod
+    async def batch_get_or_create(cls, data_list: List[Union[BaseModel, dict]],
                                   repository: Type[Repository], model: ModelType,
-                                  session: AsyncSession, default: List[str] = None, **kwargs) -> Tuple[ModelType, bool]:
+                                  session: AsyncSession, default: List[str] = None,
+                                  **kwargs) -> List[Dict[str, Any]]:
         """
-            находит или создaет записи из списка
-            возвращает instance и True (запись создана) или False (запись существует)
+            находит или создaет записи из списка за постоянное кол-во запросов
+            (INSERT ... ON CONFLICT по уникальному индексу полей default, см. Repository.batch_get_or_create)
+            при settings.FUZZY_DEDUP почти совпадающие имена сопоставляются с существующими (fuzzy_duplicates)
+            возвращает [{'created': True (запись создана) / False (запись существует), 'data': dict}, ...]
+            в порядке входных данных
         """
         try:
             if default is None:
                 default = cls.default
-            result: list = []
-            for data in data_list:
-                data_dict = data.model_dump(exclude_unset=True)
-                default_dict = {key: val for key, val in data_dict.items() if key in default}
-                # ошибка НУЖЕН ПОИСК ПО УНИКАЛЬНЫМ И СВЯЗАННЫМ ПОЛЯМ
-                # поиск существующей записи по совпадению объектов по уникальным полям
-                instance = await repository.get_by_fields(default_dict, model, session)
-                if instance:
-                    result.append(instance)
-                else:
-                    # запись не найдена
-                    obj = model(**data_dict)
-                    instance = await repository.create(obj, model, session)
-                    result.append(instance)
+            rows = [data if isinstance(data, dict) else data.model_dump(exclude_unset=True) for data in data_list]
+            duplicates = await cls.fuzzy_duplicates(rows, repository, model, session, default)
+            found = iter(await repository.batch_get_or_create([row for n, row in enumerate(rows)
+                                                               if n not in duplicates], default, model, session))
+            result = [(duplicates[n], False) if n in duplicates else next(found) for n in range(len(rows))]
             await session.commit()
-            return list_dict(result)
+            return [{'created': created, 'data': inst_dict(instance)} for instance, created in result]
         except IntegrityError as e:
             await session.rollback()
             raise Exception(f'Integrity error: {e}')
@@ -293,6 +311,22 @@ class Service(metaclass=ServiceMeta):
         result = await repository.get_full(model, session, limit)
         return list_dict(result)
 
+    @classmethod
+    async def stream_all(cls, after_date: datetime, repository: Type[Repository], model: ModelType,
+                         session: AsyncSession, limit: int = None,
+                         batch_size: int = None) -> AsyncIterator[List[dict]]:
+        """ get_all потоком: пачки словарей (см. app.core.utils.stream_utils) """
+        stmt = repository.get_all_query(after_date, model, limit)
+        async for batch in repository.stream(stmt, session, batch_size):
+            yield serialize_list(batch)
+
+    @classmethod
+    async def stream_full(cls, repository: Type[Repository], model: ModelType, session: AsyncSession,
+                          limit: int = None, batch_size: int = None) -> AsyncIterator[List[dict]]:
+        """ get_full потоком: пачки словарей """
+        async for batch in repository.stream(repository.get_full_query(model, limit), session, batch_size):
+            yield serialize_list(batch)
+
     @classmethod
     async def get_full_with_pagination(
         cls, page: int, page_size: int, repository: Type[Repository], model: ModelType,
@@ -305,6 +339,31 @@ class Service(metaclass=ServiceMeta):
         result = make_paginated_response(items, total, page, page_size)
         return result
 
+    @classmethod
+    async def get_keyset(
+        cls, cursor: Optional[str], order_by: str, desc: bool, page_size: int,
+        repository: Type[Repository], model: ModelType, session: AsyncSession
+    ) -> Dict[str, Any]:
+        """
+            постраничный вывод по keyset (курсору)
+            ответ - тот же PaginatedResponse + next_cursor / prev_cursor
+        """
+        cur = decode_cursor(cursor)
+        items, has_more = await repository.get_keyset(model, session, cur, page_size, order_by, desc)
+        total = await CountProvider.count(repository.get_query(model), session)
+        backward = bool(cur and cur.backward)
+        has_next = True if backward else has_more
+        has_prev = has_more if backward else cur is not None
+        next_cursor = prev_cursor = None
+        if items and has_next:
+            last = items[-1]
+            next_cursor = encode_cursor(Cursor(order_by, desc, getattr(last, order_by), last.id))
+        if items and has_prev:
+            first = items[0]
+            prev_cursor = encode_cursor(Cursor(order_by, desc, getattr(first, order_by), first.id, True))
+        return make_cursor_response(list_dict(items) if items else [], total, page_size,
+                                    has_next, has_prev, next_cursor, prev_cursor)
+
     @classmethod
     async def get_by_id(
             cls, id: int, repository: Type[Repository],
@@ -350,7 +409,8 @@ class Service(metaclass=ServiceMeta):
         data_dict = data.model_dump(exclude_unset=True)
         # Выполняем обновление
         result = await repository.patch(existing_item, data_dict, session)
-        await cls.pre_run_background_task(id, background_tasks, repository, model)
+        # задача пересчета search_content (/jobs/{id}) или None
+        result['job'] = await cls.pre_run_background_task(id, background_tasks, repository, model, session)
         result['data'] = inst_dict(result.get('data'))
         return result
 
@@ -417,10 +477,10 @@ class Service(metaclass=ServiceMeta):
     @classmethod
     async def get_list_view(cls, request: Request, lang: str, repository: Type[Repository],
                             model: ModelType, session: AsyncSession, ) -> List[tuple]:
-        # Запрос с загрузкой связей и без пагинации
-        rows = await repository.get_list(model, session)
+        # Запрос со связями (LEFT JOIN) без пагинации и без гидратации ORM
+        rows = await repository.get_list_rows(model, session)
         list_fields = ['name']
-        result = [flatten_dict_with_localized_fields(obj.to_dict_fast(), list_fields, lang) for obj in rows]
+        result = [flatten_dict_with_localized_fields(row, list_fields, lang) for row in rows]
         return result
 
     @classmethod
@@ -517,6 +577,7 @@ class Service(metaclass=ServiceMeta):
                         await session.execute(
                             update(model).where(model.id == obj_id).values(search_content=search_str)
                         )
+                    SearchResultCache.mark(session)
                     await session.commit()
                     count = len(ids_to_update)
                     if count > 0:
@@ -548,35 +609,30 @@ class Service(metaclass=ServiceMeta):
     async def reindexation(cls, background_tasks: BackgroundTasks):
         """ полная переиндексация """
         logger.warning('full reindexation')
-        await Repository.run_sync_background(
-            start_model=None, start_id=None, path_str=None, session_factory=DatabaseManager.session_maker,
-            skip_keys=cls.skip_keys, background_tasks=background_tasks)
-        return True
+        # полная переиндексация не зависит от изменений запроса - задача ставится сразу, -> ее id
+        return await Repository.run_sync_background(start_model=None, start_id=None, skip_keys=cls.skip_keys)
 
     @classmethod
     async def pre_run_background_task(cls, id: int, background_tasks: BackgroundTasks,
                                       repository: Type[Repository],
-                                      model: ModelType):
+                                      model: ModelType, session: Optional[AsyncSession] = None) -> Optional[dict]:
         """
             1. проверяет является ли модель привязанной к items, но не items
-            2. если да - отправляет задачу на обновление поля items.search_content items.hashes
+            2. если да - ставит задачу на обновление поля items.search_content items.hashes
+               (старт после commit session) и возвращает ее запись (/jobs/{id}); иначе None
         """
         if model.__name__ == 'Item':
             # нечего индекстировать
-            return
+            return None
+        from app.support.item.change_feed import ChangeFeed
+        if settings.CHANGE_FEED and await ChangeFeed.active():
+            # search_content обновит change feed (триггеры NOTIFY, слушатель в одном из процессов)
+            return None
         path: str = get_search_dependencies(model)  # category.subcategory.drink.item
         if not path or path.split('.')[-1].capitalize() != 'Item':
-            return
-        await repository.run_sync_background(start_model=model, start_id=id,
-                                             path_str=path, session_factory=DatabaseManager.session_maker,
-                                             skip_keys=cls.skip_keys,
-                                             background_tasks=background_tasks)
-        # background_tasks.add_task(
-        #     repository.run_sync_background, start_model=model, start_id=id,
-        #     path_str=path, session_factory=DatabaseManager.session_maker,
-        #     skip_keys=cls.skip_keys
-        # )
-        logger.warning("background_tasks.add_task: status: ok")
+            return None
+        return await repository.run_sync_background(start_model=model, start_id=id, skip_keys=cls.skip_keys,
+                                                    session=session)
 
     @classmethod
     async def get_image_by_id(self, id: int,
@@ -623,15 +679,20 @@ class Service(metaclass=ServiceMeta):
                           repository: Type[Repository], model: ModelType,
                           session: AsyncSession,
                           ch_client, table: str = 'items_search'):
-        """ поиск searh thru click - УДАЛИТЬ ПОТОМ ПОКА ПОИСК ПО CLICK SEARCH неподошел"""
-        # 0. запрос в clickhouse
-        click_service = FullTextSearch
-        click: tuple = await click_service.search(search, table, ch_client, mode)
-        if click:
-            total = len(click)
-            ids = click[(page - 1) * page_size:page * page_size]
-            response = await repository.get_by_ids(ids, model, session)
-            result = make_paging_dict(response, page, page_size, total)
-            return result
-        else:
+        """
+            поиск через clickhouse (FullTextSearch): в clickhouse - ранжирование и страница (LIMIT / OFFSET),
+            в postgresql - записи страницы по ids в порядке ранжирования, score - в каждой записи
+        """
+        pairs, total = await FullTextSearch.search(search, table, ch_client, mode,
+                                                   limit=page_size, offset=(page - 1) * page_size)
+        if not pairs:
             return []
+        scores = dict(pairs)
+        instances = {obj.id: obj for obj in await repository.get_by_ids(tuple(scores), model, session)}
+        items = [{**inst_dict(instances[id]), 'score': score} for id, score in pairs if id in instances]
+        return {"items": items,
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "has_next": page * page_size < total,
+                "has_prev": page > 1}
@@ -1011,6 +1011,22 @@ def transform_list_view(source: dict, languages: Union[List, Tuple], default_ima
     return {key: val for key, val in zip(keys, values) if val}
 
 
+def transform_list_view_row(row: dict, languages: Union[List, Tuple], default_image: str) -> dict:
+    """
+        то же что transform_list_view для строки item_list_view (ItemListRow)
+        title / category / country - словари {поле_xx: значение}
+    """
+    vol = row.get("vol")
+    keys = ("id", "vol", "image_id", "title", "category", "country")
+    values = (row.get("id"),
+              float(vol) if vol is not None else None,
+              row.get("thumbnail") or default_image,
+              get_multilang(row.get("title"), "title", languages),
+              get_multilang(row.get("category"), "name", languages),
+              get_multilang(row.get("country"), "name", languages))
+    return {key: val for key, val in zip(keys, values) if val}
+
+
 def transform_api_list_view(source: dict, def_lang: str, languages: Union[List, Tuple], default_image: str) -> dict:
     """
     трансформация для api
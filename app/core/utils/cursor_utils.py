@@ -0,0 +1,60 @@
+# app/core/utils/cursor_utils.py
+"""
+    непрозрачный курсор для keyset пагинации:
+    base64url(orjson) от {ключ сортировки, направление, значение ключа, id, назад/вперед}
+"""
+import base64
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, NamedTuple, Optional
+
+import orjson
+
+from app.core.exceptions import AppBaseException
+
+
+class Cursor(NamedTuple):
+    order_by: str
+    desc: bool
+    value: Any          # значение ключа сортировки у граничной записи
+    id: int             # id граничной записи (второй ключ сортировки)
+    backward: bool = False  # True - курсор на предыдущую страницу
+
+
+def _pack_value(value: Any) -> list:
+    """ значение + тип, чтобы восстановить datetime / Decimal без потерь """
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    if isinstance(value, Decimal):
+        return ['dec', str(value)]
+    return ['v', value]
+
+
+def _unpack_value(packed: list) -> Any:
+    tp, value = packed
+    match tp:
+        case 'dt':
+            return datetime.fromisoformat(value)
+        case 'd':
+            return date.fromisoformat(value)
+        case 'dec':
+            return Decimal(value)
+    return value
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    payload = [cursor.order_by, int(cursor.desc), _pack_value(cursor.value), cursor.id, int(cursor.backward)]
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).decode().rstrip('=')
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Cursor]:
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        order_by, desc, value, id, backward = orjson.loads(raw)
+        return Cursor(order_by, bool(desc), _unpack_value(value), int(id), bool(backward))
+    except Exception:
+        raise AppBaseException(message='invalid cursor', status_code=400)
@@ -40,7 +40,9 @@ def tokenizer(text: str) -> Tuple[str] | None:
     """Превращает сырой текст в список чистых слов (удаляет/сохраняет сохранением повторов)."""
     if not text:
         return None
-    return tuple({t for t in (w.strip('#') for w in text.lower().translate(_TRANS_MAP).split()) if is_valid_token(t)})
+    # dict.fromkeys, а не set: порядок токенов не зависит от PYTHONHASHSEED процесса
+    return tuple(dict.fromkeys(t for t in (w.strip('#') for w in text.lower().translate(_TRANS_MAP).split())
+                               if is_valid_token(t)))
 
 
 def tokenized_string(text: str) -> str:
@@ -0,0 +1,126 @@
+# app/core/utils/fuzzy_index.py
+"""
+    нечеткий поиск (опечатки) в памяти процесса
+    кандидаты - блокировка по триграммам нормализованных строк (prefix_index.normalize),
+    оценка - rapidfuzz process.cdist (WRatio) пачкой запросов по объединению их кандидатов,
+    векторно, во всех потоках (workers=-1)
+    у записи может быть несколько строк (языки, title / subtitle) - в выдаче лучшая оценка id
+    удаленные позиции помечаются, массивы пересобираются, когда удаленных больше половины
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from app.core.utils.prefix_index import normalize
+
+NGRAM = 3
+CANDIDATES = 256        # макс. кол-во кандидатов на запрос
+COMPACT_MIN = 1024      # пересборка не раньше этого кол-ва удаленных позиций
+MATRIX_CELLS = 1 << 22  # макс. размер матрицы cdist пачки запросов (float32 - 16 МБ)
+
+
+def ngrams(key: str) -> set:
+    padded = f' {key} '
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+class FuzzyIndex:
+
+    def __init__(self):
+        self.choices: List[str] = []            # нормализованные строки
+        self.owners: List[int] = []             # позиция -> id записи (-1 - удалена)
+        self.rows: Dict[int, List[int]] = {}    # id -> позиции
+        self.grams: Dict[str, List[int]] = {}   # триграмма -> позиции
+        self.arrays: Dict[str, np.ndarray] = {}  # триграмма -> позиции int32 (кеш, сброс при изменении)
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def update(self, changed: Iterable[Tuple[int, Iterable[Optional[str]]]] = (), removed: Iterable[int] = ()):
+        """ changed - (id, строки): добавить / заменить запись; removed - id удаленных """
+        for id in removed:
+            self._drop(id)
+        for id, names in changed:
+            self._drop(id)
+            for key in dict.fromkeys(key for name in names if name and (key := normalize(name))):
+                pos = len(self.choices)
+                self.choices.append(key)
+                self.owners.append(id)
+                self.rows.setdefault(id, []).append(pos)
+                for gram in ngrams(key):
+                    self.grams.setdefault(gram, []).append(pos)
+                    self.arrays.pop(gram, None)
+        if self.dead >= COMPACT_MIN and self.dead * 2 > len(self.choices):
+            self._compact()
+
+    def _drop(self, id: int):
+        for pos in self.rows.pop(id, ()):
+            self.owners[pos] = -1
+            self.dead += 1
+
+    def _compact(self):
+        live = [(id, [self.choices[pos] for pos in positions]) for id, positions in self.rows.items()]
+        self.__init__()
+        self.update(live)
+
+    def posting(self, gram: str) -> np.ndarray:
+        if (array := self.arrays.get(gram)) is None:
+            array = self.arrays[gram] = np.array(self.grams[gram], dtype=np.int32)
+        return array
+
+    def candidates(self, key: str, limit: int = CANDIDATES) -> List[int]:
+        """ живые позиции с наибольшим числом общих триграмм """
+        postings = [self.posting(gram) for gram in ngrams(key) if gram in self.grams]
+        if not postings:
+            return []
+        hits = np.bincount(np.concatenate(postings))
+        order = np.flatnonzero(hits)
+        if len(order) > limit * 2:
+            order = order[np.argpartition(-hits[order], limit * 2)[:limit * 2]]
+        order = order[np.argsort(-hits[order], kind='stable')]
+        return [pos for pos in order.tolist() if self.owners[pos] >= 0][:limit]
+
+    def match_many(self, queries: Sequence[str], limit: int = 10,
+                   score_cutoff: float = 0) -> List[List[Tuple[int, float]]]:
+        """
+            для каждого запроса - [(id, оценка 0..100), ...] по убыванию оценки, не длиннее limit
+            запросы оцениваются пачками: одна матрица cdist (запросы x объединение их кандидатов) на пачку,
+            пачка ограничена MATRIX_CELLS ячейками; каждый запрос ранжируется только по своим кандидатам
+        """
+        keys = [normalize(query) if query else '' for query in queries]
+        positions = [self.candidates(key) if key else [] for key in keys]
+        result: List[List[Tuple[int, float]]] = [[] for _ in keys]
+        block: List[int] = []
+        columns: Dict[int, int] = {}            # позиция кандидата -> столбец матрицы пачки
+        for n, found in enumerate(positions):
+            if not found:
+                continue
+            added = [pos for pos in found if pos not in columns]
+            if block and (len(block) + 1) * (len(columns) + len(added)) > MATRIX_CELLS:
+                self._score(block, columns, keys, positions, result, limit, score_cutoff)
+                block, columns, added = [], {}, found
+            block.append(n)
+            for pos in added:
+                columns.setdefault(pos, len(columns))
+        if block:
+            self._score(block, columns, keys, positions, result, limit, score_cutoff)
+        return result
+
+    def _score(self, block: List[int], columns: Dict[int, int], keys: List[str], positions: List[List[int]],
+               result: List[List[Tuple[int, float]]], limit: int, score_cutoff: float):
+        matrix = process.cdist([keys[n] for n in block], [self.choices[pos] for pos in columns],
+                               scorer=fuzz.WRatio, score_cutoff=score_cutoff, dtype=np.float32, workers=-1)
+        for line, n in zip(matrix, block):
+            row = line[[columns[pos] for pos in positions[n]]]
+            best: Dict[int, float] = {}
+            for col in np.argsort(-row, kind='stable').tolist():
+                score = float(row[col])
+                if score <= 0 or score < score_cutoff or len(best) >= limit:
+                    break
+                best.setdefault(self.owners[positions[n][col]], round(score, 2))
+            result[n] = list(best.items())
+
+    def match(self, query: str, limit: int = 10, score_cutoff: float = 0) -> List[Tuple[int, float]]:
+        return self.match_many([query], limit, score_cutoff)[0]
@@ -0,0 +1,204 @@
+# app/core/utils/inverted_index.py
+"""
+    инвертированный индекс в памяти процесса
+    токены - app.core.hash_norm.tokenize, ключ posting list - get_cached_hash(токен) (farmhash, int64)
+    posting list: отсортированные int32 id документов + float32 вес BM25 (tf, длина документа)
+    префиксы - через отсортированный словарь токенов (bisect)
+    AND / OR по терминам, ранжирование score desc, id desc (как find_items_smart_page), top-k без полной сортировки
+    изменения применяются пачкой: каждый затронутый posting list пересобирается один раз
+"""
+import math
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.hash_norm import get_cached_hash, tokenize
+
+K1 = 1.2
+B = 0.75
+PREFIX_LIMIT = 256      # макс. кол-во токенов, в которые раскрывается префикс
+
+_EMPTY_IDS = np.empty(0, dtype=np.int32)
+_EMPTY_WEIGHTS = np.empty(0, dtype=np.float32)
+
+
+class InvertedIndex:
+
+    def __init__(self):
+        self.postings: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self.docs: Dict[int, Tuple[Tuple[int, ...], int]] = {}  # id -> (хеши токенов, длина) - для удаления
+        self.tokens: List[str] = []                     # отсортированный словарь токенов (префиксы)
+        self.total_len = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @property
+    def avg_len(self) -> float:
+        return self.total_len / len(self.docs) if self.docs else 1.0
+
+    def _weight(self, tf: int, length: int, avg_len: float) -> float:
+        return tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_len))
+
+    def update(self, changed: Iterable[Tuple[int, Optional[str]]] = (), removed: Iterable[int] = ()):
+        """
+            changed - (id, текст): добавить / заменить документ; текст None или '' - удалить
+            removed - id удаленных документов
+        """
+        drop: Dict[int, set] = {}
+        for doc_id in removed:
+            self._forget(doc_id, drop)
+        keys, doc_ids, tfs, lengths, new_words = [], [], [], [], set()
+        for doc_id, content in dict(changed).items():
+            self._forget(doc_id, drop)
+            words = tokenize(content) if content else []
+            if not words:
+                continue
+            counts = Counter(words)
+            hashes = [get_cached_hash(word) for word in counts]
+            self.docs[doc_id] = (tuple(hashes), len(words))
+            self.total_len += len(words)
+            new_words.update(word for word, key in zip(counts, hashes) if key not in self.postings)
+            keys.extend(hashes)
+            tfs.extend(counts.values())
+            doc_ids.extend([doc_id] * len(hashes))
+            lengths.extend([len(words)] * len(hashes))
+        self._add_tokens(new_words)
+        if keys:
+            # веса BM25 и группировка по токену - векторно, posting list пересобирается один раз
+            keys = np.array(keys, dtype=np.int64)
+            doc_ids = np.array(doc_ids, dtype=np.int32)
+            tf = np.array(tfs, dtype=np.float32)
+            weights = tf * (K1 + 1) / (tf + K1 * (1 - B + B * np.array(lengths, dtype=np.float32) / self.avg_len))
+            order = np.lexsort((doc_ids, keys))
+            keys, doc_ids, weights = keys[order], doc_ids[order], weights[order]
+            bounds = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1], [True])))
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+                key = int(keys[start])
+                self._merge(key, drop.pop(key, ()), doc_ids[start:end], weights[start:end])
+        for key, ids in drop.items():
+            self._merge(key, ids, _EMPTY_IDS, _EMPTY_WEIGHTS)
+
+    def _add_tokens(self, words: set):
+        """ словарь префиксов: несколько слов - вставка, много (первая загрузка) - одна сортировка """
+        if len(words) > 64:
+            self.tokens = sorted(words.union(self.tokens))
+            return
+        for word in words:
+            pos = bisect_left(self.tokens, word)
+            if pos == len(self.tokens) or self.tokens[pos] != word:
+                self.tokens.insert(pos, word)
+
+    def _forget(self, doc_id: int, drop: Dict[int, set]):
+        if (doc := self.docs.pop(doc_id, None)) is None:
+            return
+        keys, length = doc
+        for key in keys:
+            drop.setdefault(key, set()).add(doc_id)
+        self.total_len -= length
+
+    def _merge(self, key: int, drop: Iterable[int], add_ids: np.ndarray, add_weights: np.ndarray):
+        """ posting list без drop + (add_ids, add_weights), add_ids отсортированы """
+        ids, weights = self.postings.get(key, (_EMPTY_IDS, _EMPTY_WEIGHTS))
+        if len(ids) and drop:
+            keep = ~np.isin(ids, np.fromiter(drop, dtype=np.int32))
+            ids, weights = ids[keep], weights[keep]
+        if len(add_ids):
+            if len(ids):
+                ids = np.concatenate((ids, add_ids))
+                weights = np.concatenate((weights, add_weights))
+                order = np.argsort(ids, kind='stable')
+                ids, weights = ids[order], weights[order]
+            else:
+                ids, weights = add_ids, add_weights
+        if len(ids):
+            self.postings[key] = (ids, weights)
+        else:
+            self.postings.pop(key, None)
+
+    def prefix_keys(self, prefix: str) -> List[int]:
+        """ хеши токенов, начинающихся с prefix (не больше PREFIX_LIMIT) """
+        result = []
+        for word in self.tokens[bisect_left(self.tokens, prefix):]:
+            if not word.startswith(prefix) or len(result) >= PREFIX_LIMIT:
+                break
+            if (key := get_cached_hash(word)) in self.postings:
+                result.append(key)
+        return result
+
+    def _term(self, keys: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """ (ids, scores) одного термина; для префикса - максимум по раскрытым токенам """
+        n = len(self.docs)
+        parts = []
+        for key in keys:
+            if (posting := self.postings.get(key)) is None:
+                continue
+            ids, weights = posting
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            parts.append((ids, weights * idf))
+        if not parts:
+            return _EMPTY_IDS, _EMPTY_WEIGHTS
+        if len(parts) == 1:
+            return parts[0]
+        ids = np.concatenate([p[0] for p in parts])
+        scores = np.concatenate([p[1] for p in parts])
+        order = np.lexsort((-scores, ids))
+        ids, scores = ids[order], scores[order]
+        first = np.concatenate(([True], ids[1:] != ids[:-1]))
+        return ids[first], scores[first]
+
+    def match(self, words: List[str], prefix: Optional[str] = None,
+              mode: str = 'and') -> Tuple[np.ndarray, np.ndarray]:
+        """
+            words - законченные слова, prefix - недописанное последнее слово
+            -> (ids, scores), ids отсортированы по возрастанию
+        """
+        terms = [self._term([get_cached_hash(word)]) for word in dict.fromkeys(words)]
+        if prefix:
+            terms.append(self._term(self.prefix_keys(prefix)))
+        if not terms:
+            return _EMPTY_IDS, _EMPTY_WEIGHTS
+        if mode == 'or':
+            ids = np.concatenate([t[0] for t in terms])
+            scores = np.concatenate([t[1] for t in terms])
+            ids, inverse = np.unique(ids, return_inverse=True)
+            return ids, np.bincount(inverse, weights=scores).astype(np.float32)
+        terms.sort(key=lambda t: len(t[0]))     # пересечение - от самого короткого списка
+        ids, scores = terms[0]
+        for t_ids, t_scores in terms[1:]:
+            if not len(ids):
+                break
+            ids, a, b = np.intersect1d(ids, t_ids, assume_unique=True, return_indices=True)
+            scores = scores[a] + t_scores[b]
+        return ids, scores
+
+    def search(self, query: str, limit: int = 20, last_score: Optional[float] = None,
+               last_id: Optional[int] = None, total_needed: Optional[int] = None,
+               mode: str = 'and') -> Tuple[np.ndarray, np.ndarray]:
+        """
+            top-k в порядке score desc, id desc начиная с курсора (last_score, last_id) включительно
+            последнее слово без пробела на конце - префикс (как SearchService.prepare_query)
+            -> (ids, scores) не длиннее total_needed (по умолчанию limit)
+        """
+        words = tokenize(query)
+        prefix = None
+        if words and not query.endswith(' '):
+            prefix = words.pop()
+        ids, scores = self.match(words, prefix, mode)
+        scores = np.round(scores.astype(np.float64), 8)
+        if last_score is not None:
+            ls = round(float(last_score), 8)
+            keep = scores < ls
+            if last_id is not None:
+                keep |= (scores == ls) & (ids <= last_id)
+            ids, scores = ids[keep], scores[keep]
+        k = total_needed or limit
+        if len(ids) > k:
+            # все с score не ниже k-го: при равенстве порядок решает id
+            threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep = scores >= threshold
+            ids, scores = ids[keep], scores[keep]
+        order = np.lexsort((-ids.astype(np.int64), -scores))[:k]
+        return ids[order], scores[order]
@@ -0,0 +1,89 @@
+# app/core/utils/localization_plan.py
+"""
+    план локализации api view: строится один раз на (язык по умолчанию, набор языков)
+    для каждого выходного языка и каждого локализуемого поля заранее известен кортеж
+    ключей-источников в порядке замещения ('title_ru', 'title', 'title_fr', ...)
+    применение - один проход по item без пересортировки языков и сборки имен ключей
+    результат совпадает с alchemy_utils.transform_api_list_view
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from app.core.utils.alchemy_utils import api_mapping
+from app.core.utils.common_utils import camel_to_enum
+
+# базовые имена локализуемых полей -> ключи с языковыми суффиксами
+LOCALIZED = ('title', 'subtitle', 'description', 'recommendation', 'madeof', 'name')
+LANG_KEYS = ("alc", "vol", "title", "subtitle", "description", "region", "recommendation",
+             "madeof", "producer", "type", "varietal", "pairing")
+MAIN_KEYS = ("id", "vol", "image_id", "changed_at", "category", "country")
+
+
+def _first(obj: dict, keys: Tuple[str, ...]) -> str:
+    """ первое непустое значение по ключам в порядке замещения (как get_multilang) """
+    if not obj:
+        return ""
+    for key in keys:
+        if val := obj.get(key):
+            return val
+    return ""
+
+
+class ApiLocalizationPlan:
+    """
+        langs = [(выходной ключ языка, {базовое поле: кортеж ключей}), ...]
+    """
+
+    def __init__(self, def_lang: str, languages: Tuple[str, ...]):
+        self.langs: List[Tuple[str, Dict[str, Tuple[str, ...]]]] = []
+        for n, lang in enumerate(languages):
+            order = (lang, *languages[:n], *languages[n + 1:])
+            keys = {base: tuple(f'{base}{suffix}' for suffix in order) for base in LOCALIZED}
+            self.langs.append((def_lang if lang == '' else lang[1:], keys))
+
+    def apply(self, source: dict, default_image: str) -> dict:
+        d = source.get("drink", {})
+        subcat = d.get("subcategory", {})
+        category, subcat = api_mapping(subcat.get("category", {}), subcat)
+        prod = d.get('producer', {})
+        ptitle = prod.get('producertitle') if prod else None
+        designation = d.get("designation", {})
+        anno = d.get("anno", '') or ""
+        site = d.get("site") or {}
+        subreg = site.get("subregion") or {}
+        reg = subreg.get("region") or {}
+        country = reg.get("country") or {}
+        alc = f"{alcv}" if (alcv := d.get('alc')) else None
+        vol = source.get('vol', None)
+        image = source.get("seaweed_fids") or (None, default_image)
+        varietals = d.get("varietal_associations", [])
+        foods = d.get("food_associations", [])
+
+        main = {key: val for key, val in zip(MAIN_KEYS, (source.get("id"), vol, image[1], source.get("updated_at"),
+                                                         category, camel_to_enum(country.get("name")))) if val}
+        for lng, keys in self.langs:
+            name = keys['name']
+            des = _first(designation, name)
+            title = _first(d, keys['title']).replace(des, "").replace(anno, "")
+            vals = (alc, vol,
+                    f'{title} {anno} {des}'.strip(),
+                    _first(d, keys['subtitle']),
+                    _first(d, keys['description']),
+                    f'{_first(reg, name)}. {_first(subreg, name)}. {_first(site, name)}'.strip(),
+                    _first(d, keys['recommendation']),
+                    _first(d, keys['madeof']),
+                    f'{_first(ptitle, name)} {_first(prod, name)}'.strip() if prod else None,
+                    _first(subcat, name) if subcat else None,
+                    [f"{_first(va.get('varietal', {}), name)} {va.get('percentage', 0)} %" for va in varietals],
+                    [_first(fa.get("food", {}), name) for fa in foods])
+            main[lng] = {key: val for key, val in zip(LANG_KEYS, vals) if val}
+        return main
+
+    def apply_many(self, rows: Iterable[dict], default_image: str) -> List[dict]:
+        apply = self.apply
+        return [apply(row, default_image) for row in rows]
+
+
+@lru_cache(maxsize=32)
+def get_api_plan(def_lang: str, languages: Tuple[str, ...]) -> ApiLocalizationPlan:
+    return ApiLocalizationPlan(def_lang, tuple(languages))
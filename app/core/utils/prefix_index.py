@@ -0,0 +1,70 @@
+# app/core/utils/prefix_index.py
+"""
+    префиксный поиск в памяти процесса: отсортированный массив (нормализованное имя, id)
+    нормализация как public.immutable_unaccent(lower(...)): без диакритики, casefold
+    у записи может быть несколько имен (name, name_ru, name_fr, ...) - id в выдаче один раз
+    поиск - bisect, изменения: несколько записей - вставка/удаление, много - пересортировка
+"""
+import unicodedata
+from bisect import bisect_left, insort
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# буквы, которые unaccent раскрывает, а NFKD - нет
+_LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae', 'ø': 'o', 'ł': 'l', 'đ': 'd', 'ı': 'i'})
+REBUILD_THRESHOLD = 64      # больше измененных записей - пересортировка целиком
+
+
+@lru_cache(maxsize=65536)
+def normalize(value: str) -> str:
+    value = unicodedata.normalize('NFKD', value.strip().casefold())
+    return ''.join(ch for ch in value if not unicodedata.combining(ch)).translate(_LIGATURES)
+
+
+class PrefixIndex:
+
+    def __init__(self):
+        self.entries: List[Tuple[str, int]] = []       # отсортировано по (имя, id)
+        self.keys: Dict[int, Tuple[str, ...]] = {}      # id -> нормализованные имена (для удаления)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def update(self, changed: Iterable[Tuple[int, Iterable[Optional[str]]]] = (), removed: Iterable[int] = ()):
+        """
+            changed - (id, имена): добавить / заменить запись; пустые имена пропускаются
+            removed - id удаленных записей
+        """
+        old: List[Tuple[str, int]] = []
+        new: List[Tuple[str, int]] = []
+        for id in removed:
+            old.extend((key, id) for key in self.keys.pop(id, ()))
+        for id, names in changed:
+            old.extend((key, id) for key in self.keys.pop(id, ()))
+            keys = tuple(dict.fromkeys(key for name in names if name and (key := normalize(name))))
+            if keys:
+                self.keys[id] = keys
+                new.extend((key, id) for key in keys)
+        if len(old) + len(new) > REBUILD_THRESHOLD:
+            drop = set(old)
+            self.entries = sorted([e for e in self.entries if e not in drop] + new)
+            return
+        for entry in old:
+            pos = bisect_left(self.entries, entry)
+            if pos < len(self.entries) and self.entries[pos] == entry:
+                del self.entries[pos]
+        for entry in new:
+            insort(self.entries, entry)
+
+    def startswith(self, prefix: str, limit: Optional[int] = 20) -> List[int]:
+        """ id записей, у которых хотя бы одно имя начинается с prefix (по алфавиту имени) """
+        prefix = normalize(prefix)
+        result: Dict[int, None] = {}
+        entries = self.entries
+        pos = bisect_left(entries, (prefix,))
+        while pos < len(entries) and entries[pos][0].startswith(prefix):
+            if limit and len(result) >= limit:
+                break
+            result[entries[pos][1]] = None
+            pos += 1
+        return list(result)
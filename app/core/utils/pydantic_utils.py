@@ -13,6 +13,7 @@ from fastapi.routing import APIRoute
 from fastapi import Response, HTTPException
 import orjson
 from app.service_registry import get_service as get_serv, get_repo as get_rep, get_pyschema as get_pyschem
+from app.core.models.serializer import serialize_list
 from app.core.types import ModelType
 
 
@@ -44,7 +45,7 @@ def list_dict(instances: List[ModelType], skip_empty: bool = True) -> List[dict]
     try:
         if not instances:
             raise HTTPException(status_code=404, detail="records not found")
-        return [instance.to_dict_fast(skip_empty=skip_empty) for instance in instances]
+        return serialize_list(instances, skip_empty=skip_empty)
     except Exception as e:
         raise HTTPException(status_code=505, detail=f"fault in conversion list of instances to dict: {e}")
 
@@ -193,15 +194,33 @@ def make_paginated_response(items: List[Any], total: int,
     """
         make paginated response based of PaginatedResponse & Read Schema
         see app.core.schemas.base.PaginatedResponse
+        total_mode - каким способом получен total (exact | cached | estimated),
+        берется из total (app.core.repositories.count_provider.Total)
         :return:  Dict[str, Any]
     """
-    return {"items": items if total > 0 else [],
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "has_next": (page - 1) * page_size + len(items) < total if total > 0 else False,
-            "has_prev": page > 1
-            }
+    result = {"items": items if total > 0 else [],
+              "total": int(total),
+              "page": page,
+              "page_size": page_size,
+              "has_next": (page - 1) * page_size + len(items) < total if total > 0 else False,
+              "has_prev": page > 1
+              }
+    if total_mode := getattr(total, 'mode', None):
+        result['total_mode'] = total_mode
+    return result
+
+
+def make_cursor_response(items: List[Any], total: int, page_size: int,
+                         has_next: bool, has_prev: bool,
+                         next_cursor: Optional[str], prev_cursor: Optional[str]) -> Dict[str, Any]:
+    """
+        ответ keyset пагинации в формате PaginatedResponse (page = None)
+        + next_cursor / prev_cursor
+    """
+    result = make_paginated_response(items, total, 1, page_size)
+    result.update({"page": None, "has_next": has_next, "has_prev": has_prev,
+                   "next_cursor": next_cursor, "prev_cursor": prev_cursor})
+    return result
 
 
 class PyUtils:
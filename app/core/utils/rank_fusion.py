@@ -0,0 +1,19 @@
+# app/core/utils/rank_fusion.py
+"""
+    reciprocal rank fusion: объединение ранжированных списков id разных поисковых движков
+    score(id) = sum(weight / (k + место в списке)), место с 1; при равенстве - id desc
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, Sequence[int]], k: int = RRF_K,
+                           weights: Optional[Dict[str, float]] = None) -> List[Tuple[int, float]]:
+    """ {движок: [id, ...] по убыванию релевантности} -> [(id, score), ...] по убыванию score """
+    scores: Dict[int, float] = {}
+    for name, ids in rankings.items():
+        weight = (weights or {}).get(name, 1.0)
+        for rank, id in enumerate(dict.fromkeys(ids), start=1):
+            scores[id] = scores.get(id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda pair: (-pair[1], -pair[0]))
@@ -2,8 +2,9 @@
 from __future__ import annotations
 from array import array
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Any, TYPE_CHECKING, Type
+from typing import Any, Iterable, List, Tuple, TYPE_CHECKING, Type
 from app.core.hash_norm import get_hashes_for_item
+from app.core.utils.fts_tokenizer import tokenized_string
 
 
 if TYPE_CHECKING:
@@ -111,6 +112,21 @@ def extract_text_ultra_fast(data: Any, skip_keys: set = None) -> str:
     return ' '.join(result)
 
 
+def search_content_batch(rows: Iterable[Tuple[int, dict]], skip_keys: set = None) -> List[Tuple[int, str]]:
+    """
+        [(item_id, drink_dict), ...] -> [(item_id, search_content), ...]
+        модульная функция без состояния - выполняется в процессах ProcessPoolExecutor (ReindexPipeline)
+    """
+    result = []
+    for item_id, drink_dict in rows:
+        try:
+            content = tokenized_string(extract_text_optimized(drink_dict, skip_keys))
+        except Exception:
+            content = ''
+        result.append((item_id, content))
+    return result
+
+
 async def reindex_items(instance: Item,
                         model: Type[Drink],
                         repository: DrinkRepository,
@@ -0,0 +1,64 @@
+# app/core/utils/stream_utils.py
+"""
+    потоковая выдача больших списков: пачки словарей -> orjson -> NDJSON или JSON массив по частям
+    сессия открывается внутри генератора ответа (сессия из Depends(get_db) закрывается до отправки тела)
+    память на сервере ~ одна пачка независимо от размера выдачи
+"""
+from typing import AsyncIterator, Callable, List, Optional
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.database.db_async import DatabaseManager
+
+STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'json': 'application/json'}
+
+BatchSource = Callable[[AsyncSession], AsyncIterator[List[dict]]]
+
+
+async def encode_batches(batches: AsyncIterator[List[dict]], fmt: str) -> AsyncIterator[bytes]:
+    """ ndjson: одна запись - одна строка; json: '[' + пачки через ',' + ']' """
+    if fmt == 'ndjson':
+        async for batch in batches:
+            if batch:
+                yield b'\n'.join(map(orjson.dumps, batch)) + b'\n'
+        return
+    first = True
+    yield b'['
+    async for batch in batches:
+        if batch:
+            chunk = orjson.dumps(batch)[1:-1]
+            yield chunk if first else b',' + chunk
+            first = False
+    yield b']'
+
+
+async def _session_batches(source: BatchSource) -> AsyncIterator[List[dict]]:
+    async with DatabaseManager.session_maker() as session:
+        try:
+            async for batch in source(session):
+                yield batch
+        except Exception as e:
+            # заголовки уже отправлены - остается только оборвать поток
+            logger.error(f'stream_response.error: {e}')
+            raise
+
+
+def stream_format(stream: Optional[str]) -> Optional[str]:
+    """ проверка query параметра stream; None - обычный (не потоковый) ответ """
+    if not stream:
+        return None
+    if stream not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f'stream: допустимо {", ".join(STREAM_FORMATS)}')
+    return stream
+
+
+def stream_response(source: BatchSource, fmt: str) -> StreamingResponse:
+    """
+        source(session) -> async iterator пачек словарей
+        см. Repository.stream, Service.stream_all / stream_full, ApiService.stream_list_api_view
+    """
+    return StreamingResponse(encode_batches(_session_batches(source), fmt), media_type=STREAM_FORMATS[fmt])
@@ -0,0 +1,13 @@
+# app/job_handlers.py
+"""
+    регистрация обработчиков фоновых задач (модули с JobRunner.register) -> очередь arq:
+        search_reindex, merging     db-maintenance
+        mongo_to_seaweed            cpu-images
+        translation_benchmark       llm
+        parse_names                 crawl
+    импортируется процессом API (main) и arq-воркерами (jobs_arq_worker) - набор задач одинаковый
+"""
+import app.support  # noqa: F401 модели и репозитории: search_reindex, mongo_to_seaweed
+from app.support.gemma import service as gemma_service  # noqa: F401 translation_benchmark
+from app.support.merging import service as merging_service  # noqa: F401 merging
+from app.support.parser import orchestrator  # noqa: F401 parse_names
@@ -0,0 +1,90 @@
+# app/jobs_arq_worker.py
+"""
+    arq-воркеры фоновых задач JobRunner (settings.ARQ_JOBS): процесс на очередь settings.ARQ_QUEUES
+        arq app.jobs_arq_worker.CpuImagesWorker         перенос и обработка изображений (rembg)
+        arq app.jobs_arq_worker.LlmWorker               перевод / бенчмарк моделей
+        arq app.jobs_arq_worker.DbMaintenanceWorker     переиндексация, слияние
+        arq app.jobs_arq_worker.CrawlWorker             парсинг
+    max_jobs - одновременных задач воркера, nice - приоритет процесса, timeout - предел задачи, сек
+    arq передает только id строки jobs: параметры, checkpoint, прогресс и отмена - в jobs (/jobs),
+    результат arq не хранится (keep_result=0) - id job-{id} сразу свободен для повторной постановки
+"""
+import os
+from types import SimpleNamespace
+
+from arq.connections import RedisSettings
+from arq.worker import func
+from loguru import logger
+
+from app import job_handlers  # noqa: F401 регистрация задач
+from app.core.config.database.click_async import ClickHouseManager
+from app.core.config.database.db_async import DatabaseManager
+from app.core.config.database.db_mongo import MongoDBManager
+from app.core.config.database.seaweed_async import close_seaweed, init_seaweed
+from app.core.config.project_config import settings
+from app.core.repositories.clickhouse_repository import ClickHouseRepositoryFactory
+from app.core.services.job_service import JobRunner
+
+
+async def run_job(ctx, id: int):
+    """ -> итоговый статус задачи (None - отменена до старта или уже выполняется другим воркером) """
+    return await JobRunner.execute(id)
+
+
+async def connect() -> SimpleNamespace:
+    """ ресурсы обработчиков (как в lifespan API): недоступный сервис нужен не всем очередям - только лог """
+    DatabaseManager.__init__()
+    state = SimpleNamespace()
+    try:
+        await MongoDBManager.connect()
+    except Exception as e:
+        logger.warning(f'worker: MongoDB недоступна: {e}')
+    try:
+        state.ch_manager = ClickHouseManager()
+        await state.ch_manager.connect()
+        state.ch_client = state.ch_manager.client
+        state.ch_repo_factory = ClickHouseRepositoryFactory(state.ch_manager.client)
+    except Exception as e:
+        logger.warning(f'worker: ClickHouse недоступен: {e}')
+    try:
+        await init_seaweed(master_url="http://seaweedfs_master:9333")
+    except Exception as e:
+        logger.warning(f'worker: Seaweed недоступен: {e}')
+    return state
+
+
+def worker_settings(queue: str) -> type:
+    config = settings.ARQ_QUEUES[queue]
+
+    async def startup(ctx):
+        if config['nice'] > 0:
+            os.nice(config['nice'])
+        JobRunner.state = ctx['state'] = await connect()
+        logger.info(f'worker {queue}: max_jobs {config["max_jobs"]}, nice {config["nice"]}')
+
+    async def shutdown(ctx):
+        await JobRunner.shutdown()
+        if (ch_manager := getattr(ctx.get('state'), 'ch_manager', None)) is not None:
+            await ch_manager.close()
+        await MongoDBManager.disconnect()
+        await close_seaweed()
+        await DatabaseManager.close()
+
+    name = ''.join(part.capitalize() for part in queue.split('-'))
+    return type(f'{name}Worker', (), {
+        'functions': [func(run_job, name='run_job', timeout=config['timeout'])],
+        'queue_name': queue,
+        'max_jobs': config['max_jobs'],
+        'job_timeout': config['timeout'],
+        'max_tries': settings.ARQ_MAX_TRIES,
+        'keep_result': 0,
+        'redis_settings': RedisSettings(host=settings.REDIS_HOST, port=settings.REDIS_PORT),
+        'on_startup': startup,
+        'on_shutdown': shutdown,
+    })
+
+
+CpuImagesWorker = worker_settings('cpu-images')
+LlmWorker = worker_settings('llm')
+DbMaintenanceWorker = worker_settings('db-maintenance')
+CrawlWorker = worker_settings('crawl')
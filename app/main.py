@@ -2,7 +2,6 @@
 # import httpx
 import asyncio
 
-# from app.events import event, pg_listen_worker  # noqa: F401
 from contextlib import asynccontextmanager
 from typing import List, Optional
 
@@ -15,7 +14,7 @@ from loguru import logger
 import sys
 from time import perf_counter
 from app.auth.routers import auth_router, user_router
-# from app.core.config.project_config import settings
+from app.core.config.project_config import settings
 from app.core.exceptions import AppBaseException
 from app.core.config.database.db_async import DatabaseManager, init_db_extensions
 # from app.core.config.database.ollama_async import get_ollama_manager
@@ -29,6 +28,8 @@ from app.preact.read.router import ReadRouter
 from app.preact.delete.router import DeleteRouter
 from app.preact.handbook.router import HandbookRouter
 from app.preact.handbook_page.router import HandbookRouterPage
+from app.preact.handbook_bundle.router import HandbookBundleRouter
+from app.preact.handbook_autocomplete.router import HandbookAutocompleteRouter
 from app.preact.patch.router import PatchRouter
 from app.support.api.router import ApiRouter
 # from app.support.clickhouse.service import EmbeddingService
@@ -62,8 +63,16 @@ from app.core.config.database.click_async import ClickHouseManager, get_dump  #
 from app.core.config.database.seaweed_async import init_seaweed, close_seaweed
 from app.support.seaweeds.router import SeaweedsRouter
 from app.core.repositories.clickhouse_repository import ClickHouseRepositoryFactory
+from app.core.services.click_service import FullTextSearch
+from app.core.services.job_service import JobRunner
+from app import job_handlers  # noqa: F401 регистрация фоновых задач
 from app.support.merging.router import MergingRouter
+from app.support.job.router import JobRouter
 from app.support.item.router_item_image import ItemImageRouter
+from app.support.item import list_view as item_list_view
+from app.support.item import change_feed
+from app.events import pg_listen_worker
+from app.support.item.search_index import ItemSearchIndex
 from app.support.clickhouse.router import ClickImportRouter
 
 logger.info('start initialisation')
@@ -81,13 +90,30 @@ async def lifespan(app: FastAPI):
 
     try:
         await DatabaseManager.check_connection()
-        logger.success(f"Lifespan: PostgreSQL соединение установлено (OK) {DatabaseManager.connection_string}")
+        logger.success(f"Lifespan: PostgreSQL соединение установлено (OK, пул {DatabaseManager.pool_mode}) "
+                       f"{DatabaseManager.connection_string}")
     except Exception as e:
         logger.critical(
             f"Lifespan: ОШИБКА ПОДКЛЮЧЕНИЯ К БД: {e}, {DatabaseManager.connection_string=}"
         )  # Если БД не отвечает, часто нет смысла запускать приложение  # raise e
     await init_db_extensions()
     logger.success("расширения Postgresql установлены")
+    try:
+        await item_list_view.install()
+        logger.success("Lifespan: item_list_view и триггеры установлены")
+    except Exception as e:
+        logger.error(f"Lifespan: item_list_view не установлен: {e}")
+    if settings.CHANGE_FEED:
+        # search_content: триггеры NOTIFY + слушатель, пересчет только затронутых items
+        try:
+            await change_feed.install()
+            app.state.change_feed_task = asyncio.create_task(pg_listen_worker())
+            logger.success("Lifespan: change feed search_content запущен")
+        except Exception as e:
+            logger.error(f"Lifespan: change feed не запущен: {e}")
+    if settings.SMART_SEARCH_BACKEND == 'memory':
+        # поиск в памяти: индекс строится в фоне, до готовности запросы ждут первой загрузки
+        app.state.search_index_task = asyncio.create_task(ItemSearchIndex.warm_up())
     await MongoDBManager.connect()  # Подключаем Mongo
     logger.success("Lifespan: соединение с MongoDB установлены")
     # await init_db_extensions()  # подключение расщирений Postgresql
@@ -100,6 +126,8 @@ async def lifespan(app: FastAPI):
     app.state.ch_client = ch_manager.client
     app.state.ch_repo_factory = ClickHouseRepositoryFactory(ch_manager.client)
     app.state.seaweed_fids_default = await get_dump(app.state.ch_client)
+    # полнотекстовый поиск: колонка версии и skip index items_search - один раз при старте
+    await FullTextSearch.prepare(app.state.ch_client, 'items_search')
     logger.success(f'заглушка для изображний инициализирована {app.state.seaweed_fids_default}')
     # app.state.ch_client = await ch_manager.connect()
     #  app.state.ch_client = global_ch_manager.client
@@ -110,6 +138,12 @@ async def lifespan(app: FastAPI):
     # global _embedding_service
     # _embedding_service = EmbeddingService()
     # logger.success("✅ Query model loaded (Static, CPU, 50MB)")
+    try:
+        # фоновые задачи: таблица jobs, продолжение прерванных с checkpoint (ресурсы выше уже подключены)
+        await JobRunner.start(app.state)
+        logger.success("Lifespan: JobRunner запущен")
+    except Exception as e:
+        logger.error(f"Lifespan: JobRunner не запущен: {e}")
     yield
 
     # --- SHUTDOWN ---
@@ -120,6 +154,9 @@ async def lifespan(app: FastAPI):
     #     await listen_task
     # except asyncio.CancelledError:
     #     pass
+    if (task := getattr(app.state, 'change_feed_task', None)) is not None:
+        task.cancel()
+    await JobRunner.shutdown()
     await DatabaseManager.engine.dispose()
     await MongoDBManager.disconnect()
     await ch_manager.close()
@@ -200,6 +237,8 @@ app.include_router(SeaweedsRouter().router)
 app.include_router(MongoRouter)
 app.include_router(HandbookRouter().router)
 app.include_router(HandbookRouterPage().router)
+app.include_router(HandbookBundleRouter().router)
+app.include_router(HandbookAutocompleteRouter().router)
 app.include_router(CreateRouter().router)
 app.include_router(GetRouter().router)
 app.include_router(ReadRouter().router)
@@ -235,6 +274,7 @@ app.include_router(RawdataRouter().router)
 app.include_router(RegistryRouter().router)
 app.include_router(OrchestratorRouter().router)
 app.include_router(MergingRouter().router)
+app.include_router(JobRouter().router)
 app.include_router(ClickImportRouter().router)
 # app.include_router(CustomerRouter().router)
 # app.include_router(WarehouseRouter().router)
@@ -21,7 +21,7 @@ from app.support.customer.model import Customer
 from app.support.warehouse.model import Warehouse
 from app.support.food.model import Food
 from app.support.superfood.model import Superfood
-from app.support.item.model import Item
+from app.support.item.model import Item, ItemListRow
 from app.support.region.model import Region
 from app.support.sweetness.model import Sweetness
 from app.auth.models import User
@@ -36,6 +36,7 @@ from app.support.lwin.model import Lwin
 from app.support import Source
 from app.support.producer.model import Producer, ProducerTitle
 from app.support.parcel.model import Site, Parcel
+from app.core.models.job_model import Job
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,100 @@
+# app/preact/core/handbook_cache.py
+"""
+    кеш справочников для HandbookRouter / HandbookRouterPage
+    ключ - (справочник, язык, ...), значение - готовые orjson bytes + ETag
+    запись действительна пока не изменились версии таблиц справочника и его родителей
+    (TableVersion увеличивается после commit записи) и не истек TTL
+    ETag - хеш содержимого: одинаков во всех процессах, клиент с If-None-Match получает 304
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, NamedTuple, Tuple
+
+import orjson
+from fastapi import Request, Response
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.project_config import settings
+from app.core.repositories.table_version import TableVersion
+from app.core.types import ModelType
+from app.core.utils.pydantic_utils import get_repo, get_service
+
+
+class CacheEntry(NamedTuple):
+    versions: Tuple[int, ...]
+    created: float
+    content: bytes
+    etag: str
+
+
+def _models(model: ModelType, seen: tuple = ()) -> Tuple[ModelType, ...]:
+    """ модель справочника + все ее родители (many-to-one) - от них зависит name в выдаче """
+    seen = seen + (model,)
+    result = [model]
+    for rel in inspect(model).relationships:
+        if not rel.uselist and rel.mapper.class_ not in seen:
+            result.extend(_models(rel.mapper.class_, seen))
+    return tuple(dict.fromkeys(result))
+
+
+class HandbookCache:
+    _entries: 'OrderedDict[tuple, CacheEntry]' = OrderedDict()
+    _models: Dict[ModelType, Tuple[ModelType, ...]] = {}
+
+    @classmethod
+    def models(cls, model: ModelType) -> Tuple[ModelType, ...]:
+        if (models := cls._models.get(model)) is None:
+            models = cls._models[model] = _models(model)
+        return models
+
+    @classmethod
+    def tables(cls, model: ModelType) -> Tuple[str, ...]:
+        return tuple(m.__tablename__ for m in cls.models(model))
+
+    @classmethod
+    def clear(cls):
+        cls._entries.clear()
+
+    @classmethod
+    async def get(cls, key: tuple, model: ModelType, loader: Callable[[], Awaitable[bytes]]) -> CacheEntry:
+        """ запись из кеша или loader() -> bytes (запрос в БД + orjson.dumps) """
+        versions = TableVersion.snapshot(cls.tables(model))
+        entry = cls._entries.get(key)
+        if entry and entry.versions == versions and time.monotonic() - entry.created < settings.HANDBOOK_CACHE_TTL:
+            cls._entries.move_to_end(key)
+            return entry
+        content = await loader()
+        entry = CacheEntry(versions, time.monotonic(), content,
+                           f'"{hashlib.blake2b(content, digest_size=8).hexdigest()}"')
+        cls._entries[key] = entry
+        cls._entries.move_to_end(key)
+        while len(cls._entries) > settings.HANDBOOK_CACHE_SIZE:
+            cls._entries.popitem(last=False)
+        return entry
+
+    @classmethod
+    async def list_view(cls, request: Request, name: str, lang: str, model: ModelType,
+                        session: AsyncSession) -> CacheEntry:
+        """ полный справочник (как /handbooks/{name}/{lang}) через кеш """
+        async def loader() -> bytes:
+            service = get_service(model)
+            rows = await service.get_list_view(request, lang, get_repo(model), model, session)
+            return orjson.dumps(rows)
+        return await cls.get((name, lang), model, loader)
+
+    @staticmethod
+    def not_modified(request: Request, etag: str) -> bool:
+        if not (header := request.headers.get('if-none-match')):
+            return False
+        tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+        return etag in tags or '*' in tags
+
+    @classmethod
+    def response(cls, request: Request, entry: CacheEntry) -> Response:
+        """ 200 с телом или 304 без тела; no-cache - браузер всегда перепроверяет по ETag """
+        headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+        if cls.not_modified(request, entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.content, media_type="application/json", headers=headers)
@@ -4,9 +4,9 @@
     выводит только словари  id: name
     по языкам
 """
-import orjson
-from fastapi import Request, Depends, Response
+from fastapi import Request, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.preact.core.handbook_cache import HandbookCache
 from app.preact.core.router import PreactRouter
 from app.core.config.database.db_async import get_db
 from typing import List
@@ -30,10 +30,6 @@ class HandbookRouter(PreactRouter):
         pref, lang = self.__path_decoder__(current_path)
         model = self.source.get(pref)
         # lang = self.get_lang_prefix(lang)  # convert lang to lang pref 'en' -> '', 'ru' -> '_ru' ...
-        repo = self.get_repo(model)
-        service = self.get_service(model)
-        # print(f'{route.response_model=}, {repo=}')
-        rows = await service.get_list_view(request, lang, repo, model, session)
-        content = orjson.dumps(rows)
-        return Response(content=content, media_type="application/json")
+        entry = await HandbookCache.list_view(request, pref, lang, model, session)
+        return HandbookCache.response(request, entry)
         # return rows
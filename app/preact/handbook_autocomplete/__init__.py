@@ -0,0 +1 @@
+# app/preact/handbook_autocomplete/__init__.py
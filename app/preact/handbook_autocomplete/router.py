@@ -0,0 +1,33 @@
+# app/preact/handbook_autocomplete/router.py
+"""
+    роутер автодополнения справочников из памяти процесса
+    GET /handbooks_autocomplete/{name}/{lang}?q=<начало имени на любом языке>&limit=20
+    выдает [{'id': .., 'name': ..}, ...] вместо LIKE по unaccent на каждое нажатие клавиши
+    &fuzzy=true - с опечатками (FuzzyMatchService): [{'id': .., 'name': .., 'score': ..}, ...]
+"""
+import orjson
+from fastapi import Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.database.db_async import get_db
+from app.core.services.autocomplete_service import HandbookAutocomplete
+from app.core.services.fuzzy_service import FuzzyMatchService
+from app.preact.core.router import PreactRouter
+
+
+class HandbookAutocompleteRouter(PreactRouter):
+    def __init__(self):
+        super().__init__(prefix='handbooks_autocomplete', method='GET', tier=2)
+
+    def __source_generator__(self, source: dict):
+        return ((f'/{key}' + '/{lang}', None, None) for key in source)
+
+    async def endpoint(self, request: Request, lang: str,
+                       q: str = Query('', description='начало имени'),
+                       limit: int = Query(20, ge=1, le=100, description='макс. кол-во вариантов'),
+                       fuzzy: bool = Query(False, description='с опечатками'),
+                       session: AsyncSession = Depends(get_db)):
+        pref, lang = self.__path_decoder__(request.url.path)
+        service = FuzzyMatchService if fuzzy else HandbookAutocomplete
+        rows = await service.lookup(self.source.get(pref), q, lang, session, limit)
+        return Response(content=orjson.dumps(rows), media_type="application/json")
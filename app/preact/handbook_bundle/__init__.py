@@ -0,0 +1 @@
+# app/preact/handbook_bundle/__init__.py
@@ -0,0 +1,36 @@
+# app/preact/handbook_bundle/router.py
+"""
+    роутер пакетной выдачи справочников
+    один запрос вместо 17 /handbooks/{name}/{lang}
+    GET /handbooks_bundle/{lang}?names=regions,countries&since=<version из предыдущего ответа>
+"""
+from fastapi import Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.database.db_async import get_db
+from app.preact.core.router import PreactRouter
+from app.preact.handbook_bundle.service import HandbookBundleService
+
+
+class HandbookBundleRouter(PreactRouter):
+    def __init__(self):
+        super().__init__(prefix='handbooks_bundle', method='GET', tier=1)
+
+    def _setup_routes_(self):
+        self.router.add_api_route('/{lang}', endpoint=self.endpoint, methods=[self.method],
+                                  openapi_extra={'x-request-schema': None})
+
+    async def endpoint(self, request: Request, lang: str,
+                       names: str = Query(None, description='справочники через запятую (по умолчанию все)'),
+                       since: str = Query(None, description='version из предыдущего ответа: '
+                                                            'выдаются только изменения'),
+                       session: AsyncSession = Depends(get_db)):
+        if names:
+            keys = [key for a in names.split(',') if (key := a.strip())]
+            if unknown := [key for key in keys if key not in self.source]:
+                raise HTTPException(status_code=400, detail=f'unknown handbooks: {", ".join(unknown)}')
+            source = {key: self.source[key] for key in keys}
+        else:
+            source = self.source
+        content = await HandbookBundleService.bundle(request, source, lang, since, session)
+        return Response(content=content, media_type="application/json")
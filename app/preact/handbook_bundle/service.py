@@ -0,0 +1,101 @@
+# app/preact/handbook_bundle/service.py
+"""
+    пакетная выдача справочников с дельта-синхронизацией
+    версия справочника: [max(updated_at), count(*)] своей таблицы + max(updated_at) таблиц-родителей
+    (имя в list view - цепочка имен родителей, см. flatten_dict_with_localized_fields)
+    по версии клиента:
+        версия не изменилась                -> справочник не выдается
+        изменились только записи справочника -> delta: записи с updated_at > версии клиента
+        удаления / изменение родителей       -> full (из HandbookCache)
+"""
+import base64
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.project_config import settings
+from app.core.exceptions import AppBaseException
+from app.core.types import ModelType
+from app.core.utils.common_utils import flatten_dict_with_localized_fields
+from app.core.utils.pydantic_utils import get_repo
+from app.preact.core.handbook_cache import HandbookCache
+
+Version = List   # [updated_at iso | None, count, updated_at родителей iso | None]
+
+
+def encode_versions(lang: str, versions: Dict[str, Version]) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps({'lang': lang, 'v': versions})).decode().rstrip('=')
+
+
+def decode_versions(token: Optional[str], lang: str) -> Dict[str, Version]:
+    """ версии из предыдущего ответа; токен другого языка - как будто его нет """
+    if not token:
+        return {}
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return data['v'] if data['lang'] == lang else {}
+    except Exception:
+        raise AppBaseException(message='invalid handbooks version', status_code=400)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class HandbookBundleService:
+
+    @staticmethod
+    async def table_stats(models: List[ModelType],
+                          session: AsyncSession) -> Dict[str, Tuple[Optional[datetime], int]]:
+        """ {таблица: (max(updated_at), count(*))} одним запросом UNION ALL """
+        stmt = union_all(*(select(literal(model.__tablename__), func.max(model.updated_at), func.count())
+                           .select_from(model) for model in models))
+        return {name: (ts, n) for name, ts, n in (await session.execute(stmt)).all()}
+
+    @classmethod
+    def version(cls, model: ModelType, stats: dict) -> Version:
+        own, *parents = HandbookCache.tables(model)
+        ts, count = stats[own]
+        parent_ts = max((stats[p][0] for p in parents if stats[p][0]), default=None)
+        return [_iso(ts), count, _iso(parent_ts)]
+
+    @classmethod
+    async def delta(cls, model: ModelType, old: Version, new: Version, lang: str,
+                    session: AsyncSession) -> Optional[list]:
+        """ измененные записи или None, если нужна полная выдача """
+        if not old[0] or old[2] != new[2]:
+            return None
+        since = datetime.fromisoformat(old[0]) - timedelta(seconds=settings.HANDBOOK_DELTA_OVERLAP)
+        created = await session.scalar(select(func.count()).select_from(model).where(model.created_at > since))
+        # без удалений: сейчас = было + созданные после since (иначе - удаления или перекрытие окна)
+        if new[1] != old[1] + created:
+            return None
+        rows = await get_repo(model).get_list_rows(model, session, since)
+        return [flatten_dict_with_localized_fields(row, ['name'], lang) for row in rows]
+
+    @classmethod
+    async def bundle(cls, request: Request, source: Dict[str, ModelType], lang: str, since: Optional[str],
+                     session: AsyncSession) -> bytes:
+        """
+            {'version': токен для следующего запроса,
+             'handbooks': {name: {'mode': 'full' | 'delta', 'items': [...]}, ...}}
+        """
+        client = decode_versions(since, lang)
+        needed = {m for model in source.values() for m in HandbookCache.models(model)}
+        stats = await cls.table_stats(sorted(needed, key=lambda m: m.__tablename__), session)
+        versions, handbooks = {}, {}
+        for name, model in source.items():
+            new = versions[name] = cls.version(model, stats)
+            old = client.get(name)
+            if old == new:
+                continue
+            if old and (items := await cls.delta(model, old, new, lang, session)) is not None:
+                handbooks[name] = {'mode': 'delta', 'items': items}
+            else:
+                entry = await HandbookCache.list_view(request, name, lang, model, session)
+                handbooks[name] = {'mode': 'full', 'items': orjson.Fragment(entry.content)}
+        return orjson.dumps({'version': encode_versions(lang, versions), 'handbooks': handbooks})
@@ -7,6 +7,7 @@
 import orjson
 from fastapi import Request, Depends, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.preact.core.handbook_cache import HandbookCache
 from app.preact.core.router import PreactRouter
 from app.core.config.database.db_async import get_db
 from typing import List
@@ -37,7 +38,12 @@ class HandbookRouterPage(PreactRouter):
         repo = self.get_repo(model)
         service = self.get_service(model)
         # print(f'{route.response_model=}, {repo=}')
-        rows = await service.get_list_view_page(search, page, page_size, repo, model, session, lang)
-        content = orjson.dumps(rows)
-        return Response(content=content, media_type="application/json")
+
+        async def loader() -> bytes:
+            rows = await service.get_list_view_page(search, page, page_size, repo, model, session, lang)
+            return orjson.dumps(rows)
+        if search:  # поисковые запросы не кешируются
+            return Response(content=await loader(), media_type="application/json")
+        entry = await HandbookCache.get((pref, lang, page, page_size), model, loader)
+        return HandbookCache.response(request, entry)
         # return rows
@@ -2,7 +2,7 @@
 from fastapi import HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 from dateutil.relativedelta import relativedelta
 from fastapi import Depends, Query
 from app.auth.dependencies import get_current_api_user
@@ -12,6 +12,7 @@ from app.core.schemas.base import PaginatedResponse
 # from app.core.services.seaweed_service import SeaweedsService
 # from app.core.utils.io_utils import ResponseStreaming
 from app.core.utils.pydantic_utils import orresponse
+from app.core.utils.stream_utils import stream_format, stream_response
 # from app.mongodb import router as mongorouter
 from app.core.config.database.db_async import get_db
 from app.core.utils.common_utils import back_to_the_future, delta_data
@@ -119,11 +120,17 @@ class ApiRouter(ItemRouter):
                       after_date: datetime = Query((datetime.now(timezone.utc) - relativedelta(years=2)).isoformat(),
                                                    description="Дата в формате ISO 8601 (например, 2024-01-01T00:00:00Z)"),
                       session: AsyncSession = Depends(get_db),
-                      limit: int = 20):
+                      limit: int = 20,
+                      stream: Optional[str] = Query(None, description="потоковая выдача: ndjson | json "
+                                                                      "(limit=0 - без лимита)")):
         """
             Получение всех записей одним списком после указанной даты.
-            Может быть очень тяжелым запросом
+            Может быть очень тяжелым запросом - для больших выгрузок stream=ndjson|json
         """
+        if fmt := stream_format(stream):
+            after_date = back_to_the_future(after_date)
+            return stream_response(lambda db: ApiService.stream_list_api_view(request, after_date, ItemRepository,
+                                                                              db, limit), fmt)
         try:
             after_date = back_to_the_future(after_date)
             service = ApiService
@@ -2,22 +2,22 @@
 # from pydantic import TypeAdapter
 from decimal import Decimal
 from fastapi import HTTPException, Request
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Dict, List
 from datetime import datetime
 # from sqlalchemy.sql.elements import Label
 # from app.core.repositories.sqlalchemy_repository import Repository
 from app.core.types import ModelType
 from app.core.utils.image_utils import get_default_image
 # from app.core.repositories.sqlalchemy_repository import Repository
-from app.core.utils.pydantic_utils import get_field_name, make_paginated_response, inst_dict, list_dict
+from app.core.utils.pydantic_utils import get_field_name, make_paginated_response, inst_dict
 from app.core.utils.common_utils import camel_to_enum
 from app.support.item.service import ItemService
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.support.item.repository import ItemRepository
 from app.support.item.model import Item
 from app.core.utils.common_utils import localized_field_with_replacement
-# from app.core.utils.converters import lang_suffix_list, lang_suffix_dict
-from app.core.utils.alchemy_utils import transform_api_list_view
+from app.core.utils.converters import lang_suffix_list, lang_suffix_dict
+from app.core.utils.localization_plan import ApiLocalizationPlan, get_api_plan
 from app.core.config.project_config import settings
 from app.support.item.schemas import (ItemApiLangNonLocalized,
                                       ItemApiLangLocalizedInterim)
@@ -25,11 +25,13 @@ from app.support.item.schemas import (ItemApiLangNonLocalized,
 # ItemApiAdapter: TypeAdapter = TypeAdapter(List[ItemApi])
 language: list = settings.LANGUAGES
 # список языковых суффиксов
-# lang_prefixes: list = cls.lang_suffix_list(language)
+lang_prefixes: list = lang_suffix_list(language)
 def_lang = settings.DEFAULT_LANG
 # словарь {'en': ['', '_ru': '_fr'],...}
 # списки языков отсортированы в порядке очередности замены для каждого языка
-# lang_dict = lang_suffix_dict(language)
+lang_dict = lang_suffix_dict(language)
+# settings.api_root_fields - property (парсинг строки при каждом обращении)
+api_root_fields: list = settings.api_root_fields
 itemapilangnonlocalized = get_field_name(ItemApiLangNonLocalized)
 itemapilanglocalized = get_field_name(ItemApiLangLocalizedInterim)
 
@@ -44,15 +46,14 @@ class ApiService(ItemService):
         try:
             # задаем порядок замещения пустых полей
             # перенос вложенных словарей на верхний уровень (drink -> root)
-            item = cls._level_up_(cls.lang_suffix_list(language), item)
+            item = cls._level_up_(lang_prefixes, item)
             item['changed_at'] = item.pop('updated_at')
             result: dict = {}
             # добавление корневых не локализованных полей
             # country enum - только на англ enum
             # category - только на англ enum
-            root_fields = settings.api_root_fields
             # add root fields
-            for key in root_fields:
+            for key in api_root_fields:
                 if val := item.get(key):
                     if key == 'category':
                         if val.get('name') in ('Wine', 'wine'):
@@ -66,7 +67,6 @@ class ApiService(ItemService):
                     result[key] = val
         # try:
             # add localized fields:
-            lang_dict = cls.lang_suffix_dict(language)
             for key, lang_suff in lang_dict.items():
                 dict_lang = {}
                 # add non-localized subfields to localized fields
@@ -106,18 +106,20 @@ class ApiService(ItemService):
             print(f'__api_view__.error {e} {item.get("id")=}')
             raise HTTPException(status_code=503, detail=f'error.__api_view__.{e}')
 
+    @classmethod
+    def api_plan(cls) -> ApiLocalizationPlan:
+        """ план локализации (строится один раз, см. app.core.utils.localization_plan) """
+        return get_api_plan(def_lang, tuple(lang_prefixes))
+
     @classmethod
     def convert_list_api_view(cls, request: Request, items: List[ModelType], cnv: bool = True) -> List[Dict[str, Any]]:
         """
             cnv
         """
-        api_view = transform_api_list_view
-        lang_prefixes = cls.lang_suffix_list(language)
         default_image_id = get_default_image(request, 1)  # заглушка для thumbnails
         if cnv:
-            cleaned_list = [api_view(inst_dict(item), def_lang, lang_prefixes, default_image_id) for item in items]
-        else:
-            cleaned_list = [api_view(item, def_lang, lang_prefixes, default_image_id) for item in items]
+            items = [inst_dict(item) for item in items]
+        cleaned_list = cls.api_plan().apply_many(items, default_image_id)
         # result = ItemApiAdapter.validate_python([api_view(item.to_dict()) for item in items])
         # cleaned_list = [item.model_dump(exclude_none=True, exclude_defaults=True) for item in result]
         return cleaned_list
@@ -134,25 +136,33 @@ class ApiService(ItemService):
             return None
         item: dict = inst_dict(item_instance)
         # result: dict = cls.__api_view__(item)
-        result: dict = transform_api_list_view(item, def_lang, cls.lang_suffix_list(language), default_image_id)
+        result: dict = cls.api_plan().apply(item, default_image_id)
         return result
 
     @classmethod
     async def get_list_api_view(cls, request: Request, after_date: datetime, repository, model,
                                 session: AsyncSession,):
         """ Получение списка элементов для api view """
-        items = await repository.get_all(after_date, model, session)
-        result = cls.convert_list_api_view(request, items)
+        rows, _ = await repository.get_api_rows(after_date, model, session)
+        result = cls.convert_list_api_view(request, rows, cnv=False)
         return result
 
+    @classmethod
+    async def stream_list_api_view(cls, request: Request, after_date: datetime, repository: ItemRepository,
+                                   session: AsyncSession, limit: int = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """ get_list_api_view потоком: пачки api view """
+        plan = cls.api_plan()
+        default_image_id = get_default_image(request, 1)  # заглушка для thumbnails
+        async for rows in repository.stream_api_rows(after_date, session, limit):
+            yield plan.apply_many(rows, default_image_id)
+
     @classmethod
     async def get_list_api_view_page(cls, request: Request, ater_date: datetime, page: int, page_size: int,
                                      repository: ItemRepository, model: Item, session: AsyncSession):
         """Получение списка элементов для ListView с пагинацией и локализацией"""
         skip = (page - 1) * page_size
-        items, total = await repository.get(ater_date, skip, page_size, model, session)
-        default_image_id = get_default_image(request, 1)  # заглушка для thumbnails
-        result = cls.convert_list_api_view(request, items, default_image_id)
+        rows, total = await repository.get_api_rows(ater_date, model, session, skip, page_size)
+        result = cls.convert_list_api_view(request, rows, cnv=False)
         # result = []
         # for item in items:
         #     if item_dict := item.to_dict():
@@ -167,9 +177,8 @@ class ApiService(ItemService):
             return []
         comma_separator = ','
         ids_set = tuple(int(b) for a in set(ids.split(comma_separator)) if (b := a.strip()).isdigit())
-        items = await repository.get_by_ids(ids_set, model, session)
-        default_image_id = get_default_image(request, 1)  # заглушка для thumbnails
-        result = cls.convert_list_api_view(request, items, default_image_id)
+        rows = await repository.get_list_view_rows_by_ids(ids_set, model, session, api=True)
+        result = cls.convert_list_api_view(request, rows, cnv=False)
         return result
 
     @classmethod
@@ -181,8 +190,8 @@ class ApiService(ItemService):
         default_image_id = get_default_image(request, 1)
         # список id (поисковый запрос там же чистится
         ids: list = await cls.search_items(request, query, limit, cls.repository, cls.model, session)
-        items: List[ModelType] = await cls.repository.get_list_view_by_ids(ids, cls.model, session)
-        result = [transform_api_list_view(item, def_lang, cls.lang_suffix_list(language), default_image_id) for item in list_dict(items)]
+        rows: List[dict] = await cls.repository.get_list_view_rows_by_ids(ids, cls.model, session, api=True)
+        result = cls.api_plan().apply_many(rows, default_image_id)
         return result
         # query = query.replace('+', ' ')
         # items: List[dict] = await super().search_by_hash(query, Item, ItemRepository, session, limit, boost, penalty)
@@ -6,6 +6,7 @@ from sqlalchemy.dialects import postgresql  # NOQA: F401
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload, load_only
 from app.core.exceptions import AppBaseException
+from app.core.repositories.count_provider import CountProvider
 from app.core.utils.alchemy_utils import get_field_list
 from app.support.producer.model import Producer
 from app.core.repositories.sqlalchemy_repository import ModelType, Repository
@@ -253,7 +254,7 @@ class DrinkRepository(Repository):
             search = f'%{search}%'
             conditions = [getattr(model, f'{key}{lang}').ilike(search) for key in fields for lang in langs]
             query = query.where(or_(*conditions))
-            total = await cls.get_count(query, session)
+            total = await CountProvider.count(query, session)
             if total == 0:
                 return [], 0
             query = query.order_by('title').offset(skip).limit(limit)
@@ -1,8 +1,9 @@
 # app.support.gemma.router.py
-from fastapi import APIRouter, Depends, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, Query
 from typing import Callable, Optional, List
 from app.auth.dependencies import get_active_user_or_internal
 from app.core.utils.translation_utils import gemma_translate, TranslationService, OllamaRepository
+from app.core.services.job_service import JobRunner
 from app.support.gemma.schemas import BenchmarkRequest
 # from app.support.gemma.schemas import TranslationRequest
 # from app.support.gemma.service import TranslationService
@@ -67,8 +68,9 @@ class GemmaRouter:
         # return {"result": translated_text, "seconds": time_taken, "model": self.service.model_map.get(model_level)}
         return result
 
-    async def start_benchmark(self, payload: BenchmarkRequest, background_tasks: BackgroundTasks):
-        # Если хочешь ждать результат в браузере - убери background_tasks и добавь await
-        # Но для RTX 3060 лучше запустить и смотреть логи в терминале
-        results = await self.service.run_benchmark(payload)
-        return {"message": "Benchmark finished", "data": results}
+    async def start_benchmark(self, payload: BenchmarkRequest) -> dict:
+        """
+            бенчмарк моделей перевода - задача translation_benchmark (очередь llm),
+            результаты накапливаются в checkpoint задачи: /jobs/{id}
+        """
+        return await JobRunner.submit('translation_benchmark', payload.model_dump())
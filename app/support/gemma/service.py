@@ -2,7 +2,10 @@
 import asyncio
 import time
 from difflib import SequenceMatcher
+from itertools import product
 
+from app.core.services.job_service import JobContext, JobRunner
+from app.core.utils import translation_utils
 from app.core.utils.translation_utils import INDUSTRY_PROMPTS
 from app.support.gemma.schemas import BenchmarkRequest
 
@@ -70,3 +73,35 @@ class TranslationService:
                     f"{r['model']:<15} | {r['lang']:<10} | {r['temp']:<5} | {r['avg_time_sec']:<7} | {r['similarity_pct']}%"
                 )
         print("=" * 80 + "\n")
+
+
+async def benchmark_job(ctx: JobContext):
+    """
+        обработчик translation_benchmark (очередь llm): прямой и обратный перевод для каждой комбинации
+        (модель, язык, температура); checkpoint - номер следующей комбинации и накопленные результаты
+    """
+    req = BenchmarkRequest(**ctx.params)
+    service = translation_utils.TranslationService(translation_utils.OllamaRepository())
+    combos = list(product(req.model_levels, req.target_langs, req.temperatures))
+    state = ctx.checkpoint or {'next': 0, 'results': []}
+    results = state['results']
+    ctx.progress(total=len(combos))
+    for n in range(state['next'], len(combos)):
+        level, lang, temp = combos[n]
+        model = service.model_map.get(level)
+        error = None
+        try:
+            forward = await service.translate({"text": req.text, "target_lang": lang, "model_level": level,
+                                               "industry": req.industry, "temperature": temp})
+            backward = await service.translate({"text": forward['result'], "target_lang": "english",
+                                                "model_level": level, "industry": req.industry, "temperature": temp})
+            results.append({"model": model, "lang": lang, "temp": temp, "time": forward['time'],
+                            "tps": round((forward['tps'] + backward['tps']) / 2, 1),
+                            "similarity_pct": service.get_similarity(req.text, backward['result'])})
+        except Exception as e:
+            error = f'{model} {lang} {temp}: {e}'
+            results.append({"model": model, "lang": lang, "temp": temp, "status": f"error: {e}"})
+        ctx.progress(1, {'next': n + 1, 'results': results}, errors=int(error is not None), error=error)
+
+
+JobRunner.register('translation_benchmark', 'llm')(benchmark_job)
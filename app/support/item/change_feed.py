@@ -0,0 +1,237 @@
+# app/support/item/change_feed.py
+"""
+    change feed для items.search_content: триггеры PostgreSQL -> NOTIFY -> ChangeFeed -> ReindexPipeline
+    триггеры уровня оператора (transition tables) на drinks, справочниках и таблицах связей
+    шлют в канал search_feed компактное уведомление {"t": таблица, "ids": [...]} (не больше NOTIFY_IDS id)
+        items                       INSERT, UPDATE drink_id             - id items
+        drinks, справочники         UPDATE (кроме служебных колонок)    - id измененных строк
+        drink_*_associations        INSERT, UPDATE, DELETE              - drink_id
+    слушатель копит id за окно CHANGE_FEED_WINDOW, переводит их в затронутые items
+    (search_paths.item_drink_stmt - тот же путь по relationship, что и у фоновой синхронизации)
+    и пересчитывает search_content только для них
+    слушатель один на кластер: соединение LISTEN держит pg_try_advisory_lock(_LISTEN_KEY), остальные процессы
+    (воркеры uvicorn) в резерве и раз в CHANGE_FEED_STANDBY сек пробуют занять блокировку
+    пока блокировку не держит никто (active) - Service.pre_run_background_task запускает фоновую синхронизацию
+    функции и триггеры генерируются и устанавливаются при старте (install), как в list_view
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+import psycopg
+from loguru import logger
+from sqlalchemy import text, union
+
+from app.core.config.database.db_async import DatabaseManager
+from app.core.config.project_config import settings
+from app.core.models.base_model import get_model_by_name
+from app.core.repositories.reindex_pipeline import ReindexPipeline
+from app.core.repositories.search_paths import item_drink_stmt
+from app.core.types import ModelType
+from app.service_registry import _SEARCH_DEPENDENCIES
+
+CHANNEL = 'search_feed'
+NOTIFY_IDS = 500    # id в одном уведомлении (payload NOTIFY - до 8000 байт)
+_LOCK_KEY = 7302    # pg_advisory_xact_lock: установка из нескольких процессов одновременно
+_LISTEN_KEY = 7304  # pg_try_advisory_lock соединения LISTEN: один слушатель на кластер
+# колонки, изменение которых не меняет search_content
+_IGNORED = "'{created_at,updated_at,search_content,search_vector}'::text[]"
+
+# таблицы, влияющие на search_content, но не зарегистрированные в _SEARCH_DEPENDENCIES
+_EXTRA = ('Superfood',)
+# {таблица: модель, id которой в уведомлении} - из реестра, путь до items - search_paths.item_chain
+_MODELS: Dict[str, ModelType] = {}
+# таблицы связей: в уведомлении drink_id, события - вставка, изменение и удаление
+ASSOCIATIONS = ('drink_food_associations', 'drink_varietal_associations')
+
+
+def feed_models() -> Dict[str, ModelType]:
+    """ таблицы с триггерами: items, модели реестра _SEARCH_DEPENDENCIES и _EXTRA (один раз) """
+    if not _MODELS:
+        drink = get_model_by_name('Drink')
+        models = [get_model_by_name('Item'), *_SEARCH_DEPENDENCIES,
+                  *map(get_model_by_name, _EXTRA)]
+        _MODELS.update({model.__tablename__: drink if model.__tablename__ in ASSOCIATIONS else model
+                        for model in models})
+    return _MODELS
+
+
+def notify_function_sql() -> str:
+    return f"""
+        CREATE OR REPLACE FUNCTION {CHANNEL}_notify(tbl text, ids bigint[]) RETURNS void AS $$
+        DECLARE
+            pos integer := 1;
+        BEGIN
+            ids := array_remove(ids, NULL);
+            WHILE pos <= coalesce(array_length(ids, 1), 0) LOOP
+                PERFORM pg_notify('{CHANNEL}', json_build_object('t', tbl, 'ids', ids[pos:pos + {NOTIFY_IDS - 1}])::text);
+                pos := pos + {NOTIFY_IDS};
+            END LOOP;
+        END $$ LANGUAGE plpgsql"""
+
+
+def changed_sql(table: str) -> str:
+    """ id для уведомления по UPDATE: только строки, где изменилось что-то, кроме служебных колонок """
+    if table in ASSOCIATIONS:
+        return 'SELECT n.drink_id FROM new_rows n UNION SELECT o.drink_id FROM old_rows o'
+    if table == 'items':
+        condition = 'n.drink_id IS DISTINCT FROM o.drink_id'
+    else:
+        condition = f'(to_jsonb(n) - {_IGNORED}) IS DISTINCT FROM (to_jsonb(o) - {_IGNORED})'
+    return f'SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id WHERE {condition}'
+
+
+def events(table: str) -> Tuple[str, ...]:
+    if table in ASSOCIATIONS:
+        return 'INSERT', 'UPDATE', 'DELETE'
+    if table == 'items':
+        return 'INSERT', 'UPDATE'
+    return ('UPDATE',)
+
+
+def trigger_sql(table: str) -> List[str]:
+    """ функция + по триггеру на событие (transition tables допускают только одно событие на триггер) """
+    key = 'drink_id' if table in ASSOCIATIONS else 'id'
+    name = f'{CHANNEL}_{table}'
+    statements = [f"""
+        CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM {CHANNEL}_notify('{table}', ARRAY(SELECT DISTINCT n.{key}::bigint FROM new_rows n));
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM {CHANNEL}_notify('{table}', ARRAY(SELECT DISTINCT o.{key}::bigint FROM old_rows o));
+            ELSE
+                PERFORM {CHANNEL}_notify('{table}', ARRAY(SELECT DISTINCT x::bigint FROM ({changed_sql(table)}) AS c(x)));
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql"""]
+    transition = {'INSERT': 'NEW TABLE AS new_rows', 'DELETE': 'OLD TABLE AS old_rows',
+                  'UPDATE': 'OLD TABLE AS old_rows NEW TABLE AS new_rows'}
+    for event in events(table):
+        statements.append(f"""
+        CREATE OR REPLACE TRIGGER {name}_{event[:3].lower()} AFTER {event} ON {table}
+            REFERENCING {transition[event]}
+            FOR EACH STATEMENT EXECUTE FUNCTION {name}()""")
+    return statements
+
+
+def install_sql() -> List[str]:
+    statements = [notify_function_sql()]
+    for table in feed_models():
+        statements.extend(trigger_sql(table))
+    return statements
+
+
+async def install():
+    """ функции и триггеры - идемпотентно """
+    async with DatabaseManager.engine.begin() as conn:
+        await conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+        for statement in install_sql():
+            await conn.exec_driver_sql(statement)
+
+
+def affected_items(changes: Dict[str, Iterable[int]]):
+    """ {таблица: id} -> select (item_id, drink_id) затронутых items для ReindexPipeline """
+    models = feed_models()
+    stmts = [item_drink_stmt(models[table], ids) for table, ids in changes.items()]
+    return union(*stmts) if len(stmts) > 1 else stmts[0]
+
+
+class ChangeFeed:
+    running: bool = False                   # этот процесс - слушатель, уведомления доходят
+    pending: Dict[str, Set[int]] = {}       # накопленные за окно id по таблицам
+    _wakeup: Optional[asyncio.Event] = None
+
+    @classmethod
+    def wakeup(cls) -> asyncio.Event:
+        if cls._wakeup is None:
+            cls._wakeup = asyncio.Event()
+        return cls._wakeup
+
+    @classmethod
+    def collect(cls, payload: str):
+        """ уведомление -> pending; неизвестные таблицы и битые payload пропускаются """
+        try:
+            data = orjson.loads(payload)
+            table, ids = data['t'], data['ids']
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning(f'ChangeFeed: неверное уведомление {payload[:200]}')
+            return
+        if table not in feed_models():
+            return
+        cls.pending.setdefault(table, set()).update(ids)
+        cls.wakeup().set()
+
+    @classmethod
+    async def flush(cls, session_factory, skip_keys: set) -> Optional[dict]:
+        """ пересчет items по накопленным id; при ошибке id возвращаются в pending """
+        changes, cls.pending = cls.pending, {}
+        if not changes:
+            return None
+        try:
+            report = await ReindexPipeline.run(session_factory, skip_keys, affected_items(changes))
+        except Exception:
+            for table, ids in changes.items():
+                cls.pending.setdefault(table, set()).update(ids)
+            raise
+        logger.info(f'ChangeFeed: {sum(map(len, changes.values()))} изменений -> '
+                    f'items {report["read"]["rows"]}, изменено {report["updated"]}')
+        return report
+
+    @classmethod
+    async def worker(cls, session_factory, skip_keys: set):
+        """ окно CHANGE_FEED_WINDOW после первого уведомления, затем один пересчет на все накопленное """
+        event = cls.wakeup()
+        while True:
+            await event.wait()
+            await asyncio.sleep(settings.CHANGE_FEED_WINDOW)
+            event.clear()
+            try:
+                await cls.flush(session_factory, skip_keys)
+            except Exception as e:
+                logger.error(f'ChangeFeed.flush: {e}')
+                await asyncio.sleep(settings.CHANGE_FEED_RETRY)
+                event.set()
+
+    @classmethod
+    async def active(cls) -> bool:
+        """ какой-либо процесс держит блокировку слушателя (уведомления обрабатываются); ошибка - False """
+        try:
+            async with DatabaseManager.session_maker() as session:
+                return bool(await session.scalar(text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND granted"
+                    " AND database = (SELECT oid FROM pg_database WHERE datname = current_database())"
+                    " AND classid = 0 AND objid = :key AND objsubid = 1)"), {'key': _LISTEN_KEY}))
+        except Exception as e:
+            logger.warning(f'ChangeFeed.active: {e}')
+            return False
+
+    @classmethod
+    async def listen(cls, conninfo: str):
+        """
+            LISTEN в отдельном соединении (в обход pgbouncer: transaction pooling не держит LISTEN и
+            сессионные блокировки); слушает только процесс, получивший pg_try_advisory_lock
+        """
+        while True:
+            delay = settings.CHANGE_FEED_RETRY
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                    cursor = await conn.execute('SELECT pg_try_advisory_lock(%s)', (_LISTEN_KEY,))
+                    if (await cursor.fetchone())[0]:
+                        await conn.execute(f'LISTEN {CHANNEL}')
+                        cls.running = True
+                        logger.info(f'ChangeFeed: слушатель запущен (канал {CHANNEL})')
+                        async for notify in conn.notifies():
+                            cls.collect(notify.payload)
+                    else:
+                        # уведомления обрабатывает другой процесс
+                        delay = settings.CHANGE_FEED_STANDBY
+            except Exception as e:
+                logger.warning(f'ChangeFeed: соединение потеряно: {e}')
+            finally:
+                cls.running = False
+            await asyncio.sleep(delay)
+
+    @classmethod
+    async def run(cls, conninfo: str, session_factory, skip_keys: set):
+        await asyncio.gather(cls.listen(conninfo), cls.worker(session_factory, skip_keys))
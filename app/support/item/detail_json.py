@@ -0,0 +1,98 @@
+# app/support/item/detail_json.py
+"""
+    detail view item, собранный в PostgreSQL: один запрос json_build_object + json_agg
+    вместо selectinload-дерева (DrinkRepository.get_selectin) + to_dict_fast + alchemy_utils.transform
+    результат - готовые JSON bytes, совпадает с transform (числа - как JSON числа)
+    текст запроса строится один раз на порядок языков (lang_sorted), выполнение - ItemRepository.get_detail_json
+"""
+from functools import lru_cache
+from typing import Tuple
+
+from sqlalchemy import Table
+
+from app.support.category.model import Category
+from app.support.country.model import Country
+from app.support.drink.model import Drink, DrinkFood, DrinkVarietal
+from app.support.food.model import Food
+from app.support.item.model import Item
+from app.support.parcel.model import Site
+from app.support.producer.model import Producer, ProducerTitle
+from app.support.region.model import Region
+from app.support.source.model import Source
+from app.support.subcategory.model import Subcategory
+from app.support.subregion.model import Subregion
+from app.support.varietal.model import Varietal
+from app.support.vintage.model import Classification, Designation, VintageConfig
+
+
+def _ml(alias: str, table: Table, base: str, languages: Tuple[str, ...]) -> str:
+    """ get_multilang: первое непустое base{lng} в порядке языков """
+    cols = [f'{base}{lng}' for lng in languages if f'{base}{lng}' in table.c]
+    if not cols:
+        return 'NULL'
+    return 'COALESCE({})'.format(', '.join(f"NULLIF({alias}.{col}, '')" for col in cols))
+
+
+def _float_text(expr: str) -> str:
+    """ f'{float(x)}' как в python: 13.5 -> '13.5', 50 -> '50.0' """
+    return (f'CASE WHEN {expr} = trunc({expr}) THEN CAST(CAST(trunc({expr}) AS bigint) AS text) || \'.0\' '
+            f'ELSE CAST(CAST({expr} AS float8) AS text) END')
+
+
+@lru_cache(maxsize=32)
+def detail_sql(languages: Tuple[str, ...]) -> str:
+    def ml(alias: str, model, base: str = 'name') -> str:
+        return _ml(alias, model.__table__, base, languages)
+
+    varietal = (f"SELECT json_agg(COALESCE({ml('v', Varietal)}, '') || ' ' || "
+                f"COALESCE({_float_text('dv.percentage')}, '0') || ' %' ORDER BY dv.varietal_id) "
+                f"FROM {DrinkVarietal.__tablename__} dv JOIN {Varietal.__tablename__} v ON v.id = dv.varietal_id "
+                f"WHERE dv.drink_id = d.id")
+    pairing = (f"SELECT json_agg(COALESCE({ml('f', Food)}, '') ORDER BY df.food_id) "
+               f"FROM {DrinkFood.__tablename__} df JOIN {Food.__tablename__} f ON f.id = df.food_id "
+               f"WHERE df.drink_id = d.id")
+    fields = (('id', 'i.id'),
+              ('vol', 'CAST(NULLIF(i.vol, 0) AS float8)'),
+              ('count', 'NULLIF(i.count, 0)'),
+              ('image_id', 'COALESCE(i.seaweed_fids[1], :default_image)'),
+              ('alc', _float_text('NULLIF(d.alc, 0)')),
+              ('title', ml('d', Drink, 'title')),
+              ('subtitle', ml('d', Drink, 'subtitle')),
+              ('description', ml('d', Drink, 'description')),
+              ('country', ml('co', Country)),
+              ('region', ml('r', Region)),
+              ('subregion', ml('sr', Subregion)),
+              ('site', ml('s', Site)),
+              ('category', ml('c', Category)),
+              ('subcategory', ml('sc', Subcategory)),
+              ('varietal', f'({varietal})'),
+              ('pairing', f'({pairing})'),
+              ('source', "NULLIF(src.name, '')"),
+              ('first_vintage', "NULLIF(d.first_vintage, '')"),
+              ('last_vintage', "NULLIF(d.last_vintage, '')"),
+              ('display_name', "NULLIF(d.display_name, '')"),
+              ('producer', f"CASE WHEN p.id IS NOT NULL THEN NULLIF(trim(COALESCE({ml('pt', ProducerTitle)}, '') "
+                           f"|| ' ' || COALESCE({ml('p', Producer)}, '')), '') END"),
+              ('anno', "NULLIF(d.anno, '')"),
+              ('classification', ml('cl', Classification)),
+              ('vintageconfig', ml('vc', VintageConfig)),
+              ('designation', ml('dg', Designation)))
+    build = ',\n            '.join(f"'{key}', {expr}" for key, expr in fields)
+    return f"""
+        SELECT CAST(json_strip_nulls(json_build_object(
+            {build})) AS text)
+        FROM {Item.__tablename__} i
+        JOIN {Drink.__tablename__} d ON d.id = i.drink_id
+        LEFT JOIN {Subcategory.__tablename__} sc ON sc.id = d.subcategory_id
+        LEFT JOIN {Category.__tablename__} c ON c.id = sc.category_id
+        LEFT JOIN {Site.__tablename__} s ON s.id = d.site_id
+        LEFT JOIN {Subregion.__tablename__} sr ON sr.id = s.subregion_id
+        LEFT JOIN {Region.__tablename__} r ON r.id = sr.region_id
+        LEFT JOIN {Country.__tablename__} co ON co.id = r.country_id
+        LEFT JOIN {Source.__tablename__} src ON src.id = d.source_id
+        LEFT JOIN {Producer.__tablename__} p ON p.id = d.producer_id
+        LEFT JOIN {ProducerTitle.__tablename__} pt ON pt.id = p.producertitle_id
+        LEFT JOIN {Classification.__tablename__} cl ON cl.id = d.classification_id
+        LEFT JOIN {VintageConfig.__tablename__} vc ON vc.id = d.vintageconfig_id
+        LEFT JOIN {Designation.__tablename__} dg ON dg.id = d.designation_id
+        WHERE i.id = :id"""
@@ -0,0 +1,76 @@
+# app/support/item/hybrid_search.py
+"""
+    гибридный поиск items: FTS PostgreSQL (ItemRepository.rank_smart_items) и clickhouse (FullTextSearch)
+    параллельно, у каждого свой таймаут, общий бюджет HYBRID_BUDGET; результаты - reciprocal rank fusion
+    не ответивший вовремя движок пропускается - выдача строится по тем, кто успел
+    в отчете по каждому движку: статус (ok / timeout / error / unavailable), время, мс и кол-во id
+    PostgreSQL - в своей сессии: отмена по таймауту не затрагивает сессию запроса
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config.database.db_async import DatabaseManager
+from app.core.config.project_config import settings
+from app.core.services.click_service import FullTextSearch
+from app.core.services.search_service import SearchService
+from app.core.utils.rank_fusion import reciprocal_rank_fusion
+from app.support.item.repository import ItemRepository
+
+CH_TABLE = 'items_search'
+
+
+class HybridSearch:
+
+    @classmethod
+    async def pg_ranking(cls, query: str, depth: int) -> List[int]:
+        if (query_data := SearchService.prepare_query(query)) is None:
+            return []
+        async with DatabaseManager.session_maker() as session:
+            pairs = await ItemRepository.rank_smart_items(session, query_data, depth)
+        return [id for id, _ in pairs]
+
+    @classmethod
+    async def ch_ranking(cls, query: str, depth: int, ch_client) -> List[int]:
+        pairs, _ = await FullTextSearch.search(query, CH_TABLE, ch_client, 'auto', limit=depth)
+        return [id for id, _ in pairs]
+
+    @staticmethod
+    async def timed(coro, timeout: float) -> Tuple[str, float, List[int]]:
+        """ (статус, время в мс, id) одного движка """
+        start = time.perf_counter()
+        try:
+            ids = await asyncio.wait_for(coro, timeout)
+            status = 'ok'
+        except asyncio.TimeoutError:
+            ids, status = [], 'timeout'
+        except Exception as e:
+            logger.warning(f'HybridSearch.error: {e}')
+            ids, status = [], 'error'
+        return status, round((time.perf_counter() - start) * 1000, 2), ids
+
+    @classmethod
+    async def search(cls, query: str, ch_client=None, depth: Optional[int] = None
+                     ) -> Tuple[List[Tuple[int, float]], Dict[str, dict]]:
+        """ -> ([(id, rrf score), ...] не длиннее depth, {движок: отчет}) """
+        depth = depth or settings.HYBRID_DEPTH
+        backends = {'pg': (cls.pg_ranking(query, depth), settings.HYBRID_PG_TIMEOUT)}
+        if ch_client is not None:
+            backends['ch'] = (cls.ch_ranking(query, depth, ch_client), settings.HYBRID_CH_TIMEOUT)
+        tasks = {name: asyncio.create_task(cls.timed(coro, timeout / 1000))
+                 for name, (coro, timeout) in backends.items()}
+        await asyncio.wait(tasks.values(), timeout=settings.HYBRID_BUDGET / 1000)
+        report: Dict[str, dict] = {} if ch_client is not None else {'ch': {'status': 'unavailable'}}
+        rankings: Dict[str, List[int]] = {}
+        for name, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                report[name] = {'status': 'timeout', 'ms': settings.HYBRID_BUDGET, 'count': 0}
+                continue
+            status, ms, ids = task.result()
+            report[name] = {'status': status, 'ms': ms, 'count': len(ids)}
+            if ids:
+                rankings[name] = ids
+        return reciprocal_rank_fusion(rankings, settings.HYBRID_RRF_K)[:depth], report
@@ -0,0 +1,159 @@
+# app/support/item/list_view.py
+"""
+    read model списка items: таблица item_list_view (модель ItemListRow)
+    одна строка на item: vol, thumbnail, title / category / country по всем языкам (jsonb)
+    список, страница и поиск читают ее одним запросом по первичному ключу вместо цепочки selectinload
+    актуальность поддерживают триггеры PostgreSQL уровня оператора (transition tables):
+        items                            INSERT, UPDATE vol / seaweed_fids / drink_id
+        drinks                           UPDATE title* / subcategory_id / site_id
+        subcategories, sites, subregions, regions - UPDATE ссылки на родителя
+        categories, countries            UPDATE name*
+    пересчитываются только затронутые items; удаление item - ON DELETE CASCADE
+    функции и триггеры генерируются по метаданным моделей и устанавливаются при старте (install)
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import Table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config.database.db_async import DatabaseManager
+from app.support.category.model import Category
+from app.support.country.model import Country
+from app.support.drink.model import Drink
+from app.support.item.model import Item, ItemListRow
+
+VIEW = ItemListRow.__tablename__
+_LOCK_KEY = 7301    # pg_advisory_xact_lock: установка из нескольких процессов одновременно
+
+# путь от items к таблице: (JOIN ..., колонка items-цепочки, ссылающаяся на изменившиеся id)
+_D = 'JOIN drinks d ON d.id = i.drink_id'
+_S = f'{_D} JOIN sites s ON s.id = d.site_id'
+_SR = f'{_S} JOIN subregions sr ON sr.id = s.subregion_id'
+_R = f'{_SR} JOIN regions r ON r.id = sr.region_id'
+PATHS: Dict[str, Tuple[str, str]] = {
+    'items': ('', 'i.id'),
+    'drinks': ('', 'i.drink_id'),
+    'subcategories': (_D, 'd.subcategory_id'),
+    'categories': (f'{_D} JOIN subcategories sc ON sc.id = d.subcategory_id', 'sc.category_id'),
+    'sites': (_D, 'd.site_id'),
+    'subregions': (_S, 's.subregion_id'),
+    'regions': (_SR, 'sr.region_id'),
+    'countries': (_R, 'r.country_id'),
+}
+
+
+def lang_columns(table: Table, base: str) -> List[str]:
+    """ base + base_xx по всем языкам, которые есть в таблице """
+    pattern = re.compile(rf'^{base}(_[a-z]{{2}})?$')
+    return [c.name for c in table.columns if pattern.match(c.name)]
+
+
+def watched_columns() -> Dict[str, List[str]]:
+    """ {таблица: колонки, изменение которых меняет строки item_list_view} """
+    return {'items': ['vol', 'seaweed_fids', 'drink_id'],
+            'drinks': [*lang_columns(Drink.__table__, 'title'), 'subcategory_id', 'site_id'],
+            'subcategories': ['category_id'],
+            'categories': lang_columns(Category.__table__, 'name'),
+            'sites': ['subregion_id'],
+            'subregions': ['region_id'],
+            'regions': ['country_id'],
+            'countries': lang_columns(Country.__table__, 'name')}
+
+
+def _jsonb(alias: str, columns: List[str]) -> str:
+    return 'jsonb_strip_nulls(jsonb_build_object({}))'.format(
+        ', '.join(f"'{c}', {alias}.{c}" for c in columns))
+
+
+def select_sql(where: Optional[str] = None) -> str:
+    """ строки item_list_view из исходных таблиц (where по алиасу i = items) """
+    sql = f"""
+        SELECT i.id, i.vol, i.seaweed_fids[2], {_jsonb('d', lang_columns(Drink.__table__, 'title'))},
+               {_jsonb('c', lang_columns(Category.__table__, 'name'))},
+               {_jsonb('co', lang_columns(Country.__table__, 'name'))}, now()
+        FROM items i
+        JOIN drinks d ON d.id = i.drink_id
+        LEFT JOIN subcategories sc ON sc.id = d.subcategory_id
+        LEFT JOIN categories c ON c.id = sc.category_id
+        LEFT JOIN sites s ON s.id = d.site_id
+        LEFT JOIN subregions sr ON sr.id = s.subregion_id
+        LEFT JOIN regions r ON r.id = sr.region_id
+        LEFT JOIN countries co ON co.id = r.country_id"""
+    return f'{sql}\n        WHERE {where}' if where else sql
+
+
+def refresh_function_sql() -> str:
+    columns = ('vol', 'thumbnail', 'title', 'category', 'country', 'updated_at')
+    return f"""
+        CREATE OR REPLACE FUNCTION {VIEW}_refresh(item_ids integer[]) RETURNS void AS $$
+            INSERT INTO {VIEW} (id, {', '.join(columns)})
+            {select_sql('i.id = ANY(item_ids)')}
+            ON CONFLICT (id) DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in columns)}
+        $$ LANGUAGE sql"""
+
+
+def trigger_sql(table: str, columns: List[str]) -> List[str]:
+    """ функция + триггер AFTER UPDATE: пересчет items, у которых изменилась одна из columns """
+    join, key = PATHS[table]
+    new = ', '.join(f'n.{c}' for c in columns)
+    old = ', '.join(f'o.{c}' for c in columns)
+    name = f'{VIEW}_{table}_upd'
+    return [f"""
+        CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+        BEGIN
+            PERFORM {VIEW}_refresh(ARRAY(
+                SELECT i.id FROM items i {join}
+                WHERE {key} IN (SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+                                WHERE ROW({new}) IS DISTINCT FROM ROW({old}))));
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql""",
+            f"""
+        CREATE OR REPLACE TRIGGER {name} AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {name}()"""]
+
+
+def install_sql() -> List[str]:
+    """ все DDL: функция пересчета, триггер INSERT на items, триггеры UPDATE на цепочке таблиц """
+    name = f'{VIEW}_items_ins'
+    statements = [refresh_function_sql(),
+                  f"""
+        CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+        BEGIN
+            PERFORM {VIEW}_refresh(ARRAY(SELECT id FROM new_rows));
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql""",
+                  f"""
+        CREATE OR REPLACE TRIGGER {name} AFTER INSERT ON items
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {name}()"""]
+    for table, columns in watched_columns().items():
+        statements.extend(trigger_sql(table, columns))
+    return statements
+
+
+async def rebuild(conn: AsyncConnection) -> int:
+    """ полное перестроение (первый запуск, изменение состава языков) """
+    await conn.exec_driver_sql(f'TRUNCATE {VIEW}')
+    result = await conn.exec_driver_sql(
+        f'INSERT INTO {VIEW} (id, vol, thumbnail, title, category, country, updated_at) {select_sql()}')
+    return result.rowcount
+
+
+async def install(force_rebuild: bool = False):
+    """
+        таблица (если миграция еще не применена), функции и триггеры - идемпотентно
+        пустая таблица при непустой items - полное перестроение
+    """
+    async with DatabaseManager.engine.begin() as conn:
+        await conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+        await conn.run_sync(lambda sync_conn: ItemListRow.__table__.create(sync_conn, checkfirst=True))
+        for statement in install_sql():
+            await conn.exec_driver_sql(statement)
+        empty = (await conn.execute(text(f'SELECT NOT EXISTS (SELECT 1 FROM {VIEW})'))).scalar()
+        if force_rebuild or (empty and (await conn.execute(text(
+                f'SELECT EXISTS (SELECT 1 FROM {Item.__tablename__})'))).scalar()):
+            count = await rebuild(conn)
+            logger.info(f'{VIEW}: перестроено {count} строк')
@@ -1,8 +1,10 @@
 # app/support/Item/model.py
 
 from __future__ import annotations
-from typing import TYPE_CHECKING
-from sqlalchemy import ForeignKey, Index, UniqueConstraint
+from datetime import datetime
+from typing import Optional, TYPE_CHECKING
+from sqlalchemy import DateTime, ForeignKey, func, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 # from sqlalchemy.engine import Connection
 # from sqlalchemy.sql import Table
@@ -38,3 +40,22 @@ class Item(Search, Base, BaseAt, ImageMixin):
     def __repr__(self):
         # return f"<Category(name={self.name})>"
         return str(self)
+
+
+class ItemListRow(Base):
+    """
+        денормализованная строка списка items (read model для list view и поиска)
+        поддерживается триггерами PostgreSQL, см. app.support.item.list_view
+        title / category / country - {поле_xx: значение} по всем языкам
+    """
+    __tablename__ = 'item_list_view'
+    id: Mapped[int] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    vol: Mapped[volume]
+    thumbnail: Mapped[Optional[str]]    # seaweed_fids[1] - thumbnail первого изображения
+    title: Mapped[Optional[dict]] = mapped_column(JSONB)
+    category: Mapped[Optional[dict]] = mapped_column(JSONB)
+    country: Mapped[Optional[dict]] = mapped_column(JSONB)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    def __str__(self):
+        return f'{self.id}'
@@ -3,19 +3,24 @@ from decimal import Decimal
 from typing import List, Optional, Tuple, Union
 
 from loguru import logger  # NOQA: F401
-from sqlalchemy import column, Float, func, Integer, select, text, values
+from sqlalchemy import column, Float, Integer, select, text, values
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import load_only, selectinload
 
+from app.core.config.project_config import settings
 from app.core.exceptions import AppBaseException
 from app.core.repositories.array_repository import ArrayRepository
+from app.core.repositories.count_provider import CountProvider
+from app.core.repositories.row_plan import RowPlan
+from app.core.repositories.search_cache import SearchResultCache
 from app.core.repositories.search_repository import SearchRepository
 from app.core.repositories.sqlalchemy_repository import Repository
 from app.core.types import ModelType
 from app.core.utils.alchemy_utils import exclude_field_list
 from app.support.drink.model import Drink
 from app.support.drink.repository import DrinkRepository
-from app.support.item.model import Item
+from app.support.item.detail_json import detail_sql
+from app.support.item.model import Item, ItemListRow
 from app.support.parcel.model import Site
 from app.support.producer.model import Producer
 from app.support.region.model import Region
@@ -25,6 +30,18 @@ from app.support.subregion.model import Subregion
 
 class ItemRepository(ArrayRepository, SearchRepository, Repository):
     model = Item
+    # связи для чтения через .mappings() (RowPlan): list view - как get_query_for_list_view
+    list_view_relations = {'drink': {'site': {'subregion': {'region': {'country': {}}}},
+                                     'subcategory': {'category': {}},
+                                     'sweetness': {},
+                                     'producer': {'producertitle': {}},
+                                     'parcel': {}, 'designation': {}, 'classification': {}, 'vintageconfig': {}}}
+    # api view - как get_query (+ foods, varietals, source)
+    api_view_relations = {'drink': {**list_view_relations['drink'],
+                                    'food_associations': {'food': {'superfood': {}}},
+                                    'varietal_associations': {'varietal': {}},
+                                    'source': {}}}
+    row_exclude = ('search_vector', 'search_content')
 
     @classmethod
     def get_query(cls, model: ModelType):
@@ -72,6 +89,96 @@ class ItemRepository(ArrayRepository, SearchRepository, Repository):
         except Exception as e:
             raise AppBaseException(message=f'get_list_view.error; {str(e)}', status_code=404)
 
+    @classmethod
+    def get_list_view_plan(cls) -> RowPlan:
+        return RowPlan.get(Item, cls.list_view_relations, cls.row_exclude)
+
+    @classmethod
+    def get_api_view_plan(cls) -> RowPlan:
+        return RowPlan.get(Item, cls.api_view_relations, cls.row_exclude)
+
+    @classmethod
+    def get_list_view_query(cls):
+        """ чтение из read model item_list_view (см. app.support.item.list_view) """
+        return select(ItemListRow.id, ItemListRow.vol, ItemListRow.thumbnail,
+                      ItemListRow.title, ItemListRow.category, ItemListRow.country)
+
+    @classmethod
+    async def get_list_view_rows(cls, model: ModelType, session: AsyncSession, limit: int = 20) -> List[dict]:
+        """ get_list_view одним запросом к item_list_view """
+        stmt = cls.get_list_view_query().order_by(ItemListRow.id.asc())
+        if limit:
+            stmt = stmt.limit(limit)
+        return (await session.execute(stmt)).mappings().all()
+
+    @classmethod
+    async def get_list_view_page_rows(cls, skip: int, limit: int, model: ModelType, session: AsyncSession):
+        """ get_list_view_page через item_list_view """
+        try:
+            total = await CountProvider.count(select(Item.id), session)
+            stmt = cls.get_list_view_query().order_by(ItemListRow.id.asc()).offset(skip).limit(limit)
+            rows = (await session.execute(stmt)).mappings().all()
+            return rows, total
+        except Exception as e:
+            raise AppBaseException(message=f'get_list_view_page_rows.error; {str(e)}', status_code=404)
+
+    @classmethod
+    async def get_list_view_rows_by_ids(cls, ids: list, model: ModelType, session: AsyncSession,
+                                        api: bool = False) -> List[dict]:
+        """
+            get_list_view_by_ids: из item_list_view
+            api=True - через .mappings() со всеми связями api view
+        """
+        if not ids:
+            return []
+        if api:
+            plan = cls.get_api_view_plan()
+            return await plan.fetch(plan.select().where(Item.id.in_(ids)).order_by(Item.id.asc()), session)
+        stmt = cls.get_list_view_query().where(ItemListRow.id.in_(ids)).order_by(ItemListRow.id.asc())
+        return (await session.execute(stmt)).mappings().all()
+
+    @classmethod
+    async def get_list_view_rows_by_scores(cls, session: AsyncSession, id_score_pairs: list[tuple]) -> List[dict]:
+        """ строки item_list_view в порядке (score desc, id desc) - страница find_items_smart_page """
+        if not id_score_pairs:
+            return []
+        v = values(column("id", Integer), column("score", Float), name="target_data").data(id_score_pairs)
+        stmt = (cls.get_list_view_query().join(v, ItemListRow.id == v.c.id)
+                .order_by(v.c.score.desc(), v.c.id.desc()))
+        return (await session.execute(stmt)).mappings().all()
+
+    @classmethod
+    async def get_api_rows(cls, after_date, model: ModelType, session: AsyncSession,
+                           skip: int = None, limit: int = 20) -> tuple:
+        """
+            get / get_all для api view через .mappings()
+            skip is None - без пагинации (total = None)
+        """
+        plan = cls.get_api_view_plan()
+        stmt = cls.get_api_rows_query(after_date)
+        total = None
+        if skip is not None:
+            total = await CountProvider.count(select(Item.id).where(Item.updated_at > after_date), session)
+            if total == 0:
+                return [], total
+            stmt = stmt.offset(skip)
+        if limit:
+            stmt = stmt.limit(limit)
+        return await plan.fetch(stmt, session), total
+
+    @classmethod
+    def get_api_rows_query(cls, after_date, limit: int = None):
+        stmt = cls.get_api_view_plan().select().where(Item.updated_at > after_date).order_by(Item.id.asc())
+        if limit:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    @classmethod
+    def stream_api_rows(cls, after_date, session: AsyncSession, limit: int = None, batch_size: int = None):
+        """ get_api_rows потоком: async iterator пачек словарей """
+        return cls.get_api_view_plan().stream(cls.get_api_rows_query(after_date, limit), session,
+                                              batch_size or settings.STREAM_BATCH)
+
     @classmethod
     async def get_detail_view(cls, id: int, model: ModelType, session: AsyncSession) -> ModelType:
         """Получение детального представления элемента для DetailView"""
@@ -88,14 +195,27 @@ class ItemRepository(ArrayRepository, SearchRepository, Repository):
         except Exception as e:
             raise AppBaseException(message=f'get_detail_view.error; {str(e)}', status_code=404)
 
+    @classmethod
+    async def get_detail_json(cls, id: int, languages: Tuple[str, ...], default_image: str,
+                              session: AsyncSession) -> Optional[bytes]:
+        """
+            detail view одним запросом: документ собирается в PostgreSQL (см. detail_json)
+            готовые JSON bytes или None, если item не найден
+        """
+        try:
+            result = await session.execute(text(detail_sql(tuple(languages))),
+                                           {'id': id, 'default_image': default_image})
+            content = result.scalar_one_or_none()
+            return content.encode() if content is not None else None
+        except Exception as e:
+            raise AppBaseException(message=f'get_detail_json.error; {str(e)}', status_code=404)
+
     @classmethod
     async def get_list_view_page(cls, skip: int, limit: int, model: ModelType, session: AsyncSession):
         """Получение списка элементов с плоскими полями для ListView с пагинацией"""
         try:
             query = cls.get_query_for_list_view(Item).order_by(Item.id.asc())
-            count_query = select(func.count()).select_from(Item)
-            count_result = await session.execute(count_query)
-            total = count_result.scalar()
+            total = await CountProvider.count(select(Item.id), session)
 
             query = query.offset(skip).limit(limit)
             result = await session.execute(query)
@@ -104,6 +224,48 @@ class ItemRepository(ArrayRepository, SearchRepository, Repository):
         except Exception as e:
             raise AppBaseException(message=f'get_list_view_page.error; {str(e)}', status_code=404)
 
+    @staticmethod
+    def smart_score_parts(query_data) -> Tuple[str, str, dict]:
+        """
+            (score, where, параметры) для сценария запроса (SearchService.prepare_query)
+            Сценарий 1 ранжируем как пустой запрос (score=1.0, сортировка по id)
+            Сценарии 2 и 3 ранжируем по реальному ts_rank_cd
+        """
+        where_clause = "i.search_vector @@ to_tsquery('simple', :fts_query)"
+        if query_data.scenario == 1:
+            score_select = "1.00000000::numeric as score"
+        else:
+            score_select = "ROUND(ts_rank_cd(i.search_vector, to_tsquery('simple', :fts_query))::numeric, 8) as score"
+        if query_data.scenario == 3:
+            # В Сценарии 3 добавляем фильтрацию по LIKE для последнего недописанного слова
+            where_clause += " AND lower(i.search_content) LIKE :like_term"
+        params = {"fts_query": query_data.fts_query,
+                  "like_term": f"%{query_data.like_term.lower()}%" if query_data.like_term else None}
+        return score_select, where_clause, params
+
+    @classmethod
+    async def rank_smart_items(cls, session: AsyncSession, query_data=None, max_rows: int = 5001,
+                               after: Optional[Tuple[float, int]] = None) -> List[tuple]:
+        """
+            весь ранжированный список [(id, score), ...] (не длиннее max_rows) в порядке find_items_smart_page:
+            пустой запрос - id asc, иначе score desc, id desc (для SearchSessionStore)
+            after - (score, id) последней уже полученной строки: продолжение списка после нее
+        """
+        if query_data is None:
+            query_sql = text("SELECT i.id, 1.00000000::numeric as score FROM items i "
+                             "WHERE CAST(:li AS bigint) IS NULL OR i.id > CAST(:li AS bigint) "
+                             "ORDER BY i.id LIMIT :max_rows")
+            params = {}
+        else:
+            score_select, where_clause, params = cls.smart_score_parts(query_data)
+            query_sql = text(f"SELECT * FROM (SELECT i.id, {score_select} FROM items i WHERE {where_clause}) s "
+                             f"WHERE CAST(:ls AS numeric) IS NULL OR score < CAST(:ls AS numeric) "
+                             f"OR (score = CAST(:ls AS numeric) AND id < CAST(:li AS bigint)) "
+                             f"ORDER BY score DESC, id DESC LIMIT :max_rows")
+        ls, li = (f'{after[0]:.8f}', int(after[1])) if after else (None, None)
+        result = await session.execute(query_sql, {**params, "max_rows": max_rows, "ls": ls, "li": li})
+        return [(id, float(score)) for id, score in result.all()]
+
     @classmethod
     async def find_items_smart_page(
             cls, session: AsyncSession, query_data=None,
@@ -115,10 +277,17 @@ class ItemRepository(ArrayRepository, SearchRepository, Repository):
         Универсальный высокопроизводительный FTS поиск с умной пагинацией:
         1. Извлекает релевантность через ts_rank_cd для Сценариев 2 и 3.
         2. Реализует Keyset пагинацию по контракту Preact (Score + ID).
-        3. Возвращает данные текущей страницы + якоря для быстрых прыжков.
+        3. Возвращает данные текущей страницы (строки item_list_view) + якоря для быстрых прыжков.
         """
         ls_param = Decimal(str(last_score)) if last_score is not None else None
         total_needed = (limit * jump_pages) + 1
+        # ранжирование (id, score) + якоря - из кеша, пока search_content не менялся
+        cache_key = SearchResultCache.key(query_data, ls_param, last_id, limit, jump_pages)
+        if (cached := SearchResultCache.get(cache_key)) is not None:
+            current_page_data, anchors = cached
+            items = await cls.get_list_view_rows_by_scores(session, current_page_data)
+            return items, anchors
+        generation = SearchResultCache.generation()
 
         # Режим "просмотра всех" (пустая строка поиска)
         is_full_scan = query_data is None
@@ -154,22 +323,7 @@ class ItemRepository(ArrayRepository, SearchRepository, Repository):
 
         else:
             # Не пустой запрос. В зависимости от Сценария (1, 2, 3) подставляем логику в CTE
-            # Сценарий 1 ранжируем как пустой запрос (score=1.0, сортировка по id)
-            # Сценарии 2 и 3 ранжируем по реальному ts_rank_cd
-
-            if query_data.scenario == 1:
-                score_select = "1.00000000::numeric as score"
-                where_clause = "i.search_vector @@ to_tsquery('simple', :fts_query)"
-            elif query_data.scenario == 2:
-                score_select = "ROUND(ts_rank_cd(i.search_vector, to_tsquery('simple', :fts_query))::numeric, 8) as score"
-                where_clause = "i.search_vector @@ to_tsquery('simple', :fts_query)"
-            elif query_data.scenario == 3:
-                score_select = "ROUND(ts_rank_cd(i.search_vector, to_tsquery('simple', :fts_query))::numeric, 8) as score"
-                # В Сценарии 3 добавляем фильтрацию по LIKE в памяти для последнего недописанного слова
-                where_clause = """
-                        i.search_vector @@ to_tsquery('simple', :fts_query)
-                        AND lower(i.search_content) LIKE :like_term
-                    """
+            score_select, where_clause, params = cls.smart_score_parts(query_data)
 
             query_sql = text(
                 f"""
@@ -199,9 +353,7 @@ class ItemRepository(ArrayRepository, SearchRepository, Repository):
                     """
             )
 
-            params = {"fts_query": query_data.fts_query,
-                      "like_term": f"%{query_data.like_term.lower()}%" if query_data.like_term else None, "limit": limit,
-                      "total_needed": total_needed, "ls": ls_param, "li": last_id}
+            params.update({"limit": limit, "total_needed": total_needed, "ls": ls_param, "li": last_id})
 
         # Выполнение SQL
         result = await session.execute(query_sql, params)
@@ -210,7 +362,8 @@ class ItemRepository(ArrayRepository, SearchRepository, Repository):
         current_page_data = [(r['id'], float(r['score'])) for r in rows if r['rn'] <= limit]
         anchors = [{"page_offset": r['rn'] // limit, "last_score": str(r['score']), "last_id": r['id']} for r in rows if
                    r['rn'] > limit]
-        items = await cls.get_full_items(session, current_page_data)
+        SearchResultCache.put(cache_key, current_page_data, anchors, generation)
+        items = await cls.get_list_view_rows_by_scores(session, current_page_data)
         return items, anchors
 
     @classmethod
@@ -6,13 +6,14 @@
 """
 from decimal import Decimal
 from typing import List, Annotated, Callable, Optional, Union
-from fastapi import Depends, Path, Query, HTTPException, BackgroundTasks, Form, UploadFile, File, Request
+from fastapi import Depends, Path, Query, HTTPException, BackgroundTasks, Form, UploadFile, File, Request, Response
 import json
 from loguru import logger  # NOQA: F401
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth.dependencies import get_active_user_or_internal
 from app.core.config.database.db_async import get_db
+from app.core.config.project_config import settings
 from app.core.config.database.seaweed_async import get_swfs, SeaweedFSManager
 from app.core.repositories.clickhouse_repository import ClickHouseRepositoryFactory
 from app.core.utils.io_utils import ResponseStreaming
@@ -28,9 +29,11 @@ from app.support.item.service import ItemService
 
 class ItemViewRouter:
     def __init__(self, prefix: str = '/items_view', tags: List[str] = None,
-                 ):
+                 detail_sql: bool = None):
         from fastapi import APIRouter
         self.prefix = prefix
+        # detail view: JSON из PostgreSQL (ItemService.get_detail_view_json) или ORM + transform
+        self.detail_sql = settings.DETAIL_VIEW_SQL if detail_sql is None else detail_sql
         self.tags = tags or ["items_view"]
         # self.router = APIRouter()
         self.router = APIRouter(dependencies=[Depends(get_active_user_or_internal)])
@@ -98,6 +101,15 @@ class ItemViewRouter:
             summary="Поиск элементов по hash index + word..",
             openapi_extra={'x-request-schema': None}
         )
+        # гибридный поиск: PostgreSQL FTS + clickhouse, reciprocal rank fusion
+        self.router.add_api_route(
+            "/search_hybrid/{lang}",
+            self.search_hybrid,
+            methods=["GET"],
+            tags=self.tags,
+            summary="Гибридный поиск: PostgreSQL FTS + clickhouse",
+            openapi_extra={'x-request-schema': None}
+        )
         # 6. ДЛЯ ЗАГРУЗКИ В данных в PREACT_UPDATE
         self.router.add_api_route(
             "/preact/{id}",
@@ -165,7 +177,13 @@ class ItemViewRouter:
             Получить детальную информацию по элементу с локализацией
             используется в PREACT
             ItemService.get_detail_view -> ItemRepository.get_detail_view -> app.core.utils.alchemy_utils.transform
+            или (detail_sql) ItemService.get_detail_view_json -> ItemRepository.get_detail_json
         """
+        if self.detail_sql:
+            content = await self.service.get_detail_view_json(request, lang, id, ItemRepository, Item, session)
+            if content is None:
+                raise HTTPException(status_code=404, detail=f"Item with id {id} not found")
+            return Response(content=content, media_type="application/json")
         item = await self.service.get_detail_view(request, lang, id, ItemRepository, Item, session)
         if not item:
             raise HTTPException(status_code=404, detail=f"Item with id {id} not found")
@@ -177,12 +195,11 @@ class ItemViewRouter:
                          session: AsyncSession = Depends(get_db),
                          force_all: bool = False):
         """
-            ПОЛНАЯ переиндексацимя заполнения индекса! (подумай! можжет быть ну его?) результат см в логах
+            ПОЛНАЯ переиндексацимя заполнения индекса! (подумай! можжет быть ну его?) прогресс - /jobs
         """
         # await self.service.run_reindex_worker(DatabaseManager.session_maker, force_all,
         # background_tasks=background_tasks)
-        await self.service.reindexation(background_tasks)
-        return {'result': 'Reindexation started in backgound taska'}
+        return {'result': await self.service.reindexation(background_tasks)}
 
     async def search_smart(self, request: Request,
                            search_str: str = Query(
@@ -207,6 +224,8 @@ class ItemViewRouter:
                                                                                                        'совместимости'),
                                   last_id: Optional[int] = Query(None, description='last id (for preact)'),
                                   limit: int = Query(20, description='количество записей на страницу'),
+                                  cursor: Optional[str] = Query(None, description='курсор из anchors '
+                                                                                  '(вместо last_score / last_id)'),
                                   boost: float = Query(15.0, description="заглушка"),
                                   session: AsyncSession = Depends(get_db)
                                   ):
@@ -214,9 +233,19 @@ class ItemViewRouter:
             ItemService.execute_smart_search_page -> app.core.utils.alchemy_utils.transform_list_view
         """
         result = await self.service.execute_smart_search_page(request, lang, search_str, session, limit,
-                                                              last_score, last_id)
+                                                              last_score, last_id, cursor=cursor)
         return result
 
+    async def search_hybrid(self, request: Request,
+                            lang: str = Path(..., description="Язык локализации"),
+                            search_str: str = Query(..., description="Поисковый запрос"),
+                            limit: int = Query(20, ge=1, le=100, description='количество записей на страницу'),
+                            offset: int = Query(0, ge=0, description='смещение'),
+                            session: AsyncSession = Depends(get_db)):
+        """ ответ: items, total, backends - статус и время каждого движка, мс (для настройки таймаутов) """
+        ch_client = getattr(request.app.state, 'ch_client', None)
+        return await self.service.execute_hybrid_search(request, lang, search_str, session, ch_client, limit, offset)
+
     async def update_item_drinS(self,
                                 id: int,
                                 background_tasks: BackgroundTasks,
@@ -0,0 +1,108 @@
+# app/support/item/search_index.py
+"""
+    поиск items в памяти процесса (settings.SMART_SEARCH_BACKEND = 'memory')
+    индекс строится из items.search_content (app.core.utils.inverted_index) при старте или первом запросе
+    актуальность: не чаще раза в SEARCH_INDEX_REFRESH сек - записи с updated_at > последней загруженной
+    (с перекрытием SEARCH_INDEX_OVERLAP), удаления - по расхождению count(*) с известными id
+    страница результата и якоря - в формате ItemRepository.find_items_smart_page
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.database.db_async import DatabaseManager
+from app.core.config.project_config import settings
+from app.core.utils.inverted_index import InvertedIndex
+from app.support.item.model import Item
+
+LOAD_BATCH = 5000
+
+
+def _latest(current: Optional[datetime], rows) -> Optional[datetime]:
+    stamps = [row[2] for row in rows if row[2]]
+    if current:
+        stamps.append(current)
+    return max(stamps, default=None)
+
+
+class ItemSearchIndex:
+    index: Optional[InvertedIndex] = None
+    known: Set[int] = set()                 # все id items, включая пустой search_content
+    synced_at: Optional[datetime] = None    # max(updated_at) загруженных записей
+    checked: float = 0.0                    # time.monotonic() последней проверки изменений
+    _lock = asyncio.Lock()
+
+    @classmethod
+    def content_query(cls):
+        return select(Item.id, Item.search_content, Item.updated_at)
+
+    @classmethod
+    async def load(cls, session: AsyncSession):
+        """ полная загрузка; токенизация - в потоке, текущий индекс работает до замены """
+        index, docs, synced_at = InvertedIndex(), [], None
+        stream = await session.stream(cls.content_query().execution_options(yield_per=LOAD_BATCH))
+        async for rows in stream.partitions():
+            docs.extend((row[0], row[1]) for row in rows)
+            synced_at = _latest(synced_at, rows)
+        # одна пачка: каждый posting list собирается один раз
+        await asyncio.to_thread(index.update, docs)
+        known = {doc_id for doc_id, _ in docs}
+        cls.index, cls.known, cls.synced_at, cls.checked = index, known, synced_at, time.monotonic()
+        logger.info(f'ItemSearchIndex: загружено {len(index)} items, токенов {len(index.postings)}')
+
+    @classmethod
+    async def refresh(cls, session: AsyncSession):
+        """ применение изменений с последней проверки """
+        if time.monotonic() - cls.checked < settings.SEARCH_INDEX_REFRESH:
+            return
+        cls.checked = time.monotonic()
+        stmt = cls.content_query()
+        if cls.synced_at:
+            stmt = stmt.where(Item.updated_at > cls.synced_at - timedelta(seconds=settings.SEARCH_INDEX_OVERLAP))
+        rows = (await session.execute(stmt)).all()
+        if rows:
+            await asyncio.to_thread(cls.index.update, [(row[0], row[1]) for row in rows])
+            cls.known.update(row[0] for row in rows)
+            cls.synced_at = _latest(cls.synced_at, rows)
+        if await session.scalar(select(func.count()).select_from(Item)) != len(cls.known):
+            current = set((await session.execute(select(Item.id))).scalars().all())
+            if removed := cls.known - current:
+                cls.index.update(removed=removed)
+            cls.known = current
+
+    @classmethod
+    async def ensure(cls, session: AsyncSession) -> InvertedIndex:
+        async with cls._lock:
+            if cls.index is None:
+                await cls.load(session)
+            else:
+                await cls.refresh(session)
+        return cls.index
+
+    @classmethod
+    async def warm_up(cls):
+        """ загрузка при старте (lifespan), своя сессия """
+        try:
+            async with DatabaseManager.session_maker() as session:
+                await cls.ensure(session)
+        except Exception as e:
+            logger.error(f'ItemSearchIndex.warm_up.error: {e}')
+
+    @classmethod
+    async def search_page(cls, query: str, session: AsyncSession, last_score=None, last_id: Optional[int] = None,
+                          limit: int = 20, jump_pages: int = 5) -> Tuple[List[tuple], List[dict]]:
+        """ -> ([(id, score), ...] текущей страницы, якоря) как find_items_smart_page """
+        index = await cls.ensure(session)
+        ids, scores = index.search(query, limit, last_score, last_id, limit * jump_pages + 1)
+        page, anchors = [], []
+        for rn, (id, score) in enumerate(zip(ids.tolist(), scores.tolist()), start=1):
+            if rn <= limit:
+                page.append((id, score))
+            elif rn % limit == 1:
+                anchors.append({"page_offset": rn // limit, "last_score": f'{score:.8f}', "last_id": id})
+        return page, anchors
@@ -13,12 +13,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.config.database.seaweed_async import SeaweedFSManager
+from app.core.config.project_config import settings
+from app.core.repositories.search_cache import SearchResultCache
+from app.core.repositories.search_session import SearchSessionStore
 from app.core.hash_norm import get_hashes_for_item
 from app.core.services.array_service import ArrayService
+from app.core.services.fuzzy_service import FuzzyMatchService
 from app.core.services.search_service import SearchService
 from app.core.services.service import Service
 from app.core.types import ModelType
-from app.core.utils.alchemy_utils import transform, transform_list_view
+from app.core.utils.alchemy_utils import transform, transform_list_view, transform_list_view_row
 from app.core.utils.backgound_tasks import background
 from app.core.utils.common_utils import flatten_dict_with_localized_fields, jprint, \
     localized_field_with_replacement  # , delta_data
@@ -34,6 +38,8 @@ from app.support.drink.repository import DrinkRepository
 from app.support.drink.schemas import DrinkCreate, DrinkUpdate
 from app.support.drink.service import DrinkService
 from app.support.item.repository import ItemRepository
+from app.support.item.hybrid_search import HybridSearch
+from app.support.item.search_index import ItemSearchIndex
 from app.support.item.schemas import (ItemCreate, ItemCreatePreact, ItemCreateRelation, ItemDetailManyToManyLocalized,
                                       ItemListView, ItemRead, ItemReadRelation, ItemUpdate,
                                       ItemUpdatePreact)  # ItemApiLangNonLocalized, ItemApiLangLocalized, ItemApiLang,
@@ -58,6 +64,13 @@ class ItemService(ArrayService, SearchService, Service):
         default_image_id = get_default_image(request, 1)  # заглушка для thumbnails
         return [transform_list_view(item, tuple(language), default_image_id) for item in items]
 
+    @classmethod
+    def convert_rows_to_list_view(cls, request: Request, rows: List[dict], lang: str):
+        """ то же для строк item_list_view из ItemRepository.get_list_view_rows* """
+        language = tuple(cls.lang_sorted(lang))
+        default_image_id = get_default_image(request, 1)  # заглушка для thumbnails
+        return [transform_list_view_row(row, language, default_image_id) for row in rows]
+
     @classmethod
     def _level_up_(cls, lang_prefixes: list, item: dict) -> dict:
         """
@@ -147,8 +160,8 @@ class ItemService(ArrayService, SearchService, Service):
                             model: Type[Item], session: AsyncSession,
                             limit: int = 20):
         """Получение списка элементов для ListView с локализацией"""
-        items: List[ModelType] = await repository.get_list_view(model, session, limit)
-        return cls.convert_list_instance_to_list_view(request, items, lang)
+        rows: List[dict] = await repository.get_list_view_rows(model, session, limit)
+        return cls.convert_rows_to_list_view(request, rows, lang)
 
     @classmethod
     async def get_list_view_page(cls, request, page: int, page_size: int,
@@ -156,8 +169,8 @@ class ItemService(ArrayService, SearchService, Service):
                                  lang: str = 'en'):
         """Получение списка элементов для ListView с пагинацией и локализацией"""
         skip = (page - 1) * page_size
-        items, total = await repository.get_list_view_page(skip, page_size, model, session)
-        result = cls.convert_list_instance_to_list_view(request, items, lang)
+        rows, total = await repository.get_list_view_page_rows(skip, page_size, model, session)
+        result = cls.convert_rows_to_list_view(request, rows, lang)
         return make_paginated_response(result, total, page, page_size)
 
     @classmethod
@@ -176,6 +189,13 @@ class ItemService(ArrayService, SearchService, Service):
         # список всех локализованных полей приложения
         return item
 
+    @classmethod
+    async def get_detail_view_json(cls, request: Request, lang: str, id: int, repository: ItemRepository,
+                                   model: Item, session: AsyncSession) -> Optional[bytes]:
+        """ то же что get_detail_view, но JSON собирается в PostgreSQL - готовые bytes для ответа """
+        default_image_id = get_default_image(request, 0)  # заглушка для thumbnails
+        return await repository.get_detail_json(id, cls.lang_sorted(lang), default_image_id, session)
+
     @classmethod
     async def create_relation(cls, data: ItemCreateRelation, repository: ItemRepository,
                               model: Item, session: AsyncSession, **kwargs) -> ItemRead:
@@ -235,7 +255,7 @@ class ItemService(ArrayService, SearchService, Service):
         if not item_instance:
             raise HTTPException(status_code=404, detail=f'Item records with {item_id=} not found')
         result = await repository.patch(item_instance, item_dict, session)
-        await cls.pre_run_background_task(drink_id, background_tasks, DrinkRepository, Drink)
+        result['job'] = await cls.pre_run_background_task(drink_id, background_tasks, DrinkRepository, Drink, session)
         return result
 
     @classmethod
@@ -349,12 +369,14 @@ class ItemService(ArrayService, SearchService, Service):
 
                 # Коммитим каждые 1500 записей
                 if batch_count >= cls.BATCH_SIZE:
+                    SearchResultCache.mark(session)
                     await session.commit()
                     logger.info(f"Зафикисирован батч: {cls.BATCH_SIZE} записей")
                     batch_count = 0
                     # После коммита объекты в сессии инвалидируются,
                     # стрим продолжит работу со следующими
 
+            SearchResultCache.mark(session)
             await session.commit()  # финальный остаток
             logger.success('индексация завершена')
 
@@ -366,8 +388,8 @@ class ItemService(ArrayService, SearchService, Service):
             return []
         # получение списка
         ids: list = await cls.search_items(request, query, limit, cls.repository, cls.model, session)
-        items: List[ModelType] = await cls.repository.get_list_view_by_ids(ids, cls.model, session)
-        return cls.convert_list_instance_to_list_view(request, items, lang)
+        rows: List[dict] = await cls.repository.get_list_view_rows_by_ids(ids, cls.model, session)
+        return cls.convert_rows_to_list_view(request, rows, lang)
 
     @classmethod
     async def execute_smart_search_page(cls, request, lang: str, query: str, session: AsyncSession,
@@ -375,19 +397,92 @@ class ItemService(ArrayService, SearchService, Service):
                                         last_score: Optional[Union[Decimal, str, float]
                                                              ] = None,  # заглушка для совместимости
                                         last_id: Optional[int] = None,
+                                        backend: Optional[str] = None,
+                                        cursor: Optional[str] = None,
                                         ) -> Dict:
-        if not query:
-            query_data = None
-        query_data = cls.prepare_query(query)  # , cursor = cursor)
-        items, anchors = await cls.repository.find_items_smart_page(
-            session=session,
-            query_data=query_data,
-            last_score=last_score,
-            last_id=last_id,
-            limit=limit
-        )
-        result = cls.convert_list_instance_to_list_view(request, items, lang)
-        return {'items': result, 'anchors': anchors}
+        """
+            backend: 'pg' - FTS PostgreSQL, 'memory' - ItemSearchIndex (по умолчанию settings.SMART_SEARCH_BACKEND)
+            пустой запрос - всегда PostgreSQL (просмотр всех)
+            cursor (или первая страница при settings.SEARCH_SESSIONS) - серверная сессия поиска,
+            last_score / last_id - keyset
+        """
+        if query and (backend or settings.SMART_SEARCH_BACKEND) == 'memory':
+            pairs, anchors = await ItemSearchIndex.search_page(query, session, last_score, last_id, limit)
+            rows = await cls.repository.get_list_view_rows_by_scores(session, pairs)
+            result = {'items': cls.convert_rows_to_list_view(request, rows, lang), 'anchors': anchors}
+        else:
+            query_data = cls.prepare_query(query)  # , cursor = cursor)
+            if cursor or (settings.SEARCH_SESSIONS and last_score is None and last_id is None):
+                result = await cls.execute_search_session_page(request, lang, query_data, session, limit, cursor)
+            else:
+                items, anchors = await cls.repository.find_items_smart_page(
+                    session=session,
+                    query_data=query_data,
+                    last_score=last_score,
+                    last_id=last_id,
+                    limit=limit
+                )
+                result = {'items': cls.convert_rows_to_list_view(request, items, lang), 'anchors': anchors}
+        if query and not result['items'] and settings.SEARCH_SUGGESTIONS and not (cursor or last_id):
+            result['suggestions'] = await cls.did_you_mean(query, lang, session)
+        return result
+
+    @classmethod
+    async def execute_hybrid_search(cls, request, lang: str, query: str, session: AsyncSession, ch_client=None,
+                                    limit: int = 20, offset: int = 0) -> Dict:
+        """
+            гибридный поиск (HybridSearch): PostgreSQL FTS + clickhouse параллельно, reciprocal rank fusion
+            {'items': страница, 'total': длина объединенного списка, 'backends': {движок: статус, мс, кол-во}}
+        """
+        if not query or not query.strip():
+            return {'items': [], 'total': 0, 'backends': {}}
+        pairs, report = await HybridSearch.search(query, ch_client, max(settings.HYBRID_DEPTH, offset + limit))
+        rows = await cls.repository.get_list_view_rows_by_scores(session, pairs[offset:offset + limit])
+        return {'items': cls.convert_rows_to_list_view(request, rows, lang), 'total': len(pairs), 'backends': report}
+
+    @classmethod
+    async def did_you_mean(cls, query: str, lang: str, session: AsyncSession, limit: int = 5) -> List[str]:
+        """ названия напитков, похожие на запрос (опечатки) - для пустой выдачи поиска """
+        found = await FuzzyMatchService.lookup(Drink, query, lang, session, limit, bases=('title', 'subtitle'))
+        return list(dict.fromkeys(' '.join(filter(None, (row['title'], row['subtitle']))) for row in found))
+
+    @classmethod
+    async def execute_search_session_page(cls, request, lang: str, query_data, session: AsyncSession,
+                                          limit: int = 20, cursor: Optional[str] = None,
+                                          jump_pages: int = 5) -> Dict:
+        """
+            страница из сессии поиска (SearchSessionStore): ранжируются строки до последнего якоря страницы,
+            сессия растет лениво - продолжением после последней строки (не дальше SEARCH_SESSION_ROWS),
+            страница - срез по смещению O(limit); якоря как в find_items_smart_page + cursor
+        """
+        key = SearchSessionStore.query_key(query_data)
+        sid, offset = SearchSessionStore.decode_cursor(cursor)
+        needed = min(offset + limit * jump_pages, settings.SEARCH_SESSION_ROWS)
+        if (search := SearchSessionStore.get(sid, key)) is None:
+            pairs = await cls.repository.rank_smart_items(session, query_data, needed + 1)
+            sid, search = SearchSessionStore.create(key, pairs, needed)
+        elif search.truncated and len(search.ids) <= needed:
+            # удвоение - амортизированно O(строк) на всю сессию
+            requested = min(max(needed, 2 * (len(search.ids) - 1)), settings.SEARCH_SESSION_ROWS) + 1 - len(search.ids)
+            pairs = await cls.repository.rank_smart_items(session, query_data, requested,
+                                                          after=(search.scores[-1], search.ids[-1]))
+            search = SearchSessionStore.extend(sid, search, pairs, requested)
+        if not search.covers(offset, limit):
+            # за пределами обрезанной сессии - keyset от строки offset включительно
+            offset = min(offset, len(search.ids) - 1)
+            items, anchors = await cls.repository.find_items_smart_page(
+                session=session, query_data=query_data, last_score=f'{search.scores[offset]:.8f}',
+                last_id=int(search.ids[offset]), limit=limit, jump_pages=jump_pages)
+            return {'items': cls.convert_rows_to_list_view(request, items, lang), 'anchors': anchors}
+        rows = await cls.repository.get_list_view_rows_by_scores(session, search.pairs(offset, limit))
+        anchors = []
+        for page in range(1, jump_pages + 1):
+            start = offset + page * limit
+            if start >= len(search.ids):
+                break
+            anchors.append({'page_offset': page, 'last_score': f'{search.scores[start]:.8f}',
+                            'last_id': int(search.ids[start]), 'cursor': SearchSessionStore.encode_cursor(sid, start)})
+        return {'items': cls.convert_rows_to_list_view(request, rows, lang), 'anchors': anchors}
 
     @classmethod
     async def add_image_by_fid(
@@ -0,0 +1 @@
+# app.support.job.__init__.py
@@ -0,0 +1,68 @@
+# app.support.job.router.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth.dependencies import get_active_user_or_internal
+from app.core.config.project_config import settings
+from app.core.models.job_model import ACTIVE, FINISHED
+from app.core.services.job_service import JobRunner
+
+
+class JobRouter:
+    def __init__(self):
+        prefix = 'jobs'
+        self.tags, self.prefix = [f'{prefix}'], f'/{prefix}'
+        self.router = APIRouter(
+            prefix=self.prefix, tags=self.tags, dependencies=[Depends(get_active_user_or_internal)]
+        )
+        self.setup_routes()
+
+    def setup_routes(self):
+        self.router.add_api_route(
+            "", self.get_jobs, methods=["GET"],
+            openapi_extra={'x-request-schema': None}
+        )
+        self.router.add_api_route(
+            "/queues", self.get_queues, methods=["GET"],
+            openapi_extra={'x-request-schema': None}
+        )
+        self.router.add_api_route(
+            "/{id}", self.get_job, methods=["GET"],
+            openapi_extra={'x-request-schema': None}
+        )
+        self.router.add_api_route(
+            "/{id}/cancel", self.cancel_job, methods=["POST"],
+            openapi_extra={'x-request-schema': None}
+        )
+
+    async def get_jobs(self,
+                       status: Optional[str] = Query(None, description=f'статус: {", ".join(ACTIVE + FINISHED)}'),
+                       name: Optional[str] = Query(None, description='задача, см. /jobs/queues'),
+                       limit: Optional[int] = Query(None, ge=1, le=1000)) -> dict:
+        """
+        фоновые задачи, новые сверху: прогресс, скорость (rate, шт/сек), оставшееся время (eta, сек), ошибки
+        """
+        return {'result': await JobRunner.list(status, name, limit)}
+
+    async def get_queues(self) -> dict:
+        """
+        arq-очереди: max_jobs, nice, timeout, ожидающих задач (queued) и задачи очереди; arq - выполнение в воркерах
+        """
+        return {'arq': settings.ARQ_JOBS, 'result': await JobRunner.queues_state()}
+
+    async def get_job(self, id: int) -> dict:
+        """
+        состояние фоновой задачи
+        """
+        if (job := await JobRunner.get(id)) is None:
+            raise HTTPException(status_code=404, detail=f'job {id} not found')
+        return job
+
+    async def cancel_job(self, id: int) -> dict:
+        """
+        отмена: ожидающая задача отменяется сразу, выполняющаяся - на ближайшем сохранении прогресса
+        """
+        if (job := await JobRunner.cancel(id)) is None:
+            raise HTTPException(status_code=404, detail=f'job {id} not found')
+        return job
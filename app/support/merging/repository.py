@@ -31,44 +31,51 @@ class MergingRepository(DrinkRepository):
 
         # Разбиваем весь список пар на чанки (например, по 500 пар за раз)
         for i in range(0, len(pairs_ids), chunk_size):
-            chunk = pairs_ids[i: i + chunk_size]
+            total_processed += await cls.merge_chunk(pairs_ids[i: i + chunk_size], session)
+        all_source_ids = set(id for _, id in pairs_ids)
+        logger.warning(all_source_ids)
+        await cls.delete_sources(all_source_ids, session)
 
-            # Собираем ID только для текущего чанка
-            current_ids = set()
-            for t_id, s_id in chunk:
-                current_ids.update([t_id, s_id])
+        return {"success": True, "total_processed": total_processed, "deleted_records": len(all_source_ids)}
 
-            # Загружаем объекты текущего чанка
-            stmt = cls.get_distill_query().where(cls.model.id.in_(current_ids))
-            result = await session.execute(stmt)
-            objects_map = {obj.id: obj for obj in result.scalars().all()}
+    @classmethod
+    async def merge_chunk(cls, chunk: list[tuple[int, int]], session: AsyncSession) -> int:
+        """ слияние одного чанка пар (target_id, source_id) -> кол-во объединенных пар """
+        # Собираем ID только для текущего чанка
+        current_ids = set()
+        for t_id, s_id in chunk:
+            current_ids.update([t_id, s_id])
 
-            # Формируем пары инстансов
-            ready_pairs = []
-            for t_id, s_id in chunk:
-                target = objects_map.get(t_id)
-                source = objects_map.get(s_id)
-                if target and source:
-                    ready_pairs.append((target, source))
+        # Загружаем объекты текущего чанка
+        stmt = cls.get_distill_query().where(cls.model.id.in_(current_ids))
+        result = await session.execute(stmt)
+        objects_map = {obj.id: obj for obj in result.scalars().all()}
 
-            # Выполняем слияние для текущего чанка
-            if ready_pairs:
-                await cls._execute_merge_logic(ready_pairs, session)
-                total_processed += len(ready_pairs)
+        # Формируем пары инстансов
+        ready_pairs = []
+        for t_id, s_id in chunk:
+            target = objects_map.get(t_id)
+            source = objects_map.get(s_id)
+            if target and source:
+                ready_pairs.append((target, source))
 
-                # Фиксируем изменения в БД для текущего чанка и очищаем память
-                await session.flush()  # session.expunge_all() -- раскомментируй, если объектов ОЧЕНЬ много и память течет
-        all_source_ids = set(id for _, id in pairs_ids)
-        logger.warning(all_source_ids)
-        if all_source_ids:
+        # Выполняем слияние для текущего чанка
+        if ready_pairs:
+            await cls._execute_merge_logic(ready_pairs, session)
+            # Фиксируем изменения в БД для текущего чанка и очищаем память
+            await session.flush()  # session.expunge_all() -- раскомментируй, если объектов ОЧЕНЬ много и память течет
+        return len(ready_pairs)
+
+    @classmethod
+    async def delete_sources(cls, source_ids: set, session: AsyncSession):
+        """ удаление объединенных записей и их items """
+        if source_ids:
             # Используем delete() вместо session.delete() для скорости и избежания проблем с объектами в памяти
             model = Item
-            await session.execute(delete(model).where(model.drink_id.in_(all_source_ids)))
-            await session.execute(delete(cls.model).where(cls.model.id.in_(all_source_ids)))
+            await session.execute(delete(model).where(model.drink_id.in_(source_ids)))
+            await session.execute(delete(cls.model).where(cls.model.id.in_(source_ids)))
             await session.flush()
 
-        return {"success": True, "total_processed": total_processed, "deleted_records": len(all_source_ids)}
-
     @staticmethod
     async def _execute_merge_logic(pairs: list[tuple], session: AsyncSession):
         for target, source in pairs:
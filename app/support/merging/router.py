@@ -33,7 +33,7 @@ class MergingRouter:
 
     async def get_drinks_data(self, service: MergingService = Depends()) -> dict:
         """
-
+        запуск слияния пар drinks_lwins (задача merging), прогресс - /jobs/{id}
         """
         response = await service.get_drinks_data()
         return {'result': response}
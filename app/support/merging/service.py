@@ -2,13 +2,17 @@
 from typing import Dict, List
 
 from fastapi import Depends
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.config.database.db_async import get_db
+from app.core.config.database.db_async import DatabaseManager, get_db
 from app.core.repositories.clickhouse_repository import ClickHouseRepositoryFactory
+from app.core.services.job_service import JobContext, JobRunner
 from app.core.utils.pydantic_utils import list_dict
 from app.dependencies import get_clickhouse_repository_factory
 from app.support.merging.repository import MergingRepository
 
+MERGE_CHUNK = 500   # пар в одной транзакции задачи merging
+
 
 class MergingService:
     def __init__(self, session: AsyncSession = Depends(get_db),
@@ -30,17 +34,35 @@ class MergingService:
         result: List[Dict] = await self.click_repo.get_all(order_by='id', fields=['id', 'id_old', 'dict'])
         return result
 
-    async def get_drinks_data(self):
+    async def get_drinks_data(self) -> dict:
+        """
+            слияние пар drinks_lwins - задача merging (JobRunner), прогресс и отмена - /jobs
+        """
+        return await JobRunner.submit('merging', {}, 'merging')
+
+    @staticmethod
+    async def merging_job(ctx: JobContext):
         """
-            получает данные по id
+            обработчик merging: чанки MERGE_CHUNK пар, commit после каждого, checkpoint - смещение в списке пар
+            (список drinks_lwins упорядочен по id, источники удаляются только в конце - смещение не сдвигается)
         """
+        click_repo = ctx.state.ch_repo_factory.for_table('drinks_lwins')
+        response: List[Dict] = await click_repo.get_all(order_by='id', fields=['id', 'id_old', 'dict'])
         # список пар инстанс - old instance
-        response = await self.get_drinks_lwins()
-        if not response:
-            return
-        source = [(val['id'], val['id_old']) for val in response]
-        # ids = tuple(source.keys())
-        # result: List = await self.repository.get_drinks_by_ids(ids, self.session)
-        # return list_dict(result)
-        result = await self.repository.get_and_merge_pairs_batched(source, self.session, 500)
-        return result
+        source = [(val['id'], val['id_old']) for val in response or []]
+        ctx.progress(total=len(source))
+        offset = (ctx.checkpoint or {}).get('offset', 0)
+        merged = 0
+        for start in range(offset, len(source), MERGE_CHUNK):
+            chunk = source[start: start + MERGE_CHUNK]
+            async with DatabaseManager.session_maker() as session:
+                merged += await MergingRepository.merge_chunk(chunk, session)
+                await session.commit()
+            ctx.progress(len(chunk), {'offset': start + len(chunk)})
+        async with DatabaseManager.session_maker() as session:
+            await MergingRepository.delete_sources({id for _, id in source}, session)
+            await session.commit()
+        logger.success(f'merging: объединено {merged} пар (с offset {offset}), удалено {len(source)}')
+
+
+JobRunner.register('merging', 'db-maintenance')(MergingService.merging_job)
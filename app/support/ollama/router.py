@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.enum import Preset, Prompts, Languages, Writers
 from app.core.config.database.db_async import get_db
 from app.core.routers.base import BaseRouter
+from app.core.schemas.base import BatchCreateResponse
 from app.core.utils.common_utils import compare_lists_compact, jprint
 from app.support.ollama.model import Ollama, Prompt, ISOLanguage, Proption, WriterRule
 from app.support.ollama.schemas import (LlmResponseSchema, OllamaCreate, PromptCreate,
@@ -147,7 +148,7 @@ class ISOLanguageRouter(BaseRouter):
     def setup_routes(self):
         self.router.add_api_route(
             "/batch", self.batch_create, status_code=200, methods=['POST'],
-            response_model=List[self.read_schema_relation],
+            response_model=List[BatchCreateResponse[self.read_schema_relation]],
             openapi_extra={'x-request-schema': f"List_{self.create_schema_relation.__name__}"}
         )
         super().setup_routes()
@@ -156,7 +157,7 @@ class ISOLanguageRouter(BaseRouter):
         return await super().create(data, session)
 
     async def batch_create(self, data: List[ISOLanguageCreate],
-                           session: AsyncSession = Depends(get_db)) -> List[ISOLanguageRead]:
+                           session: AsyncSession = Depends(get_db)) -> List[BatchCreateResponse[ISOLanguageRead]]:
         return await super().batch_create(data, session)
 
     async def patch(self, id: int, data: ISOLanguageUpdate,
@@ -2,7 +2,7 @@
 
 import asyncio
 import random
-from sqlalchemy import select
+from sqlalchemy import func, select
 # from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
 from urllib.parse import urljoin, urlparse, parse_qs
@@ -15,6 +15,8 @@ from app.support.parser.model import Registry, Code, Status, Name, Rawdata
 from app.support.parser.repository import RegistryRepository, CodeRepository, StatusRepository
 # from app.core.repositories.sqlalchemy_repository import Repository
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config.database.db_async import DatabaseManager
+from app.core.services.job_service import JobContext, JobRunner
 
 BATCH_SIZE = settings.BATCH_SIZE
 
@@ -476,6 +478,37 @@ class ParserOrchestrator:
             await self.session.rollback()
             return {"status": "failed", "error": str(e)}
 
+    @staticmethod
+    async def parse_names_job(ctx: JobContext):
+        """
+            обработчик parse_names (очередь crawl): Name без статуса completed в порядке id пачками BATCH_SIZE,
+            commit после пачки, checkpoint - последний name_id пачки
+        """
+        after = (ctx.checkpoint or {}).get('name_id', 0)
+        async with DatabaseManager.session_maker() as session:
+            status_completed = await StatusRepository.get_by_fields({"status": "completed"}, Status, session)
+            if not status_completed:
+                raise ValueError("Status 'completed' not found")
+            pending = select(Name.id).where(Name.status_id != status_completed.id)
+            if ctx.total is None:
+                ctx.progress(total=await session.scalar(select(func.count()).select_from(pending.subquery())))
+            orchestrator = ParserOrchestrator(session)
+            while True:
+                stmt = (select(Name).where(Name.status_id != status_completed.id, Name.id > after)
+                        .order_by(Name.id).limit(BATCH_SIZE))
+                names = (await session.execute(stmt)).scalars().all()
+                if not names:
+                    break
+                failed = 0
+                for name in names:
+                    if not await orchestrator._fill_rawdata_for_name(name):
+                        failed += 1
+                    await asyncio.sleep(random.uniform(settings.ARQ_MIN_DELAY, settings.ARQ_MAX_DELAY))
+                after = names[-1].id
+                await session.commit()
+                ctx.progress(len(names), {'name_id': after}, errors=failed,
+                             error=f'name {after}: rawdata не заполнены' if failed else None)
+
     async def _fill_rawdata_for_name(self, name: Name) -> bool:
         """Заполняет RawData для Name, НЕ делая commit. Возвращает True при успехе."""
         try:
@@ -561,3 +594,6 @@ def build_page_url(base_url: str, page: int) -> str:
     params["p"] = [str(page)]
     new_query = "&".join(f"{k}={v[0]}" for k, v in params.items())
     return urlunsplit((scheme, netloc, path, new_query, fragment))
+
+
+JobRunner.register('parse_names', 'crawl')(ParserOrchestrator.parse_names_job)
@@ -2,7 +2,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
 from sqlalchemy import select, and_
-import asyncio
 from fastapi import Depends, Query, HTTPException
 from typing import Optional
 from app.core.config.database.db_async import get_db
@@ -14,10 +13,9 @@ from app.support.parser.service import RawdataService
 from app.support.parser.orchestrator import ParserOrchestrator
 from app.support.parser.repository import StatusRepository, RawdataRepository
 from app.core.config.database.db_async import DatabaseManager
+from app.core.services.job_service import JobRunner
 from app.core.utils.exception_handler import ValidationError_handler
 
-background_tasks = set()  # чтобы ссылка не удалилась
-
 
 class OrchestratorRouter(LightRouter):
     def __init__(self):
@@ -111,22 +109,12 @@ class OrchestratorRouter(LightRouter):
         result = await orchestrator.parse_rawdata_from_name(name)
         return result
 
-    async def start_background_parsing(self, session: AsyncSession = Depends(get_db)):
-
-        orchestrator = ParserOrchestrator(session)
+    async def start_background_parsing(self) -> dict:
         """
-            Это не production-ready для долгих задач (при рестарте приложения задача прервётся).
-            Для продакшена — использовать Celery + Redis/RabbitMQ или arq.
+            заполнение rawdata для всех Name - задача parse_names (очередь crawl),
+            продолжается с checkpoint после рестарта; прогресс и отмена - /jobs/{id}
         """
-        async def run():
-            result = await orchestrator.process_all_names_in_background()
-            print("Background parsing finished:", result)
-
-        task = asyncio.create_task(run())
-        background_tasks.add(task)
-        task.add_done_callback(background_tasks.discard)
-
-        return {"message": "Background parsing started"}
+        return await JobRunner.submit('parse_names', {}, 'parse_names')
 
     async def enqueue_raw_parsing(self, name_id: int):
         from arq import create_pool
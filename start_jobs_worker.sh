@@ -0,0 +1,4 @@
+#!/bin/sh
+# start_jobs_worker.sh
+# воркер очереди фоновых задач: CpuImagesWorker | LlmWorker | DbMaintenanceWorker | CrawlWorker
+exec arq app.jobs_arq_worker.${1:-DbMaintenanceWorker}
@@ -0,0 +1,138 @@
+# tests/tests_unit/test_batch_get_or_create.py
+"""
+    модульные тесты Repository.batch_get_or_create: порядок (instance, created), повторы во входных данных,
+    путь без уникального индекса, заглушки зависимых моделей, пачки по BULK_MAX_PARAMS,
+    нечеткое сопоставление дублей (Service.batch_get_or_create, FUZZY_DEDUP), схема ответа /batch
+    БД заменена FakeDB: таблицы в памяти, ON CONFLICT по unaccent(lower(name))
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pydantic import TypeAdapter
+
+import app.support  # noqa: F401 регистрация моделей
+from app.core.config.project_config import settings
+from app.core.models.base_model import get_model_by_name
+from app.core.repositories.sqlalchemy_repository import Repository
+from app.core.schemas.base import BatchCreateResponse
+from app.core.services.fuzzy_service import FuzzyMatchService
+from app.core.services.service import Service
+from app.core.utils.pydantic_utils import get_pyschema
+
+Category = get_model_by_name('Category')
+Region = get_model_by_name('Region')
+
+
+def result(ids=(), pairs=()):
+    return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(ids)), all=lambda: list(pairs))
+
+
+class FakeDB:
+    def __init__(self, **tables):
+        self.tables = {name: [SimpleNamespace(id=n, **row) for n, row in enumerate(rows, 1)]
+                       for name, rows in tables.items()}
+        self.params = []        # bind-параметров на запрос
+        self.info = {}
+
+    @staticmethod
+    def key(value):
+        return value.lower() if isinstance(value, str) else value
+
+    def insert(self, stmt):
+        rows = [{col.key: value for col, value in row.items()} for row in stmt._multi_values[0]]
+        self.params.append(sum(len(row) for row in rows))
+        table = self.tables.setdefault(stmt.table.name, [])
+        ids = []
+        for row in rows:
+            if stmt._post_values_clause is not None and 'name' in row and row['name'] is not None \
+                    and any(self.key(r.name) == self.key(row['name']) for r in table):
+                continue
+            table.append(SimpleNamespace(id=len(table) + 1, **row))
+            ids.append(len(table))
+        return result(ids)
+
+    def match(self, chunk, default, normalized, model, start):
+        self.params.append(len(chunk) * (len(default) + 1))
+        pairs = []
+        for n, row in enumerate(chunk, start):
+            for record in self.tables.get(model.__tablename__, []):
+                if all((self.key if normalized else str)(getattr(record, f, None)) ==
+                       (self.key if normalized else str)(row.get(f)) for f in default):
+                    pairs.append((record, n))
+        return result(pairs=pairs)
+
+    async def commit(self):
+        pass
+
+    async def execute(self, stmt):
+        if isinstance(stmt, tuple):
+            return self.match(*stmt)
+        return self.insert(stmt)
+
+
+@pytest.fixture(autouse=True)
+def fake_match(monkeypatch):
+    monkeypatch.setattr(Repository, '_batch_match_stmt',
+                        classmethod(lambda cls, *args: args))
+    monkeypatch.setattr(settings, 'BULK_MAX_PARAMS', 4)
+
+
+def test_order_and_repeats_with_unique_index():
+    db = FakeDB(categories=[{'name': 'Wine'}])
+    rows = [{'name': 'Beer'}, {'name': 'wine'}, {'name': 'Cider'}, {'name': 'BEER'}, {'name': 'Sake'},
+            {'name': 'Rum'}]
+    output = asyncio.run(Repository.batch_get_or_create(rows, ['name'], Category, db))
+    assert [(instance.name, created) for instance, created in output] == [
+        ('Beer', True), ('Wine', False), ('Cider', True), ('Beer', False), ('Sake', True), ('Rum', True)]
+    assert output[0][0] is output[3][0]
+    assert max(db.params) <= settings.BULK_MAX_PARAMS and len(db.params) > 3
+
+
+def test_fallback_without_unique_index_and_stubs():
+    """ Region: по name уникального индекса нет - SELECT существующих, INSERT недостающих (без повторов) """
+    assert Repository.get_conflict_target(Region, ['name'])[0] is None
+    db = FakeDB(regions=[{'name': 'Tuscany', 'country_id': 1}])
+    rows = [{'name': 'Rioja', 'country_id': 2}, {'name': 'Tuscany', 'country_id': 1},
+            {'name': 'Rioja', 'country_id': 2}, {'name': 'Mosel', 'country_id': 3, 'unknown': 1}]
+    output = asyncio.run(Repository.batch_get_or_create(rows, ['name'], Region, db))
+    assert [(instance.name, created) for instance, created in output] == [
+        ('Rioja', True), ('Tuscany', False), ('Rioja', False), ('Mosel', True)]
+    assert [r.name for r in db.tables['regions']] == ['Tuscany', 'Rioja', 'Mosel']
+    # заглушки вниз по цепочке: region -> subregion -> ...
+    subregions = db.tables['subregions']
+    assert sorted(s.region_id for s in subregions) == [2, 3] and {s.name for s in subregions} == {None}
+    assert max(db.params) <= settings.BULK_MAX_PARAMS
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+def test_fuzzy_dedup_in_service(monkeypatch, enabled):
+    """ опечатка в имени справочника - существующая запись, а не новая """
+    db = FakeDB(categories=[{'name': 'Whisky'}, {'name': 'Wine'}])
+
+    async def find_duplicates(cls, model, names, session, score_cutoff=None):
+        return [{'whiskey': 1, 'wine': 2}.get(name.lower()) for name in names]
+
+    async def get_by_ids(cls, ids, model, session):
+        return [record for record in db.tables[model.__tablename__] if record.id in ids]
+
+    monkeypatch.setattr(settings, 'FUZZY_DEDUP', enabled)
+    monkeypatch.setattr(FuzzyMatchService, 'find_duplicates', classmethod(find_duplicates))
+    monkeypatch.setattr(Repository, 'get_by_ids', classmethod(get_by_ids))
+    monkeypatch.setattr('app.core.services.service.inst_dict', lambda instance: vars(instance))
+    rows = [{'name': 'Whiskey'}, {'name': 'Gin'}, {'name': 'Wine'}]
+    output = asyncio.run(Service.batch_get_or_create(rows, Repository, Category, db, ['name']))
+    assert [(item['data']['name'], item['created']) for item in output] == (
+        [('Whisky', False), ('Gin', True), ('Wine', False)] if enabled
+        else [('Whiskey', True), ('Gin', True), ('Wine', False)])
+
+
+def test_response_schema(monkeypatch):
+    """ ответ Service.batch_get_or_create проходит response_model роутера /batch """
+    db = FakeDB(categories=[{'name': 'Wine'}])
+    monkeypatch.setattr('app.core.services.service.inst_dict', lambda instance: vars(instance))
+    output = asyncio.run(Service.batch_get_or_create([{'name': 'Wine'}, {'name': 'Beer'}], Repository, Category, db,
+                                                     ['name']))
+    adapter = TypeAdapter(list[BatchCreateResponse[get_pyschema(Category, 'Read')]])
+    assert [(item.created, item.data.name) for item in adapter.validate_python(output)] == [
+        (False, 'Wine'), (True, 'Beer')]
@@ -0,0 +1,39 @@
+# tests/tests_unit/test_bulk_update.py
+"""
+    модульные тесты движка массового обновления
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import DeclarativeBase
+
+from app.core.repositories.bulk_update import bulk_update, group_by_columns
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class Thing(_Base):
+    __tablename__ = 'things_bulk_test'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    note = Column(String)
+
+
+def test_group_by_columns():
+    rows = [{'id': 1, 'name': 'a'}, {'id': 2, 'note': 'b', 'name': 'c'}, {'id': 3, 'name': 'd'}, {'id': 4}]
+    groups = group_by_columns(rows)
+    assert groups == {('name',): [rows[0], rows[2]], ('name', 'note'): [rows[1]]}
+
+
+async def test_bulk_update_batches_per_group():
+    result = MagicMock()
+    result.rowcount = 2
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=result)
+    rows = [{'id': n, 'name': f'n{n}'} for n in range(5)] + [{'id': 9, 'note': 'x', 'unknown': 1}]
+    affected = await bulk_update(rows, Thing, session, batch_size=2)
+    # name: 3 пачки (2 + 2 + 1), note: 1 пачка
+    assert session.execute.await_count == 4
+    assert affected == 8
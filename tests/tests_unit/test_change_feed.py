@@ -0,0 +1,151 @@
+# tests/tests_unit/test_change_feed.py
+"""
+    модульные тесты change feed search_content: покрытие таблиц, триггеры, накопление и пересчет,
+    один слушатель на кластер (advisory lock), фоновая синхронизация только без слушателя
+"""
+import asyncio
+
+import orjson
+import pytest
+
+import app.support  # noqa: F401 регистрация моделей
+from app.core.config.project_config import settings
+from app.core.models.base_model import get_model_by_name
+from app.core.repositories.reindex_pipeline import ReindexPipeline
+from app.core.services.service import Service
+from app.service_registry import _SEARCH_DEPENDENCIES
+from app.support.item import change_feed
+from app.core.repositories.search_paths import item_chain
+from app.support.item.change_feed import ChangeFeed, affected_items, feed_models
+
+
+@pytest.fixture(autouse=True)
+def clean_feed(monkeypatch):
+    monkeypatch.setattr(ChangeFeed, 'pending', {})
+    monkeypatch.setattr(ChangeFeed, '_wakeup', None)
+
+
+def test_paths_cover_search_dependencies():
+    models = feed_models()
+    assert {model.__table__.name for model in _SEARCH_DEPENDENCIES} | {'items', 'superfoods'} == set(models)
+    assert models['drink_food_associations'] is get_model_by_name('Drink')
+
+
+@pytest.mark.parametrize('table', ['countries', 'producertitles', 'superfoods', 'drink_varietal_associations'])
+def test_affected_items_follow_item_chain(table):
+    """ JOIN в пересчете - та же цепочка relationship, что search_paths.item_chain """
+    model = feed_models()[table]
+    sql = str(affected_items({table: [1]}))
+    joins = [f'JOIN {attr.property.mapper.local_table.name} ON' for attr in item_chain(model)]
+    assert sql.index(f'FROM {model.__tablename__}') < min(map(sql.index, joins))
+    assert [sql.index(join) for join in joins] == sorted(sql.index(join) for join in joins)
+
+
+def test_triggers_per_event():
+    sql = '\n'.join(change_feed.install_sql())
+    assert 'AFTER UPDATE ON regions' in sql and 'AFTER INSERT ON regions' not in sql
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        assert f'AFTER {event} ON drink_food_associations' in sql
+    assert 'n.drink_id IS DISTINCT FROM o.drink_id' in change_feed.changed_sql('items')
+
+
+def test_collect_coalesces():
+    ChangeFeed.collect(orjson.dumps({'t': 'regions', 'ids': [1, 2]}).decode())
+    ChangeFeed.collect(orjson.dumps({'t': 'regions', 'ids': [2, 3]}).decode())
+    ChangeFeed.collect(orjson.dumps({'t': 'unknown', 'ids': [1]}).decode())
+    ChangeFeed.collect('not json')
+    assert ChangeFeed.pending == {'regions': {1, 2, 3}}
+    assert ChangeFeed.wakeup().is_set()
+
+
+def test_flush_reindexes_affected_items(monkeypatch):
+    calls = []
+
+    async def run(cls, session_factory, skip_keys, pairs_stmt=None):
+        calls.append(pairs_stmt)
+        if len(calls) == 1:
+            raise RuntimeError('db down')
+        return {'read': {'rows': 3}, 'updated': 2}
+
+    monkeypatch.setattr(ReindexPipeline, 'run', classmethod(run))
+    ChangeFeed.pending = {'producers': {7}, 'drinks': {1}}
+    with pytest.raises(RuntimeError):
+        asyncio.run(ChangeFeed.flush(None, set()))
+    assert ChangeFeed.pending == {'producers': {7}, 'drinks': {1}}     # вернулись для повтора
+    report = asyncio.run(ChangeFeed.flush(None, set()))
+    assert report['updated'] == 2 and ChangeFeed.pending == {}
+    sql = str(calls[-1])
+    assert 'producers.id IN' in sql and 'drinks.id IN' in sql and ' UNION ' in sql
+    assert asyncio.run(ChangeFeed.flush(None, set())) is None
+
+
+class Stop(BaseException):
+    pass
+
+
+class FakeConnection:
+    """ psycopg.AsyncConnection: результат pg_try_advisory_lock и уведомления """
+    def __init__(self, locked: bool, payloads=()):
+        self.locked, self.payloads, self.sql = locked, payloads, []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.sql.append(sql)
+        locked = self.locked
+
+        class Cursor:
+            async def fetchone(self):
+                return (locked,)
+        return Cursor()
+
+    async def notifies(self):
+        for payload in self.payloads:
+            yield type('Notify', (), {'payload': payload})
+
+
+@pytest.mark.parametrize('locked', [True, False])
+def test_single_listener(monkeypatch, locked):
+    conn = FakeConnection(locked, [orjson.dumps({'t': 'regions', 'ids': [5]}).decode()])
+    delays = []
+
+    async def connect(conninfo, autocommit):
+        return conn
+
+    async def sleep(delay):
+        delays.append(delay)
+        raise Stop
+
+    monkeypatch.setattr(change_feed.psycopg.AsyncConnection, 'connect', connect)
+    monkeypatch.setattr(change_feed.asyncio, 'sleep', sleep)
+    with pytest.raises(Stop):
+        asyncio.run(ChangeFeed.listen('dsn'))
+    assert ('LISTEN search_feed' in conn.sql) == locked
+    assert ChangeFeed.pending == ({'regions': {5}} if locked else {})
+    assert delays == [settings.CHANGE_FEED_RETRY if locked else settings.CHANGE_FEED_STANDBY]
+    assert ChangeFeed.running is False
+
+
+@pytest.mark.parametrize('active', [True, False])
+def test_sync_fallback_only_without_listener(monkeypatch, active):
+    """ резервный процесс (running=False) не запускает синхронизацию, если слушатель есть в другом """
+    calls = []
+
+    async def feed_active(cls):
+        return active
+
+    async def run_sync_background(**kwargs):
+        calls.append(kwargs['start_id'])
+        return {'id': 11, 'name': 'search_reindex', 'status': 'running'}
+
+    Region = get_model_by_name('Region')
+    monkeypatch.setattr(ChangeFeed, 'active', classmethod(feed_active))
+    monkeypatch.setattr(ChangeFeed, 'running', False)
+    repository = type('Repo', (), {'run_sync_background': staticmethod(run_sync_background)})
+    job = asyncio.run(Service.pre_run_background_task(3, None, repository, Region))
+    assert calls == ([] if active else [3])
+    assert job == (None if active else {'id': 11, 'name': 'search_reindex', 'status': 'running'})
@@ -0,0 +1,80 @@
+# tests/tests_unit/test_click_search.py
+"""
+    модульные тесты построения запросов FullTextSearch (clickhouse): без FINAL, предфильтр, LIMIT / OFFSET,
+    prepare при старте: колонка версии (иначе FINAL), skip index только если его нет
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.services.click_service import FullTextSearch, split_tokens
+
+
+class FakeClient:
+    def __init__(self, rows, system=None):
+        self.rows, self.queries, self.commands = rows, [], []
+        self.system = {'columns': 1, 'data_skipping_indices': 0, 'mutations': 0, **(system or {})}
+
+    async def command(self, sql):
+        self.commands.append(sql)
+
+    async def query(self, sql, parameters):
+        for table, count in self.system.items():
+            if f'FROM system.{table} ' in sql:
+                return SimpleNamespace(result_rows=[(count,)])
+        self.queries.append((sql, parameters))
+        return SimpleNamespace(result_rows=self.rows)
+
+
+@pytest.fixture(autouse=True)
+def clean_versions(monkeypatch):
+    monkeypatch.setattr(FullTextSearch, '_versions', {})
+
+
+def test_split_tokens():
+    assert split_tokens('Red, red WINE-2020') == ['red', 'wine', '2020']
+
+
+def test_ranked_build():
+    prefilter, condition, score, params = FullTextSearch.build('red wine', 'auto')
+    assert prefilter == '(hasToken(search_content, {w0:String}) OR hasToken(search_content, {w1:String}))'
+    assert condition.startswith('(hasToken(content, {w0:String}) OR')
+    assert score == 'hasToken(content, {w0:String}) + hasToken(content, {w1:String})'
+    assert params == {'w0': 'red', 'w1': 'wine'}
+    assert FullTextSearch.build('red wine', 'word')[3] == {'w0': 'red'}
+    assert ' AND ' in FullTextSearch.build('red wine', 'and')[1]
+    assert FullTextSearch.build('"red wine"', 'auto')[1].startswith('positionCaseInsensitive')
+    assert FullTextSearch.build('  ', 'auto') is None
+
+
+def test_search_pushes_down_paging():
+    client = FakeClient([(7, 2, 41), (3, 1, 41)])
+    asyncio.run(FullTextSearch.prepare(client, 'items_search'))
+    pairs, total = asyncio.run(FullTextSearch.search('red wine', 'items_search', client, limit=20, offset=40))
+    assert pairs == [(7, 2.0), (3, 1.0)] and total == 41
+    sql, params = client.queries[0]
+    assert 'FINAL' not in sql and 'argMax(search_content, _version)' in sql and 'send_logs_level' not in sql
+    assert 'LIMIT {limit:UInt32} OFFSET {offset:UInt32}' in sql
+    assert params['limit'] == 20 and params['offset'] == 40
+    assert asyncio.run(FullTextSearch.search('', 'items_search', client)) == ([], 0)
+
+
+@pytest.mark.parametrize('system, commands', [({}, ['ADD INDEX', 'MATERIALIZE INDEX']),
+                                              ({'mutations': 1}, ['ADD INDEX']),
+                                              ({'data_skipping_indices': 1}, [])])
+def test_prepare_skip_index_once(system, commands):
+    """ DDL только при старте и только если индекса нет; поиск команд не выполняет """
+    client = FakeClient([], system)
+    asyncio.run(FullTextSearch.prepare(client, 'items_search'))
+    assert [next(c for c in ('ADD INDEX', 'MATERIALIZE INDEX') if c in sql) for sql in client.commands] == commands
+    asyncio.run(FullTextSearch.search('red', 'items_search', client))
+    assert len(client.commands) == len(commands)
+
+
+def test_missing_version_column_falls_back_to_final():
+    client = FakeClient([(1, 1, 1)], {'columns': 0, 'data_skipping_indices': 1})
+    asyncio.run(FullTextSearch.prepare(client, 'items_search'))
+    asyncio.run(FullTextSearch.search('red', 'items_search', client))
+    sql = client.queries[0][0]
+    assert 'items_search FINAL WHERE (hasToken(search_content' in sql and 'argMax' not in sql
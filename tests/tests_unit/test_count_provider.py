@@ -0,0 +1,88 @@
+# tests/tests_unit/test_count_provider.py
+"""
+    модульные тесты подсчета total для пагинации
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import Column, Integer, select, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase
+
+from app.core.repositories.count_provider import CountMode, CountProvider, Total
+from app.core.repositories.table_version import TableVersion
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class Thing(_Base):
+    __tablename__ = 'things_count_test'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+def make_session(value: int):
+    result = MagicMock()
+    result.scalar.return_value = value
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=result)
+    return session
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    CountProvider.clear()
+    yield
+    CountProvider.clear()
+
+
+def test_total_behaves_like_int():
+    total = Total(7, CountMode.CACHED)
+    assert total == 7 and total > 0
+    assert total.mode == 'cached'
+
+
+async def test_cached_count_reused_between_pages():
+    session = make_session(42)
+    stmt = select(Thing).where(Thing.name == 'x').order_by(Thing.id)
+    first = await CountProvider.count(stmt.offset(0).limit(10), session, CountMode.CACHED)
+    second = await CountProvider.count(stmt.offset(10).limit(10), session, CountMode.CACHED)
+    assert (first, first.mode) == (42, 'exact')
+    assert (second, second.mode) == (42, 'cached')
+    assert session.execute.await_count == 1
+
+
+async def test_cached_count_invalidated_by_write():
+    session = make_session(3)
+    stmt = select(Thing)
+    await CountProvider.count(stmt, session, CountMode.CACHED)
+    CountProvider.invalidate(Thing)
+    total = await CountProvider.count(stmt, session, CountMode.CACHED)
+    assert total.mode == 'exact'
+    assert session.execute.await_count == 2
+
+
+async def test_estimated_only_for_unfiltered():
+    session = make_session(10 ** 6)
+    total = await CountProvider.count(select(Thing), session, CountMode.ESTIMATED)
+    assert total.mode == 'estimated'
+    filtered = await CountProvider.count(select(Thing).where(Thing.id > 1), session, CountMode.ESTIMATED)
+    assert filtered.mode == 'exact'
+
+
+async def test_write_invalidates_after_commit():
+    """ до commit параллельный запрос видит старые данные - кешируется под старым поколением """
+    session, stmt = make_session(3), select(Thing)
+    writer = AsyncSession()
+    writer.sync_session.begin()
+    TableVersion.mark(writer, Thing)        # Repository.create: flush, commit - в get_db после ответа
+    await CountProvider.count(stmt, session, CountMode.CACHED)
+    assert (await CountProvider.count(stmt, session, CountMode.CACHED)).mode == 'cached'
+    await writer.commit()
+    assert (await CountProvider.count(stmt, session, CountMode.CACHED)).mode == 'exact'
+    writer.sync_session.begin()
+    TableVersion.mark(writer, Thing)
+    await writer.rollback()
+    assert (await CountProvider.count(stmt, session, CountMode.CACHED)).mode == 'cached'
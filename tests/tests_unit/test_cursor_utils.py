@@ -0,0 +1,31 @@
+# tests/tests_unit/test_cursor_utils.py
+"""
+    модульные тесты курсора keyset пагинации
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.core.exceptions import AppBaseException
+from app.core.utils.cursor_utils import Cursor, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize('value', [15, 'Côte-Rôtie', None, Decimal('12.50'),
+                                   datetime(2025, 11, 26, 10, 44, 9, tzinfo=timezone.utc)])
+def test_cursor_roundtrip(value):
+    cursor = Cursor('updated_at', True, value, 104, True)
+    token = encode_cursor(cursor)
+    assert '=' not in token
+    assert decode_cursor(token) == cursor
+
+
+def test_empty_cursor():
+    assert decode_cursor(None) is None
+    assert decode_cursor('') is None
+
+
+def test_invalid_cursor():
+    with pytest.raises(AppBaseException) as exc:
+        decode_cursor('not-a-cursor')
+    assert exc.value.status_code == 400
@@ -0,0 +1,64 @@
+# tests/tests_unit/test_db_pool.py
+"""
+    модульные тесты режимов пула DatabaseManager (settings_db.DB_POOL_MODE); соединения не открываются
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.core.config.database import db_async
+from app.core.config.database.db_async import DatabaseManager, statement_name
+from app.core.config.database.db_config import settings_db
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    for name in ('engine', 'session_maker', 'connection_string', 'pool_mode'):
+        monkeypatch.setattr(DatabaseManager, name, getattr(DatabaseManager, name))
+    monkeypatch.setattr(settings_db, 'DRIVER', 'asyncpg')
+    return DatabaseManager
+
+
+@pytest.mark.parametrize('driver, expected', [('asyncpg', {'prepared_statement_cache_size': 0,
+                                                           'statement_cache_size': 0}),
+                                              ('psycopg_async', {'prepare_threshold': None})])
+def test_null_mode_disables_prepared(manager, monkeypatch, driver, expected):
+    monkeypatch.setattr(settings_db, 'DRIVER', driver)
+    options = manager.engine_options('null')
+    assert options['poolclass'] is NullPool and options['connect_args'] == expected
+    assert 'pool_size' not in options
+
+
+def test_direct_mode_bypasses_pgbouncer(manager):
+    options = manager.engine_options('direct')
+    assert options['url'] == settings_db.direct_database_url != settings_db.database_url
+    assert options['poolclass'] is AsyncAdaptedQueuePool and options['pool_size'] == settings_db.POOL_SIZE
+    assert options['connect_args']['statement_cache_size'] == settings_db.DB_STATEMENT_CACHE
+    assert 'prepared_statement_name_func' not in options['connect_args']
+
+
+def test_pgbouncer_mode_unique_statement_names(manager, monkeypatch):
+    options = manager.engine_options('pgbouncer')
+    assert options['url'] == settings_db.database_url
+    assert options['connect_args']['prepared_statement_name_func'] is statement_name
+    assert len({statement_name() for _ in range(100)}) == 100
+    monkeypatch.setattr(settings_db, 'DRIVER', 'psycopg_async')
+    assert manager.engine_options('pgbouncer')['connect_args'] == {'prepare_threshold': settings_db.DB_PREPARE_THRESHOLD}
+
+
+def test_unknown_mode(manager):
+    with pytest.raises(ValueError):
+        manager.engine_options('session')
+
+
+def test_init_uses_configured_mode(manager, monkeypatch):
+    monkeypatch.setattr(settings_db, 'DB_POOL_MODE', 'pgbouncer')
+    manager.__init__()
+    try:
+        assert manager.pool_mode == 'pgbouncer' and isinstance(manager.engine.pool, AsyncAdaptedQueuePool)
+        assert manager.engine.pool.size() == settings_db.POOL_SIZE
+        manager.__init__('null')
+        assert isinstance(manager.engine.pool, db_async.NullPool)
+    finally:
+        asyncio.run(manager.close())
@@ -0,0 +1,25 @@
+# tests/tests_unit/test_detail_json.py
+"""
+    модульные тесты detail view, собранного в PostgreSQL: текст запроса
+"""
+import re
+
+from app.support.item.detail_json import _ml, detail_sql
+from app.support.item.model import Item
+
+
+def test_keys_follow_transform_order():
+    sql = detail_sql(('_ru', '', '_fr'))
+    keys = re.findall(r"^\s+'(\w+)', ", sql, re.MULTILINE)
+    assert keys == ['id', 'vol', 'count', 'image_id', 'alc', 'title', 'subtitle', 'description', 'country', 'region',
+                    'subregion', 'site', 'category', 'subcategory', 'varietal', 'pairing', 'source', 'first_vintage',
+                    'last_vintage', 'display_name', 'producer', 'anno', 'classification', 'vintageconfig',
+                    'designation']
+    assert ':id' in sql and ':default_image' in sql
+
+
+def test_multilang_order_and_missing_columns():
+    assert detail_sql(('_ru', '')) is detail_sql(('_ru', ''))
+    sql = detail_sql(('_ru', '', '_xx'))
+    assert "COALESCE(NULLIF(d.title_ru, ''), NULLIF(d.title, ''))" in sql
+    assert _ml('i', Item.__table__, 'name', ('',)) == 'NULL'
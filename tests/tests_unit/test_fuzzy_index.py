@@ -0,0 +1,68 @@
+# tests/tests_unit/test_fuzzy_index.py
+"""
+    модульные тесты нечеткого поиска: опечатки, языки, пачка запросов, изменения
+"""
+import pytest
+
+from app.core.utils import fuzzy_index
+from app.core.utils.fuzzy_index import COMPACT_MIN, FuzzyIndex
+
+ROWS = [(1, ('Château Margaux', 'Шато Марго')),
+        (2, ('Château Latour', None)),
+        (3, ('Cloudy Bay Sauvignon Blanc', '')),
+        (4, ('Penfolds Grange', 'Пенфолдс Грейндж'))]
+
+
+def make_index() -> FuzzyIndex:
+    index = FuzzyIndex()
+    index.update(ROWS)
+    return index
+
+
+def test_typo_tolerant_match():
+    index = make_index()
+    assert index.match('chateau margo', 1, 80)[0][0] == 1
+    assert index.match('Пенфолс', 1, 70)[0][0] == 4
+    assert index.match('cloudy bya', 1, 70)[0][0] == 3
+    assert index.match('zzzz', 5, 70) == []
+    assert index.match('', 5) == []
+
+
+def test_one_result_per_id():
+    ids = [id for id, _ in make_index().match('chateau', 10, 50)]
+    assert sorted(ids) == [1, 2]
+
+
+def test_match_many_keeps_order():
+    result = make_index().match_many(['penfolds grange', None, 'chateau latur'], 1, 80)
+    assert [found[0][0] if found else None for found in result] == [4, None, 2]
+
+
+@pytest.mark.parametrize('cells, calls', [(1 << 22, 1), (1, 4)])
+def test_match_many_one_matrix_per_block(monkeypatch, cells, calls):
+    """ одна матрица cdist на пачку; пачки по MATRIX_CELLS дают тот же результат, что запросы по одному """
+    index = make_index()
+    queries = ['chateau margo', 'zzzz', 'Пенфолс', 'cloudy bya', 'chateau']
+    expected = [index.match(query, 3, 50) for query in queries]
+    cdist, shapes = fuzzy_index.process.cdist, []
+
+    def counted(queries, choices, **kwargs):
+        shapes.append((len(queries), len(choices)))
+        return cdist(queries, choices, **kwargs)
+
+    monkeypatch.setattr(fuzzy_index, 'MATRIX_CELLS', cells)
+    monkeypatch.setattr(fuzzy_index.process, 'cdist', counted)
+    assert index.match_many(queries, 3, 50) == expected
+    assert len(shapes) == calls and sum(rows for rows, _ in shapes) == 4
+
+
+def test_update_remove_and_compact():
+    index = make_index()
+    index.update([(2, ('Opus One',))], removed=[4])
+    assert index.match('chateau latour', 1, 90) == []
+    assert index.match('opus one', 1, 90)[0][0] == 2
+    assert index.match('penfolds grange', 1, 80) == []
+    index.update([(id, (f'wine {id}',)) for id in range(10, 10 + COMPACT_MIN)])
+    index.update(removed=range(10, 10 + COMPACT_MIN))
+    assert index.dead == 0 and len(index.choices) == len(index.owners) == 4
+    assert index.match('cloudy bay', 1, 80)[0][0] == 3
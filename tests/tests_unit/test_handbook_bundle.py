@@ -0,0 +1,55 @@
+# tests/tests_unit/test_handbook_bundle.py
+"""
+    модульные тесты пакетной выдачи справочников: токен версий, версия справочника
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+import pytest
+from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+from app.core.exceptions import AppBaseException
+from app.preact.handbook_bundle.service import decode_versions, encode_versions, HandbookBundleService
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class Country(_Base):
+    __tablename__ = 'countries_bundle_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class Region(_Base):
+    __tablename__ = 'regions_bundle_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    country_id: Mapped[Optional[int]] = mapped_column(ForeignKey('countries_bundle_test.id'))
+    country: Mapped[Optional[Country]] = relationship()
+
+
+def test_token_round_trip():
+    versions = {'regions': ['2026-01-01T00:00:00+00:00', 10, None]}
+    token = encode_versions('ru', versions)
+    assert '=' not in token
+    assert decode_versions(token, 'ru') == versions
+    assert decode_versions(token, 'en') == {}
+    assert decode_versions(None, 'ru') == {}
+
+
+def test_invalid_token():
+    with pytest.raises(AppBaseException):
+        decode_versions('not a token', 'ru')
+
+
+def test_version_includes_parents():
+    t1 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    t2 = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    stats = {'regions_bundle_test': (t1, 5), 'countries_bundle_test': (t2, 3)}
+    assert HandbookBundleService.version(Region, stats) == [t1.isoformat(), 5, t2.isoformat()]
+    assert HandbookBundleService.version(Country, stats) == [t2.isoformat(), 3, None]
+    stats['regions_bundle_test'] = (None, 0)
+    assert HandbookBundleService.version(Region, stats) == [None, 0, t2.isoformat()]
@@ -0,0 +1,86 @@
+# tests/tests_unit/test_handbook_cache.py
+"""
+    модульные тесты кеша справочников: версии таблиц, ETag, 304
+"""
+from typing import Optional
+
+import pytest
+from sqlalchemy import ForeignKey
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from starlette.requests import Request
+
+from app.core.repositories.table_version import TableVersion
+from app.preact.core.handbook_cache import HandbookCache
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class Country(_Base):
+    __tablename__ = 'countries_cache_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+
+class Region(_Base):
+    __tablename__ = 'regions_cache_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    country_id: Mapped[Optional[int]] = mapped_column(ForeignKey('countries_cache_test.id'))
+    country: Mapped[Optional[Country]] = relationship()
+
+
+def make_request(etag: str = None) -> Request:
+    headers = [(b'if-none-match', etag.encode())] if etag else []
+    return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': headers})
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    HandbookCache.clear()
+    yield
+    HandbookCache.clear()
+
+
+async def test_cache_hit_and_invalidation_by_parent():
+    calls = []
+
+    async def loader() -> bytes:
+        calls.append(1)
+        return b'[{"id":1,"name":"France. Bordeaux"}]'
+
+    assert HandbookCache.tables(Region) == ('regions_cache_test', 'countries_cache_test')
+    first = await HandbookCache.get(('regions', 'en'), Region, loader)
+    second = await HandbookCache.get(('regions', 'en'), Region, loader)
+    assert first is second and len(calls) == 1
+    TableVersion.bump(Country)      # изменение родителя меняет name в выдаче справочника
+    third = await HandbookCache.get(('regions', 'en'), Region, loader)
+    assert len(calls) == 2 and third.etag == first.etag
+
+
+async def test_list_built_before_commit_not_served_after():
+    """ запрос во время незавершенной записи видит старые данные - после commit справочник строится заново """
+    contents = [b'[{"id":1,"name":"France"}]', b'[{"id":1,"name":"Francia"}]']
+
+    async def loader() -> bytes:
+        return contents.pop(0)
+
+    writer = AsyncSession()
+    writer.sync_session.begin()
+    TableVersion.mark(writer, Country)      # Repository.patch: flush, commit - в get_db после ответа
+    stale = await HandbookCache.get(('regions', 'es'), Region, loader)
+    await writer.commit()
+    fresh = await HandbookCache.get(('regions', 'es'), Region, loader)
+    assert b'Francia' in fresh.content and fresh.etag != stale.etag
+
+
+async def test_etag_and_304():
+    async def loader() -> bytes:
+        return b'[]'
+
+    entry = await HandbookCache.get(('countries', 'ru'), Country, loader)
+    response = HandbookCache.response(make_request(), entry)
+    assert response.status_code == 200 and response.headers['etag'] == entry.etag
+    assert HandbookCache.response(make_request(entry.etag), entry).status_code == 304
+    assert HandbookCache.response(make_request(f'"x", W/{entry.etag}'), entry).status_code == 304
+    assert HandbookCache.response(make_request('"other"'), entry).status_code == 200
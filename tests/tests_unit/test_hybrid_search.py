@@ -0,0 +1,58 @@
+# tests/tests_unit/test_hybrid_search.py
+"""
+    модульные тесты гибридного поиска: reciprocal rank fusion, таймауты и отказ движков
+"""
+import asyncio
+
+import pytest
+
+from app.core.config.project_config import settings
+from app.core.utils.rank_fusion import reciprocal_rank_fusion
+from app.support.item.hybrid_search import HybridSearch
+
+
+def test_rrf_merges_rankings():
+    fused = reciprocal_rank_fusion({'pg': [1, 2, 3], 'ch': [3, 1, 4]}, k=60)
+    assert [id for id, _ in fused] == [1, 3, 2, 4]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+    assert [id for id, _ in reciprocal_rank_fusion({'pg': [5, 5, 6]})] == [5, 6]
+    assert [id for id, _ in reciprocal_rank_fusion({'pg': [1], 'ch': [2]})] == [2, 1]   # равенство - id desc
+    assert [id for id, _ in reciprocal_rank_fusion({'pg': [1], 'ch': [2]}, weights={'pg': 2})] == [1, 2]
+
+
+def backend(ids, delay=0.0, error=False):
+    async def ranking(*args):
+        await asyncio.sleep(delay)
+        if error:
+            raise RuntimeError('down')
+        return ids
+    return classmethod(ranking)
+
+
+@pytest.fixture
+def fast_budget(monkeypatch):
+    for name, value in (('HYBRID_BUDGET', 200), ('HYBRID_PG_TIMEOUT', 100), ('HYBRID_CH_TIMEOUT', 100)):
+        monkeypatch.setattr(settings, name, value)
+
+
+def test_both_backends(monkeypatch, fast_budget):
+    monkeypatch.setattr(HybridSearch, 'pg_ranking', backend([1, 2]))
+    monkeypatch.setattr(HybridSearch, 'ch_ranking', backend([2, 3]))
+    pairs, report = asyncio.run(HybridSearch.search('red wine', ch_client=object()))
+    assert [id for id, _ in pairs] == [2, 1, 3]
+    assert report['pg']['status'] == report['ch']['status'] == 'ok'
+    assert report['ch']['count'] == 2 and report['pg']['ms'] >= 0
+
+
+def test_degrades_to_answering_backend(monkeypatch, fast_budget):
+    monkeypatch.setattr(HybridSearch, 'pg_ranking', backend([1, 2], delay=1))
+    monkeypatch.setattr(HybridSearch, 'ch_ranking', backend([3]))
+    pairs, report = asyncio.run(HybridSearch.search('red wine', ch_client=object()))
+    assert [id for id, _ in pairs] == [3]
+    assert report['pg']['status'] == 'timeout' and report['ch']['status'] == 'ok'
+    monkeypatch.setattr(HybridSearch, 'ch_ranking', backend([3], error=True))
+    monkeypatch.setattr(HybridSearch, 'pg_ranking', backend([1]))
+    pairs, report = asyncio.run(HybridSearch.search('red wine', ch_client=object()))
+    assert [id for id, _ in pairs] == [1] and report['ch']['status'] == 'error'
+    pairs, report = asyncio.run(HybridSearch.search('red wine'))
+    assert report['ch'] == {'status': 'unavailable'}
@@ -0,0 +1,55 @@
+# tests/tests_unit/test_inverted_index.py
+"""
+    модульные тесты инвертированного индекса в памяти: AND / OR, префиксы, курсор, инкрементальные изменения
+"""
+from app.core.utils.inverted_index import InvertedIndex
+
+DOCS = {1: 'chateau margaux bordeaux red wine',
+        2: 'chateau latour pauillac bordeaux',
+        3: 'barolo red wine piemonte',
+        4: 'margaux margaux red',
+        5: None}
+
+
+def make_index() -> InvertedIndex:
+    index = InvertedIndex()
+    index.update(DOCS.items())
+    return index
+
+
+def test_and_or():
+    index = make_index()
+    assert len(index) == 4
+    assert sorted(index.search('bordeaux red ', 10)[0].tolist()) == [1]
+    ids, _ = index.search('bordeaux barolo ', 10, mode='or')
+    assert sorted(ids.tolist()) == [1, 2, 3]
+    assert index.search('bordeaux piemonte ', 10)[0].tolist() == []
+
+
+def test_prefix_and_ranking():
+    index = make_index()
+    assert sorted(index.search('marg', 10)[0].tolist()) == [1, 4]
+    assert sorted(index.search('red marg', 10)[0].tolist()) == [1, 4]
+    # tf выше - score выше
+    assert index.search('margaux ', 10)[0].tolist()[0] == 4
+
+
+def test_cursor_order():
+    index = make_index()
+    ids, scores = index.search('red ', 10)
+    assert list(zip(scores.tolist(), ids.tolist())) == sorted(zip(scores.tolist(), ids.tolist()), reverse=True)
+    # курсор включительно: следующая страница начинается с якоря
+    next_ids, _ = index.search('red ', 10, last_score=scores[1], last_id=int(ids[1]))
+    assert next_ids.tolist() == ids[1:].tolist()
+    assert len(index.search('red ', 1)[0]) == 1
+
+
+def test_incremental_update():
+    index = make_index()
+    index.update([(3, 'barolo bianco'), (6, 'bordeaux blanc')], removed=[2])
+    assert sorted(index.search('bordeaux ', 10)[0].tolist()) == [1, 6]
+    assert sorted(index.search('red ', 10)[0].tolist()) == [1, 4]
+    assert index.search('bian', 10)[0].tolist() == [3]
+    index.update([(1, '')])
+    assert 1 not in index.docs and sorted(index.search('bordeaux ', 10)[0].tolist()) == [6]
+    assert index.total_len == sum(length for _, length in index.docs.values())
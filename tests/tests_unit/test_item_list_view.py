@@ -0,0 +1,41 @@
+# tests/tests_unit/test_item_list_view.py
+"""
+    модульные тесты read model item_list_view: формат строки и генерация триггеров
+"""
+from decimal import Decimal
+
+from app.core.utils.alchemy_utils import transform_list_view, transform_list_view_row
+from app.support.item import list_view
+from app.support.item.model import ItemListRow
+
+LANGS = ('_ru', '', '_fr')
+
+
+def test_row_matches_transform_list_view():
+    source = {'id': 1, 'vol': 0.75, 'seaweed_fids': ['1,aa', '2,bb'],
+              'drink': {'title': 'Chateau', 'title_ru': '',
+                        'subcategory': {'category': {'name': 'Wine', 'name_ru': 'Вино'}},
+                        'site': {'subregion': {'region': {'country': {'name': 'France', 'name_fr': 'France'}}}}}}
+    row = {'id': 1, 'vol': Decimal('0.75'), 'thumbnail': '2,bb', 'title': {'title': 'Chateau', 'title_ru': ''},
+           'category': {'name': 'Wine', 'name_ru': 'Вино'}, 'country': {'name': 'France', 'name_fr': 'France'}}
+    assert transform_list_view_row(row, LANGS, 'default') == transform_list_view(source, LANGS, 'default')
+
+
+def test_row_default_image_and_empty():
+    row = {'id': 2, 'vol': None, 'thumbnail': None, 'title': {'title': 'X'}, 'category': None, 'country': {}}
+    assert transform_list_view_row(row, LANGS, 'default') == {'id': 2, 'image_id': 'default', 'title': 'X'}
+
+
+def test_install_sql_covers_chain():
+    statements = '\n'.join(list_view.install_sql())
+    assert f'CREATE OR REPLACE FUNCTION {ItemListRow.__tablename__}_refresh' in statements
+    for table in list_view.PATHS:
+        assert f'AFTER UPDATE ON {table}' in statements
+    assert 'AFTER INSERT ON items' in statements
+
+
+def test_watched_columns_exist():
+    from app.core.models.base_model import Base
+    tables = Base.metadata.tables
+    for table, columns in list_view.watched_columns().items():
+        assert columns and set(columns) <= set(tables[table].columns.keys()), table
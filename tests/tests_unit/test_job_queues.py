@@ -0,0 +1,105 @@
+# tests/tests_unit/test_job_queues.py
+"""
+    модульные тесты arq-очередей фоновых задач: воркеры по очередям, постановка задач, повторная постановка
+    вместо redis - FakeArq (хранит очереди в памяти, как ArqRedis не ставит повторно тот же _job_id)
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import jobs_arq_worker
+from app.core.config.project_config import settings
+from app.core.services import job_service
+from app.core.services.job_service import JobRunner
+
+
+class FakeArq:
+    def __init__(self):
+        self.queues = {}
+
+    async def enqueue_job(self, function, *args, _job_id=None, _queue_name=None):
+        queue = self.queues.setdefault(_queue_name, {})
+        if _job_id in queue:
+            return None
+        queue[_job_id] = (function, args)
+        return SimpleNamespace(job_id=_job_id)
+
+    async def zcard(self, queue):
+        return len(self.queues.get(queue, {}))
+
+
+class FakeSession:
+    def __init__(self, row):
+        self.row = row
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, stmt):
+        return SimpleNamespace(one_or_none=lambda: self.row)
+
+    async def commit(self):
+        pass
+
+
+def row(**values):
+    base = {column.key: None for column in job_service.Job.__table__.c}
+    base.update(id=7, name='search_reindex', key='search_reindex', status='pending', params={}, processed=0,
+                errors=0, resumed_from=0)
+    base.update(values)
+    return SimpleNamespace(**base)
+
+
+@pytest.fixture
+def arq(monkeypatch):
+    fake = FakeArq()
+    monkeypatch.setattr(JobRunner, '_arq', fake)
+    monkeypatch.setattr(settings, 'ARQ_JOBS', True)
+    return fake
+
+
+def test_handlers_have_queues():
+    assert set(JobRunner.handlers) >= {'search_reindex', 'merging', 'mongo_to_seaweed',
+                                       'translation_benchmark', 'parse_names'}
+    assert set(JobRunner.queues.values()) <= set(settings.ARQ_QUEUES)
+
+
+@pytest.mark.parametrize('worker, queue', [(jobs_arq_worker.CpuImagesWorker, 'cpu-images'),
+                                           (jobs_arq_worker.LlmWorker, 'llm'),
+                                           (jobs_arq_worker.DbMaintenanceWorker, 'db-maintenance'),
+                                           (jobs_arq_worker.CrawlWorker, 'crawl')])
+def test_worker_per_queue(worker, queue):
+    assert worker.queue_name == queue and worker.max_jobs == settings.ARQ_QUEUES[queue]['max_jobs']
+    assert worker.keep_result == 0 and [function.name for function in worker.functions] == ['run_job']
+
+
+def test_submit_enqueues_instead_of_running(arq, monkeypatch):
+    monkeypatch.setattr(job_service.DatabaseManager, 'session_maker', lambda: FakeSession(row()), raising=False)
+    monkeypatch.setattr(JobRunner, 'spawn', classmethod(lambda cls, row: pytest.fail('выполнение в процессе API')))
+    job = asyncio.run(JobRunner.submit('search_reindex', {}, 'search_reindex'))
+    assert job['id'] == 7 and job['queue'] == 'db-maintenance'
+    assert arq.queues['db-maintenance'] == {'job-7': ('run_job', (7,))}
+
+
+def test_requeue_is_idempotent(arq, monkeypatch):
+    async def requeue(cls):
+        return [row(id=1, name='mongo_to_seaweed'), row(id=2, name='parse_names')]
+
+    monkeypatch.setattr(JobRunner, 'requeue', classmethod(requeue))
+    assert asyncio.run(JobRunner.resume()) == 2
+    asyncio.run(JobRunner.resume())
+    state = asyncio.run(JobRunner.queues_state())
+    assert state['cpu-images']['queued'] == 1 and state['crawl']['queued'] == 1
+    assert 'parse_names' in state['crawl']['jobs']
+
+
+def test_enqueue_error_keeps_job(monkeypatch):
+    async def broken():
+        raise ConnectionError('redis down')
+
+    monkeypatch.setattr(JobRunner, 'arq', staticmethod(broken))
+    asyncio.run(JobRunner.enqueue(3, 'merging'))
@@ -0,0 +1,144 @@
+# tests/tests_unit/test_job_service.py
+"""
+    модульные тесты фоновых задач: статусы, прогресс и скорость, checkpoint конвейера переиндексации
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateIndex
+
+import app.support  # noqa: F401 регистрация моделей
+from app.core.config.project_config import settings
+from app.core.models.job_model import Job
+from app.core.repositories.reindex_pipeline import ReindexPipeline
+from app.core.services.job_service import JobContext, JobRunner
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def row(**values):
+    base = {column.key: None for column in Job.__table__.c}
+    base.update(id=1, name='test', key='test', status='running', params={}, processed=0, errors=0,
+                resumed_from=0, cancel_requested=False)
+    base.update(values)
+    return SimpleNamespace(**base)
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    flushed = []
+
+    async def flush(self, **values):
+        flushed.append({**self.values(), **values})
+        return self.cancelled
+
+    monkeypatch.setattr(JobContext, 'flush', flush)
+    monkeypatch.setattr(JobRunner, 'handlers', {})
+    monkeypatch.setattr(JobRunner, 'queues', {})
+    monkeypatch.setattr(JobRunner, 'tasks', {})
+    monkeypatch.setattr(JobRunner, 'contexts', {})
+    return flushed
+
+
+def test_active_key_index():
+    [index] = [index for index in Job.__table__.indexes if index.name == 'uq_jobs_active_key']
+    sql = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert 'UNIQUE' in sql and "WHERE status IN ('pending', 'running')" in sql
+
+
+def test_progress_accumulates():
+    ctx = JobContext(row(processed=10, checkpoint={'item_id': 5}))
+    ctx.progress(3, {'item_id': 9}, total=100)
+    ctx.progress(2, errors=1, error='boom')
+    assert ctx.values() == {'processed': 15, 'errors': 1, 'total': 100,
+                            'checkpoint': {'item_id': 9}, 'last_error': 'boom'}
+
+
+def test_rate_and_eta():
+    started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    job = row(processed=300, resumed_from=100, total=1000, started_at=started,
+              heartbeat_at=started + timedelta(seconds=10))
+    result = JobRunner.as_dict(job)
+    assert result['rate'] == 20 and result['eta'] == 35
+    assert JobRunner.as_dict(row(status='done', processed=5))['eta'] is None
+
+
+@pytest.mark.parametrize('outcome, status', [('ok', 'done'), ('error', 'failed'),
+                                             ('cancel', 'cancelled'), ('shutdown', 'pending')])
+def test_run_statuses(runner, outcome, status):
+    async def handler(ctx):
+        ctx.progress(1, {'n': 1})
+        if outcome == 'error':
+            raise RuntimeError('bad')
+        if outcome in ('cancel', 'shutdown'):
+            ctx.cancelled = outcome == 'cancel'
+            raise asyncio.CancelledError
+
+    JobRunner.register('test', 'db-maintenance')(handler)
+    ctx = JobContext(row())
+    asyncio.run(JobRunner._run(ctx))
+    assert runner[-1]['status'] == status and runner[-1]['checkpoint'] == {'n': 1}
+    assert (runner[-1]['last_error'] == 'bad') == (outcome == 'error')
+
+
+def test_submit_in_request_starts_after_commit(runner, monkeypatch):
+    """ PATCH: запись задачи возвращается сразу, старт - после commit транзакции запроса, rollback - отмена """
+    started = []
+
+    async def handler(ctx):
+        pass
+
+    async def execute(stmt):
+        return SimpleNamespace(one_or_none=lambda: row(id=len(started) + 5, status='running'))
+
+    JobRunner.register('test', 'db-maintenance')(handler)
+    monkeypatch.setattr(JobRunner, 'spawn', classmethod(lambda cls, job: started.append(job.id)))
+
+    async def scenario():
+        session = AsyncSession()
+        session.execute = execute
+        session.sync_session.begin()
+        job = await JobRunner.submit('test', {'id': 3}, session=session)
+        assert job['id'] == 5 and not started
+        await session.commit()
+        assert started == [5]
+        session.sync_session.begin()
+        await JobRunner.submit('test', {'id': 4}, session=session)
+        await session.rollback()
+        session.sync_session.begin()
+        await session.commit()
+        assert started == [5]
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_checkpoint_resume(monkeypatch):
+    """ checkpoint - непрерывный префикс записанных пачек; after продолжает с него """
+    seen, progress = [], []
+
+    async def read_batches(cls, session_factory, pairs_stmt=None, batch=None, after=None):
+        for start in range((after or -1) + 1, 1000, 100):
+            yield [(id, {'id': id, 'title': f'wine {id}'}) for id in range(start, start + 100)]
+
+    async def write_batch(cls, session, rows):
+        seen.extend(id for id, _ in rows)
+        return len(rows)
+
+    monkeypatch.setattr(ReindexPipeline, 'read_batches', classmethod(read_batches))
+    monkeypatch.setattr(ReindexPipeline, 'write_batch', classmethod(write_batch))
+    monkeypatch.setattr(settings, 'REINDEX_WORKERS', 3)
+    asyncio.run(ReindexPipeline.run(FakeSession, {'id'}, after=499,
+                                    on_progress=lambda rows, checkpoint: progress.append((rows, checkpoint))))
+    assert sorted(seen) == list(range(500, 1000))
+    assert sum(rows for rows, _ in progress) == 500 and progress[-1][1] == 999
+    assert [checkpoint for _, checkpoint in progress] == sorted(checkpoint for _, checkpoint in progress)
@@ -0,0 +1,44 @@
+# tests/tests_unit/test_localization_plan.py
+"""
+    модульные тесты плана локализации api view: результат == transform_api_list_view
+"""
+import pytest
+
+from app.core.utils.alchemy_utils import transform_api_list_view
+from app.core.utils.localization_plan import get_api_plan
+
+LANGUAGES = ['', '_ru', '_fr']
+
+
+def names(base: str, field: str = 'name', skip: tuple = ()) -> dict:
+    return {f'{field}{lang}': f'{base}{lang}' for lang in LANGUAGES if lang not in skip}
+
+
+ITEMS = [
+    {'id': 1, 'vol': 0.75, 'updated_at': '2025-01-02T03:04:05+00:00', 'seaweed_fids': ['20,cf', '16,d0'],
+     'drink': {'alc': 13.5, 'anno': '2019', **names('Chateau X 2019 Grand Cru', 'title', skip=('_fr',)),
+               **names('sub', 'subtitle'), 'description_ru': 'описание',
+               'designation': names('Grand Cru'),
+               'subcategory': {**names('Red'), 'category': names('Wine')},
+               'producer': {**names('Rothschild'), 'producertitle': names('Baron')},
+               'site': {**names('Pauillac'), 'subregion': {**names('Medoc'), 'region': {
+                   **names('Bordeaux'), 'country': {'name': 'France'}}}},
+               'varietal_associations': [{'percentage': 60.0, 'varietal': names('Merlot')}],
+               'food_associations': [{'food': names('Beef', skip=('',))}]}},
+    {'id': 2, 'drink': {'title': 'Plain', 'subcategory': {'name': 'Cognac', 'category': {'name': 'Brandy'}}}},
+    {'id': 3, 'vol': 0.5, 'drink': {'title_ru': 'Только ру',
+                                    'subcategory': {'name': 'Tawny', 'category': {'name': 'Fortified Wine'}},
+                                    'producer': {'name': 'Taylor'}}},
+]
+
+
+@pytest.mark.parametrize('item', ITEMS, ids=lambda item: str(item['id']))
+def test_plan_equals_transform(item):
+    plan = get_api_plan('en', tuple(LANGUAGES))
+    assert plan.apply(item, 'default') == transform_api_list_view(item, 'en', LANGUAGES[:], 'default')
+
+
+def test_plan_cached_and_batch():
+    plan = get_api_plan('en', tuple(LANGUAGES))
+    assert get_api_plan('en', tuple(LANGUAGES)) is plan
+    assert plan.apply_many(ITEMS, 'img') == [transform_api_list_view(i, 'en', LANGUAGES[:], 'img') for i in ITEMS]
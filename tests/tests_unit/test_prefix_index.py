@@ -0,0 +1,46 @@
+# tests/tests_unit/test_prefix_index.py
+"""
+    модульные тесты префиксного индекса справочников: нормализация, языки, изменения
+"""
+from app.core.utils.prefix_index import normalize, PrefixIndex, REBUILD_THRESHOLD
+
+
+def test_normalize_like_unaccent_lower():
+    assert normalize(' Château ') == 'chateau'
+    assert normalize('Ёлка') == 'елка'
+    assert normalize('Œil-de-Perdrix') == 'oeil-de-perdrix'
+    assert normalize('Weißburgunder') == 'weissburgunder'
+
+
+def test_prefix_over_all_languages():
+    index = PrefixIndex()
+    index.update([(1, ('Merlot', 'Мерло', None)), (2, ('Malbec', 'Мальбек', '')), (3, ('Mérite', None, None))])
+    assert index.startswith('me') == [3, 1]
+    assert index.startswith('МЕР') == [1]
+    assert index.startswith('м') == [2, 1]
+    assert index.startswith('m', limit=2) == [2, 3]
+    assert index.startswith('x') == []
+
+
+def test_incremental_update_and_remove():
+    index = PrefixIndex()
+    index.update([(1, ('Merlot',)), (2, ('Malbec',))])
+    index.update([(1, ('Syrah', 'Shiraz'))])
+    assert index.startswith('mer') == []
+    assert index.startswith('sh') == [1]
+    index.update(removed=[2])
+    assert index.startswith('m') == []
+    assert len(index) == 1
+
+
+def test_bulk_update_matches_incremental():
+    rows = [(id, (f'name {id:04d}', f'имя {id}')) for id in range(REBUILD_THRESHOLD * 2)]
+    bulk, single = PrefixIndex(), PrefixIndex()
+    bulk.update(rows)
+    for row in rows:
+        single.update([row])
+    bulk.update(removed=range(0, len(rows), 2))
+    for id in range(0, len(rows), 2):
+        single.update(removed=[id])
+    assert bulk.entries == single.entries
+    assert bulk.startswith('name 001') == list(range(11, 20, 2))
@@ -0,0 +1,77 @@
+# tests/tests_unit/test_reindex_pipeline.py
+"""
+    модульные тесты конвейера переиндексации: стадии, ограниченные очереди, процессы, ошибки
+"""
+import asyncio
+
+import pytest
+
+from app.core.config.project_config import settings
+from app.core.repositories import reindex_pipeline
+from app.core.repositories.reindex_pipeline import ReindexPipeline
+from app.core.utils.reindexation import search_content_batch
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def drink(n: int) -> dict:
+    return {'id': n, 'title': f'Château Margaux {n}', 'subcategory': {'name': 'Red\nWine'}, 'alc': 13.5}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    written = []
+
+    async def read_batches(cls, session_factory, pairs_stmt=None, batch=None, after=None):
+        for start in range(0, 1000, 250):
+            yield [(id, drink(id)) for id in range(start, start + 250)]
+
+    async def write_batch(cls, session, rows):
+        written.extend(rows)
+        return len(rows)
+
+    monkeypatch.setattr(ReindexPipeline, 'read_batches', classmethod(read_batches))
+    monkeypatch.setattr(ReindexPipeline, 'write_batch', classmethod(write_batch))
+    monkeypatch.setattr(settings, 'REINDEX_WORKERS', 2)
+    monkeypatch.setattr(settings, 'REINDEX_QUEUE', 1)
+    return written
+
+
+def test_search_content_batch():
+    [(id, content)] = search_content_batch([(7, drink(7))], {'id'})
+    assert id == 7
+    assert set(content.split()) == {'chateau', 'margaux', 'red', 'wine', '13#5'}
+    assert search_content_batch([(8, {'id': 1})], {'id'}) == [(8, '')]
+
+
+def test_pipeline_inline(pipeline):
+    report = asyncio.run(ReindexPipeline.run(FakeSession, {'id'}))
+    assert sorted(id for id, _ in pipeline) == list(range(1000))
+    assert report['updated'] == 1000
+    for stage in ('read', 'extract', 'write'):
+        assert report[stage]['rows'] == 1000 and report[stage]['batches'] == 4
+
+
+def test_pipeline_process_pool(pipeline, monkeypatch):
+    monkeypatch.setattr(reindex_pipeline, 'INLINE_ROWS', 0)
+    try:
+        report = asyncio.run(ReindexPipeline.run(FakeSession, {'id'}))
+    finally:
+        ReindexPipeline.shutdown()
+    assert report['extract']['rows'] == 1000
+    assert dict(pipeline)[3] == search_content_batch([(3, drink(3))], {'id'})[0][1]
+
+
+def test_pipeline_error_cancels_stages(pipeline, monkeypatch):
+    async def write_batch(cls, session, rows):
+        raise RuntimeError('copy failed')
+
+    monkeypatch.setattr(ReindexPipeline, 'write_batch', classmethod(write_batch))
+    with pytest.raises(RuntimeError, match='copy failed'):
+        asyncio.run(asyncio.wait_for(ReindexPipeline.run(FakeSession, {'id'}), 5))
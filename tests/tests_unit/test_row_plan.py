@@ -0,0 +1,80 @@
+# tests/tests_unit/test_row_plan.py
+"""
+    модульные тесты чтения через .mappings(): результат RowPlan == to_dict_fast
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+from unittest.mock import AsyncMock
+
+from sqlalchemy import create_engine, ForeignKey, Numeric, select
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, selectinload, Session
+
+from app.core.models.base_model import Base
+from app.core.repositories.row_plan import RowPlan
+
+
+class _Base(DeclarativeBase):
+    to_dict_fast = Base.to_dict_fast
+
+
+class Country(_Base):
+    __tablename__ = 'countries_plan_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+    name_ru: Mapped[Optional[str]]
+
+
+class Region(_Base):
+    __tablename__ = 'regions_plan_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+    country_id: Mapped[Optional[int]] = mapped_column(ForeignKey('countries_plan_test.id'))
+    country: Mapped[Optional[Country]] = relationship()
+    created_at: Mapped[Optional[datetime]]
+    grapes: Mapped[List['Grape']] = relationship()
+
+
+class Grape(_Base):
+    __tablename__ = 'grapes_plan_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    region_id: Mapped[int] = mapped_column(ForeignKey('regions_plan_test.id'))
+    share: Mapped[Optional[Decimal]] = mapped_column(Numeric(5, 2))
+    name: Mapped[str]
+
+
+def make_db():
+    engine = create_engine('sqlite://')
+    _Base.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add_all([Country(id=1, name='France', name_ru='Франция'),
+                   Region(id=1, name='Bordeaux', country_id=1, created_at=datetime(2025, 1, 2, 3, 4)),
+                   Region(id=2, name='Nowhere'),
+                   Grape(id=1, region_id=1, share=Decimal('60.50'), name='Merlot'),
+                   Grape(id=2, region_id=1, name='Cabernet')])
+        s.commit()
+    return engine
+
+
+async def test_rows_equal_to_dict_fast():
+    engine = make_db()
+    relations = {'country': {}, 'grapes': {}}
+    plan = RowPlan.get(Region, relations)
+    with engine.connect() as conn:
+        session = AsyncMock()
+        session.execute = AsyncMock(side_effect=conn.execute)
+        rows = await plan.fetch(plan.select().order_by(Region.id), session)
+    with Session(engine) as s:
+        orm = s.execute(select(Region).options(selectinload(Region.country), selectinload(Region.grapes))
+                        .order_by(Region.id)).scalars().all()
+        expected = [obj.to_dict_fast() for obj in orm]
+    assert rows == expected
+    assert rows[0]['grapes'][0]['share'] == 60.5
+    assert 'country' not in rows[1]
+
+
+def test_parents_and_starts():
+    assert RowPlan.parents(Region) == {'country': {}}
+    plan = RowPlan.get(Region, RowPlan.parents(Region), starts=('id', 'name'))
+    assert [key for key, _ in plan.root.columns] == ['id', 'name']
+    assert RowPlan.get(Region, {'country': {}}, starts=('id', 'name')) is plan
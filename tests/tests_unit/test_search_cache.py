@@ -0,0 +1,95 @@
+# tests/tests_unit/test_search_cache.py
+"""
+    модульные тесты кеша результатов умного поиска: ключ, поколение (после commit), TTL, бюджет по байтам
+"""
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config.project_config import settings
+from app.core.repositories.search_cache import SearchResultCache
+from app.core.repositories.table_version import TableVersion
+from app.core.services.search_service import CleanedSearchQuery
+
+QUERY = CleanedSearchQuery(scenario=3, fts_query='red & wine', like_term='mer', cursor=None)
+PAIRS = [(10, 0.5), (9, 0.25)]
+ANCHORS = [{'page_offset': 1, 'last_score': '0.10000000', 'last_id': 3}]
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    SearchResultCache.clear()
+    yield
+    SearchResultCache.clear()
+
+
+def put(key, pairs=PAIRS, anchors=ANCHORS):
+    SearchResultCache.put(key, pairs, anchors, SearchResultCache.generation())
+
+
+def test_key_uses_normalized_query_and_cursor():
+    key = SearchResultCache.key(QUERY, Decimal('0.5'), 10, 20, 5)
+    assert key == SearchResultCache.key(QUERY._replace(cursor='abc'), Decimal('0.50').normalize(), 10, 20, 5)
+    assert key != SearchResultCache.key(QUERY, None, None, 20, 5)
+    assert SearchResultCache.key(None, None, None, 20, 5)[0] is None
+
+
+def test_hit_and_invalidation():
+    key = SearchResultCache.key(QUERY, None, None, 20, 5)
+    put(key)
+    assert SearchResultCache.get(key) == (PAIRS, ANCHORS)
+    SearchResultCache.bump()
+    assert SearchResultCache.get(key) is None
+    put(key)
+    TableVersion.bump('items')
+    assert SearchResultCache.get(key) is None
+
+
+def test_stale_generation_is_not_served():
+    key = SearchResultCache.key(QUERY, None, None, 20, 5)
+    generation = SearchResultCache.generation()
+    SearchResultCache.bump()    # запись пришла во время запроса
+    SearchResultCache.put(key, PAIRS, ANCHORS, generation)
+    assert SearchResultCache.get(key) is None
+
+
+def test_write_invalidates_after_commit():
+    """ поиск между записью search_content и commit кешируется под старым поколением """
+    key = SearchResultCache.key(QUERY, None, None, 20, 5)
+    writer = AsyncSession()
+    writer.sync_session.begin()
+    SearchResultCache.mark(writer)          # ReindexPipeline.write_batch: UPDATE, commit
+    put(key)
+    assert SearchResultCache.get(key) == (PAIRS, ANCHORS)
+    asyncio.run(writer.commit())
+    assert SearchResultCache.get(key) is None
+    put(key)
+    writer.sync_session.begin()
+    SearchResultCache.mark(writer)
+    asyncio.run(writer.rollback())
+    assert SearchResultCache.get(key) == (PAIRS, ANCHORS)
+
+
+def test_ttl(monkeypatch):
+    key = SearchResultCache.key(QUERY, None, None, 20, 5)
+    put(key)
+    monkeypatch.setattr(settings, 'SEARCH_CACHE_TTL', 0)
+    assert SearchResultCache.get(key) is None
+
+
+def test_byte_budget_evicts_least_recent(monkeypatch):
+    keys = [SearchResultCache.key(QUERY, None, None, limit, 5) for limit in (10, 20, 30)]
+    put(keys[0])
+    size = SearchResultCache._bytes
+    monkeypatch.setattr(settings, 'SEARCH_CACHE_BYTES', size * 2 + 1)
+    put(keys[1])
+    SearchResultCache.get(keys[0])
+    put(keys[2])
+    assert SearchResultCache.get(keys[1]) is None
+    assert SearchResultCache.get(keys[0]) is not None
+    assert SearchResultCache._bytes <= settings.SEARCH_CACHE_BYTES
+    monkeypatch.setattr(settings, 'SEARCH_CACHE_BYTES', 1)
+    put(keys[1])
+    assert SearchResultCache.get(keys[1]) is None
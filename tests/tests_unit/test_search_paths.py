@@ -0,0 +1,28 @@
+# tests/tests_unit/test_search_paths.py
+"""
+    модульные тесты путей справочник -> items
+"""
+from sqlalchemy.dialects import postgresql
+
+import app.support  # noqa: F401 регистрация моделей
+from app.core.repositories.search_paths import item_chain, item_drink_stmt
+from app.service_registry import _SEARCH_DEPENDENCIES
+from app.support.country.model import Country
+from app.support.food.model import Food
+from app.support.sweetness.model import Sweetness
+
+
+def test_every_dependency_reaches_items():
+    for model in _SEARCH_DEPENDENCIES:
+        assert item_chain(model)[-1].key == 'items'
+    assert [attr.key for attr in item_chain(Country)] == ['regions', 'subregions', 'sites', 'drinks', 'items']
+    assert [attr.key for attr in item_chain(Food)] == ['drink_associations', 'drink', 'items']
+    # путь "item" в реестре не разрешается - кратчайшая цепочка
+    assert [attr.key for attr in item_chain(Sweetness)] == ['drinks', 'items']
+
+
+def test_single_statement():
+    stmt = item_drink_stmt(Country, [3])
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    assert sql.startswith('SELECT DISTINCT items.id, items.drink_id')
+    assert 'JOIN sites ON subregions.id = sites.subregion_id' in sql and 'countries.id IN (3)' in sql
@@ -0,0 +1,112 @@
+# tests/tests_unit/test_search_session.py
+"""
+    модульные тесты сессий поиска: курсор, TTL, срезы страниц, ленивый рост, keyset продолжение за пределами сессии
+"""
+import asyncio
+
+import pytest
+
+from app.core.config.project_config import settings
+from app.core.exceptions import AppBaseException
+from app.core.repositories.search_session import SearchSessionStore
+from app.core.services.search_service import CleanedSearchQuery
+from app.support.item.service import ItemService
+
+QUERY = CleanedSearchQuery(scenario=2, fts_query='red & wine')
+RANKED = [(id, round(1 - id / 100, 8)) for id in range(1, 48)]
+
+
+@pytest.fixture(autouse=True)
+def clean_sessions():
+    SearchSessionStore.clear()
+    yield
+    SearchSessionStore.clear()
+
+
+class FakeRepository:
+    def __init__(self):
+        self.ranked = 0
+        self.requested = []
+        self.keyset = []
+
+    async def rank_smart_items(self, session, query_data, max_rows, after=None):
+        self.ranked += 1
+        self.requested.append(max_rows)
+        return [pair for pair in RANKED if after is None or pair[0] > after[1]][:max_rows]
+
+    async def get_list_view_rows_by_scores(self, session, pairs):
+        return [id for id, _ in pairs]
+
+    async def find_items_smart_page(self, session, query_data, last_score, last_id, limit, jump_pages):
+        self.keyset.append((last_score, last_id))
+        return [id for id, _ in RANKED if id >= last_id][:limit], []
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    repo = FakeRepository()
+    monkeypatch.setattr(ItemService, 'repository', repo)
+    monkeypatch.setattr(ItemService, 'convert_rows_to_list_view', classmethod(lambda cls, request, rows, lang: rows))
+    return repo
+
+
+def page(cursor=None, limit=10):
+    return asyncio.run(ItemService.execute_search_session_page(None, 'en', QUERY, None, limit, cursor))
+
+
+def test_cursor_round_trip():
+    token = SearchSessionStore.encode_cursor('abc', 40)
+    assert '=' not in token
+    assert SearchSessionStore.decode_cursor(token) == ('abc', 40)
+    assert SearchSessionStore.decode_cursor(None) == (None, 0)
+    with pytest.raises(AppBaseException):
+        SearchSessionStore.decode_cursor('not-a-cursor')
+
+
+def test_pages_are_sliced_from_one_ranking(repository):
+    first = page()
+    assert first['items'] == list(range(1, 11))
+    assert [a['page_offset'] for a in first['anchors']] == [1, 2, 3, 4]
+    assert first['anchors'][0]['last_id'] == 11
+    jump = page(first['anchors'][2]['cursor'])
+    assert jump['items'] == list(range(31, 41))
+    assert page(jump['anchors'][0]['cursor'])['items'] == list(range(41, 48))
+    assert repository.ranked == 1
+
+
+def test_expired_session_is_rebuilt_at_same_offset(repository, monkeypatch):
+    cursor = page()['anchors'][0]['cursor']
+    monkeypatch.setattr(settings, 'SEARCH_SESSION_TTL', 0)
+    assert page(cursor)['items'] == list(range(11, 21))
+    assert repository.ranked == 2
+
+
+def test_truncated_session_continues_by_keyset(repository, monkeypatch):
+    monkeypatch.setattr(settings, 'SEARCH_SESSION_ROWS', 25)
+    first = page()
+    assert [a['last_id'] for a in first['anchors']] == [11, 21]
+    result = page(first['anchors'][1]['cursor'])
+    assert repository.keyset == [('0.79000000', 21)]
+    assert result['items'] == list(range(21, 31))
+
+
+def test_first_page_ranks_only_page_and_anchors(repository):
+    """ первая страница - limit * jump_pages + 1 строк, дальше сессия растет продолжением """
+    first = page(limit=5)
+    assert repository.requested == [26] and first['items'] == list(range(1, 6))
+    assert [a['last_id'] for a in first['anchors']] == [6, 11, 16, 21, 26]
+    result = page(first['anchors'][4]['cursor'], limit=5)
+    assert repository.requested == [26, 25]
+    assert result['items'] == list(range(26, 31))
+    assert [a['last_id'] for a in result['anchors']] == [31, 36, 41, 46]
+    assert page(result['anchors'][3]['cursor'], limit=5)['items'] == [46, 47]
+    assert repository.ranked == 2 and repository.keyset == []
+
+
+def test_growth_stops_at_session_rows(repository, monkeypatch):
+    monkeypatch.setattr(settings, 'SEARCH_SESSION_ROWS', 30)
+    first = page(limit=5)
+    result = page(first['anchors'][4]['cursor'], limit=5)
+    assert repository.requested == [26, 5] and result['items'] == list(range(26, 31))
+    assert page(result['anchors'][0]['cursor'], limit=5)['items'] == list(range(31, 36))
+    assert repository.keyset == [('0.69000000', 31)] and repository.ranked == 2
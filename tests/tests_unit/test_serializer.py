@@ -0,0 +1,81 @@
+# tests/tests_unit/test_serializer.py
+"""
+    модульные тесты компилированного сериализатора: результат == прежний to_dict_fast (to_dict_reflective)
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+import orjson
+import pytest
+from sqlalchemy import ARRAY, ForeignKey, Numeric, String
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.models.base_model import Base
+from app.core.models.serializer import dumps, get_serializer, serialize_list
+
+
+class _Base(DeclarativeBase):
+    to_dict_fast = Base.to_dict_fast
+    to_dict_reflective = Base.to_dict_reflective
+
+
+class Country(_Base):
+    __tablename__ = 'countries_serializer_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+    name_ru: Mapped[Optional[str]]
+
+
+class Region(_Base):
+    __tablename__ = 'regions_serializer_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+    share: Mapped[Optional[Decimal]] = mapped_column(Numeric(5, 2))
+    sparkling: Mapped[Optional[bool]]
+    count: Mapped[Optional[int]]
+    tags: Mapped[Optional[list]] = mapped_column(ARRAY(String))
+    created_at: Mapped[Optional[datetime]]
+    country_id: Mapped[Optional[int]] = mapped_column(ForeignKey('countries_serializer_test.id'))
+    country: Mapped[Optional[Country]] = relationship()
+    grapes: Mapped[List['Grape']] = relationship()
+
+
+class Grape(_Base):
+    __tablename__ = 'grapes_serializer_test'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    region_id: Mapped[int] = mapped_column(ForeignKey('regions_serializer_test.id'))
+    name: Mapped[Optional[str]]
+
+
+def make(model, **fields):
+    obj = model()
+    for key, val in fields.items():
+        set_committed_value(obj, key, val)
+    return obj
+
+
+def make_regions():
+    country = make(Country, id=1, name='France', name_ru='')
+    return [make(Region, id=1, name='Bordeaux', share=Decimal('60.50'), sparkling=False, count=0,
+                 tags=['a'], created_at=datetime(2025, 1, 2, 3, 4), country=country,
+                 grapes=[make(Grape, id=1, name='Merlot'), make(Grape, id=2, name='')]),
+            make(Region, id=2, name='', share=None, tags=[], country=None, grapes=[]),
+            make(Region, id=3, name='Loire')]    # связи и часть колонок не загружены
+
+
+@pytest.mark.parametrize('skip_empty', [True, False])
+@pytest.mark.parametrize('exclude', [None, ('created_at', 'grapes')])
+def test_same_as_reflective(skip_empty, exclude):
+    regions = make_regions()
+    expected = [obj.to_dict_reflective(exclude, skip_empty) for obj in regions]
+    assert [obj.to_dict_fast(exclude, skip_empty) for obj in regions] == expected
+    assert serialize_list(regions, exclude, skip_empty) == expected
+    assert orjson.loads(dumps(regions, exclude, skip_empty)) == expected
+
+
+def test_serializer_cached():
+    assert get_serializer(Region) is get_serializer(Region, [], True)
+    assert get_serializer(Region, ['id']) is get_serializer(Region, {'id'})
+    assert get_serializer(Region, skip_empty=False) is not get_serializer(Region)
@@ -0,0 +1,36 @@
+# tests/tests_unit/test_stream_utils.py
+"""
+    модульные тесты потоковой выдачи (NDJSON / JSON массив)
+"""
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.core.utils.stream_utils import encode_batches, stream_format
+
+
+async def batches(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(fmt, *chunks) -> bytes:
+    return b''.join([part async for part in encode_batches(batches(*chunks), fmt)])
+
+
+async def test_json_array():
+    body = await collect('json', [{'id': 1}, {'id': 2}], [], [{'id': 3, 'name': 'Côte'}])
+    assert orjson.loads(body) == [{'id': 1}, {'id': 2}, {'id': 3, 'name': 'Côte'}]
+    assert await collect('json') == b'[]'
+
+
+async def test_ndjson():
+    body = await collect('ndjson', [{'id': 1}], [{'id': 2}, {'id': 3}])
+    assert [orjson.loads(line) for line in body.splitlines()] == [{'id': 1}, {'id': 2}, {'id': 3}]
+
+
+def test_stream_format():
+    assert stream_format(None) is None
+    assert stream_format('ndjson') == 'ndjson'
+    with pytest.raises(HTTPException):
+        stream_format('xml')